@@ -0,0 +1,69 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactPipelineError(RuntimeError):
+    def __init__(self, errors):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"Failed to generate report artifacts ({details})")
+
+
+class ArtifactPipeline:
+    """
+    Runs the post-session artifact emitters on a thread pool. A stage starts once every
+    stage it depends on has finished; stages whose dependencies failed are skipped, and
+    all failures are raised together once the pipeline has drained.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.timings = {}
+        self.skipped = []
+
+    def add_stage(self, name, func, depends_on=()):
+        if name in self.stages:
+            raise ValueError(f"Duplicate artifact stage: {name}")
+        missing = [dependency for dependency in depends_on if dependency not in self.stages]
+        if missing:
+            raise ValueError(f"Artifact stage '{name}' depends on unknown stages: {', '.join(missing)}")
+        self.stages[name] = (func, tuple(depends_on))
+
+    def run(self):
+        if not self.stages:
+            return
+        errors = {}
+        workers = self.max_workers or len(self.stages)
+        # Stages are submitted in insertion order, so dependencies are always picked up by
+        # the pool before the stages waiting on them and a single worker cannot deadlock.
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pytest-html-plus") as executor:
+            futures = {}
+            for name, (func, depends_on) in self.stages.items():
+                dependencies = [futures[dependency] for dependency in depends_on]
+                futures[name] = executor.submit(self._run_stage, name, func, dependencies)
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[name] = e
+
+        if errors:
+            raise ArtifactPipelineError(errors)
+
+    def _run_stage(self, name, func, dependencies):
+        for dependency in dependencies:
+            if dependency.exception() is not None:
+                self.skipped.append(name)
+                logger.warning(f"Skipping report artifact '{name}': a stage it depends on failed")
+                return None
+
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            logger.info(f"Report artifact '{name}' finished in {self.timings[name]:.2f}s")
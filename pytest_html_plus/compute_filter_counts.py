@@ -20,6 +20,8 @@ def compute_filter_count(results):
             filters["skipped"] += 1
         if not links:
             filters["untracked"] += 1
+        if test.get("duration_regression"):
+            filters["regressed"] += 1
 
         for marker in markers:
             marker_counts[marker] += 1
@@ -35,3 +37,52 @@ def compute_filter_count(results):
 
     filters["marker_counts"] = dict(marker_counts)
     return dict(filters)
+
+
+STATUS_CODES = {"passed": 0, "failed": 1, "error": 2, "skipped": 3}
+
+
+def compute_filter_index(results, flake_history=None):
+    """
+    Builds the column-oriented index the report filters run on: one entry per test, in
+    report order, with marker membership packed into 32-bit words. ``flake_history`` holds
+    the nodeids found flaky over recent runs.
+    """
+    flake_history = flake_history or {}
+    marker_names = sorted({
+        marker
+        for test in results
+        if isinstance(test.get("markers"), list)
+        for marker in test["markers"]
+    })
+    marker_bit = {marker: bit for bit, marker in enumerate(marker_names)}
+    marker_words = max(1, (len(marker_names) + 31) // 32)
+
+    index = {
+        "status": [],
+        "duration": [],
+        "flaky": [],
+        "history_flaky": [],
+        "regressed": [],
+        "linked": [],
+        "marker_names": marker_names,
+        "marker_words": marker_words,
+        "marker_bits": [],
+        "by_duration": [],
+    }
+    for test in results:
+        index["status"].append(STATUS_CODES.get(test.get("status"), STATUS_CODES["skipped"]))
+        index["duration"].append(round(test.get("duration") or 0, 6))
+        index["flaky"].append(1 if test.get("flaky") else 0)
+        index["history_flaky"].append(1 if test.get("nodeid") in flake_history else 0)
+        index["regressed"].append(1 if test.get("duration_regression") else 0)
+        index["linked"].append(1 if test.get("links") else 0)
+        words = [0] * marker_words
+        markers = test.get("markers")
+        for marker in markers if isinstance(markers, list) else ():
+            bit = marker_bit[marker]
+            words[bit // 32] |= 1 << (bit % 32)
+        index["marker_bits"].extend(words)
+
+    index["by_duration"] = sorted(range(len(results)), key=lambda i: -index["duration"][i])
+    return index
@@ -1,4 +1,5 @@
 import json
+import os
 from datetime import datetime
 
 from pytest_html_plus.utils import is_main_worker, get_env_marker, get_report_title, \
@@ -20,3 +21,18 @@ def write_plus_metadata_if_main_worker(config, report_path, output_path="plus_me
     }
     with open(output_path, "w") as f:
         json.dump(metadata, f, indent=2)
+
+
+def update_plus_metadata_if_main_worker(output_path="plus_metadata.json", **fields):
+    """
+    Adds fields that are only known once the session is under way to the run metadata.
+    """
+    if not is_main_worker():
+        return
+    metadata = {}
+    if os.path.exists(output_path):
+        with open(output_path) as f:
+            metadata = json.load(f)
+    metadata.update(fields)
+    with open(output_path, "w") as f:
+        json.dump(metadata, f, indent=2)
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+
+from pytest_html_plus.utils import extract_trace_block, extract_error_block
+
+DETAIL_SHARD_SIZE = 500
+DETAILS_DIRNAME = "plus_details"
+
+# (key, label, css class) in the order the sections are shown in an expanded test
+DETAIL_SECTIONS = (
+    ("error", "Error", "error-content"),
+    ("trace", "Trace", "trace-content"),
+    ("stdout", "STDOUT", ""),
+    ("stderr", "STDERR", ""),
+    ("logs", "Logs", ""),
+)
+
+
+def collect_test_details(test):
+    """
+    Returns the non-empty text sections shown when a test is expanded.
+    """
+    details = {}
+    if test.get("error"):
+        error_content = extract_error_block(test["error"])
+        trace_content = extract_trace_block(test.get("trace"))
+        if error_content and error_content.strip():
+            details["error"] = error_content
+        if trace_content and trace_content.strip():
+            details["trace"] = trace_content
+
+    for key in ("stdout", "stderr"):
+        if test.get(key):
+            details[key] = test[key]
+
+    logs_content = test.get("logs")
+    if logs_content:
+        if isinstance(logs_content, list):
+            logs_display = "\n".join(str(item) for item in logs_content if item)
+        else:
+            logs_display = str(logs_content)
+        if logs_display.strip():
+            details["logs"] = logs_display
+    return details
+
+
+def shard_filename(shard):
+    return f"details_{shard:05d}.js"
+
+
+class DetailShardWriter:
+    """
+    Collects per-test details and writes them in fixed-size JavaScript shards under the
+    report directory. Each shard calls plusDetailsLoaded(shard, details) so the page can
+    load it with a plain <script> tag, which also works from file:// without a server.
+    """
+
+    def __init__(self, output_dir, shard_size=DETAIL_SHARD_SIZE):
+        self.directory = os.path.join(output_dir, DETAILS_DIRNAME)
+        self.shard_size = shard_size
+        self.shard = 0
+        self.pending = []
+        # Shards from a previous render would otherwise be served for the wrong tests
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def add(self, details, screenshot=None):
+        if len(self.pending) >= self.shard_size:
+            self.flush()
+        if screenshot:
+            details = dict(details, screenshot=screenshot.replace("\\", "/"))
+        self.pending.append(details)
+        return self.shard, len(self.pending) - 1
+
+    def flush(self):
+        if not self.pending:
+            return
+        path = os.path.join(self.directory, shard_filename(self.shard))
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"plusDetailsLoaded({self.shard}, ")
+                json.dump(self.pending, f, ensure_ascii=True, separators=(",", ":"))
+                f.write(");\n")
+        except OSError as e:
+            raise RuntimeError(f"Failed to write test details to {path}: {e}") from e
+        self.shard += 1
+        self.pending = []
@@ -0,0 +1,137 @@
+import heapq
+import os
+import statistics
+
+from pytest_html_plus.history_store import HistoryStore, history_path
+from pytest_html_plus.json_merge import iter_report_records
+
+# Expected duration of a test when no previous duration is known for any test
+DEFAULT_DURATION_ESTIMATE = 1.0
+HISTORY_SUFFIX = ".sqlite"
+UNSTABLE_STATUSES = ("failed", "error")
+
+
+def load_run_history(config):
+    """
+    Expected duration per nodeid and the nodeids that failed, errored or flaked last time:
+    from the file given with --plus-durations-from, else from whichever of the run history
+    (median durations over the recent runs) and the previous JSON report was written last.
+    Empty when none of them exists yet.
+    """
+    source = config.getoption("--plus-durations-from")
+    if source:
+        return load_history(source) if source.endswith(HISTORY_SUFFIX) else load_report(source)
+
+    path = history_path(config)
+    report_path = config.getoption("--json-report") or "final_report.json"
+    # A history no longer recorded to must not shadow newer reports
+    if os.path.exists(report_path) and (not os.path.exists(path) or os.path.getmtime(report_path) > os.path.getmtime(path)):
+        return load_report(report_path)
+    durations, unstable = load_history(path)
+    if not durations and os.path.exists(report_path):
+        return load_report(report_path)
+    return durations, unstable
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {}, set()
+    store = HistoryStore(path)
+    try:
+        return store.recent_durations(), store.latest_unstable()
+    finally:
+        store.close()
+
+
+def load_report(path):
+    if not os.path.exists(path):
+        return {}, set()
+    durations = {}
+    unstable = set()
+    try:
+        for test, _, _ in iter_report_records(path):
+            nodeid = test.get("nodeid") or test.get("test")
+            if not nodeid:
+                continue
+            if isinstance(test.get("duration"), (int, float)):
+                durations[nodeid] = test["duration"]
+            if test.get("status") in UNSTABLE_STATUSES or test.get("flaky"):
+                unstable.add(nodeid)
+    except ValueError:
+        # A report truncated by an interrupted run is no basis for scheduling
+        return {}, set()
+    return durations, unstable
+
+
+def estimate_durations(nodeids, durations):
+    """
+    Expected duration of each nodeid, in order. Tests without a known duration are assumed to
+    take the median of the known ones.
+    """
+    known = [durations[nodeid] for nodeid in nodeids if nodeid in durations]
+    default = statistics.median(known) if known else DEFAULT_DURATION_ESTIMATE
+    return [durations.get(nodeid, default) for nodeid in nodeids]
+
+
+def lpt_order(items, durations, workers=0):
+    """
+    Longest-processing-time-first order for xdist's load scheduling, which the plugin limits to
+    one new test at a time (--maxschedchunk=1): each worker then asks for the next pending
+    test as it frees up, so starting with the longest tests keeps the workers finishing
+    together. The first handout still gives every worker two consecutive tests, so with
+    ``workers`` known the first round is paired up, the longest test with the shortest
+    of that round. Ties keep the collection order, so every worker collects the same order.
+    """
+    estimates = estimate_durations([item.nodeid for item in items], durations)
+    order = sorted(range(len(items)), key=lambda index: -estimates[index])
+    if workers > 1 and len(order) >= 2 * workers:
+        first_round = order[:2 * workers]
+        order[:2 * workers] = [
+            index for worker in range(workers) for index in (first_round[worker], first_round[-1 - worker])
+        ]
+    return [items[index] for index in order]
+
+
+def failed_first_order(items, durations, unstable):
+    """
+    Fast-feedback order: tests that failed, errored or flaked last time first, then the rest,
+    each group by ascending expected duration, so a broken build fails as early as possible.
+    """
+    estimates = estimate_durations([item.nodeid for item in items], durations)
+    order = sorted(range(len(items)), key=lambda index: (items[index].nodeid not in unstable, estimates[index]))
+    return [items[index] for index in order]
+
+
+def parse_shard(value):
+    """
+    Parses an ``i/N`` shard spec into a 1-based shard index and the shard count.
+    """
+    index, _, count = str(value).partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Expected a shard as i/N, got {value!r}") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard {value!r} is out of range; i must be between 1 and N")
+    return index, count
+
+
+def plan_shards(nodeids, durations, shards):
+    """
+    Greedy longest-processing-time partition: tests are taken longest first, nodeid breaking
+    ties, and each goes to the shard with the least expected work so far (the lowest index on
+    ties). Every machine that collects the same tests with the same durations computes the
+    same plan. Returns the 0-based shard of each nodeid and the expected work per shard.
+    """
+    estimates = estimate_durations(nodeids, durations)
+    order = sorted(range(len(nodeids)), key=lambda index: (-estimates[index], nodeids[index]))
+    loads = [(0.0, shard) for shard in range(shards)]
+    assignment = [0] * len(nodeids)
+    for index in order:
+        load, shard = heapq.heappop(loads)
+        assignment[index] = shard
+        heapq.heappush(loads, (load + estimates[index], shard))
+    expected = [0.0] * shards
+    for load, shard in loads:
+        expected[shard] = load
+    return assignment, expected
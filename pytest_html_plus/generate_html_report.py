@@ -1,14 +1,797 @@
 import argparse
 import base64
+import hashlib
 import json
 import os
 import shutil
-from datetime import datetime, timezone
 import html
+from functools import lru_cache
 from sys import path
 
-from pytest_html_plus.compute_filter_counts import compute_filter_count
-from pytest_html_plus.utils import extract_trace_block, extract_error_block
+from pytest_html_plus.compute_filter_counts import compute_filter_count, compute_filter_index
+from pytest_html_plus.detail_shards import DETAIL_SECTIONS, DetailShardWriter, collect_test_details
+from pytest_html_plus.history_store import read_duration_regressions, read_flake_rates
+from pytest_html_plus.report_model import ReportModel, summarize_results
+from pytest_html_plus.result_record import ResultRecord, json_default
+from pytest_html_plus.search_index import build_search_index
+from pytest_html_plus.resolver_driver import SCREENSHOT_SUFFIX
+
+
+HTML_WRITE_BUFFER_SIZE = 1024 * 1024
+
+REPORT_CSS = """
+    
+      body {
+  font-family: Arial, sans-serif;
+  padding: 1rem;
+  background: #FAF7F2;  
+}
+      .test {
+   border: 1px solid #D9C3A5; 
+  margin-bottom: 0.5rem;
+  border-radius: 5px;
+  background: #FDFBF7;     
+}
+      .header { padding: 0.5rem; cursor: pointer; display: flex; justify-content: space-between; align-items: center; gap: 8px; flex-wrap: wrap; }
+      .header.passed {
+  background: #E1F3E8; 
+  color: #1E6B3A;   
+  border-left: 4px solid #2E7D32;
+}
+      .header.failed {
+  background: #FBE4E4;   
+  color: #8B1E1E;      
+  border-left: 4px solid #C62828;
+}
+      .header.skipped {
+  background: #fff8e1;
+  color: #b36b00;
+}
+      .header.error {
+  background: #fdecea;
+  color: #b71c1c;
+}
+      .details { padding: 0.5rem 1rem; display: none; border-top: 1px solid #ddd; }
+      .toggle::before { content: "▶"; display: inline-block; margin-right: 0.5rem; transition: transform 0.3s ease; }
+      .header.expanded .toggle::before { transform: rotate(90deg); }
+      .checkbox-container { margin-bottom: 1rem; display: flex; flex-wrap: wrap; gap: 0.5rem; align-items: center; }
+      .details-content { display: flex; gap: 1rem; align-items: flex-start; }
+      .details-text { flex: 1; min-width: 0; }
+      .details-screenshot { flex-shrink: 0; margin: 1rem; box-shadow: 0 0 10px 0 rgba(0, 0, 0, 0.1); }
+      .details-screenshot img {width: 300px; height: 200px; object-fit: contain; border: 1px solid #ccc; border-radius: 3px; background: #f8f8f8; cursor: pointer; transition: transform 0.2s ease; transform: scale(1.05); }
+      .details-screenshot img:hover {  transform: scale(1.05); }
+      
+      /* Handle content wrapping */
+      .details-text { 
+        word-wrap: break-word;
+        overflow-wrap: break-word;
+      }
+      
+      /* Special handling for links and pre-formatted text */
+      .details-text a { 
+        word-break: break-all; 
+      }
+      .details-text pre { 
+        white-space: pre-wrap;
+        max-width: 100%;
+        word-break: break-all;  
+      }
+    
+      /* Mobile and tablet responsiveness */
+      @media (max-width: 768px) {
+        .header { flex-direction: column; align-items: stretch; gap: 0.5rem; }
+        .header-section { justify-content: space-between; }
+        .test-info { min-width: auto; }
+        .meta { flex-direction: column; gap: 0.25rem; }
+        .badges-and-timing { justify-content: flex-start; flex-wrap: wrap; }
+        .badges-and-timing > * { margin-left: 0; margin-right: 0.5rem; }
+        
+        .details-content { flex-direction: column; gap: 0.5rem; }
+        .details-screenshot { align-self: center; }
+        .details-screenshot img { width: 100%; max-width: 300px; height: auto; min-height: 150px; }
+        
+        /* For Mobile URL handling */
+        .header a { max-width: 100px; }
+        .nodeid-badge code { max-width: 200px; }
+      }
+      
+      @media (max-width: 480px) {
+        .header { padding: 0.75rem 0.5rem; }
+        .details { padding: 0.5rem; }
+        .test-info strong { font-size: 0.9rem; }
+        .nodeid-badge code { font-size: 0.5em; }
+        .worker-id { font-size: 0.75em; }
+        .timestamp { font-size: 0.85em; }
+        
+        .details-screenshot img { max-width: 100%; height: auto; min-height: 120px; }
+        
+        .checkbox-container { flex-direction: column; gap: 0.5rem; }
+        .checkbox-container label { margin-left: 0 !important; }
+      }
+      .details-screenshot img.fullscreen { position: fixed; top: 50%; left: 50%; transform: translate(-50%, -50%) scale(1); width: auto; height: auto; max-width: 90vw; max-height: 90vh; z-index: 1000; background: white; box-shadow: 0 4px 20px rgba(0,0,0,0.5); border-radius: 8px; }
+      .fullscreen-overlay { position: fixed; top: 0; left: 0; width: 100vw; height: 100vh; background: rgba(0,0,0,0.8); z-index: 999; display: none; }  
+      .search-container { margin-bottom: 1rem; }
+      .search-container input { box-sizing: border-box; }
+      .header-section { display: flex; align-items: center; gap: 8px; flex-wrap: wrap; }
+      .test-info { flex: 1; min-width: 200px; word-break: break-word; white-space: normal; }
+      .meta { justify-content: flex-start; flex: 1; word-break: break-word; white-space: normal; }
+      .badges-and-timing { justify-content: flex-end; flex-wrap: wrap; }
+      .timestamp { white-space: nowrap; font-weight: bold; }
+      .badges-and-timing > * { margin-left: 24px; }
+      
+      /* Handle long URLs in header links */
+      .header a { word-break: break-all; overflow-wrap: break-word; max-width: 150px; display: inline-block; }
+      .nodeid-badge code { word-break: break-all; overflow-wrap: break-word; max-width: 300px; }
+      
+      .inline-copy-btn { cursor: pointer; background: none; border: 1px solid #ddd; border-radius: 3px; padding: 2px 4px; font-size: 0.8em; margin-left: 8px; color: #666; transition: all 0.2s ease; line-height: 1; } 
+      .inline-copy-btn:hover { border-color: #999; background: #f5f5f5; color: #333; }
+      .copy-icon { width: 12px; height: 12px; fill: none; stroke: currentColor; stroke-width: 2; vertical-align: middle; }
+      .nodeid-badge { display: flex; align-items: center; gap: 6px; }
+      .nodeid-badge code { font-size: 0.6em; color: #555; }
+      .worker-id { background: #ddd; border-radius: 3px; padding: 2px 5px; font-size: 0.85em; font-weight: bold; }
+      .is-flaky, .link-badge, .history-flaky { color: white; padding: 2px 6px; border-radius: 3px; font-weight: bold; font-size: 0.85em; }
+      .is-flaky { background: #f39c12; }
+      .history-flaky { background: #8e44ad; margin-left: 6px; margin-right: 6px; }
+      .duration-regression { color: white; background: #c0392b; padding: 2px 6px; border-radius: 3px; font-weight: bold; font-size: 0.85em; margin-right: 6px; }
+      .link-badge { background: #3498db; text-decoration: none; margin-right: 6px; }
+      .flaky-slot { display: inline-block; min-width: 40px; }
+      .link-slot { display: inline-block; min-width: 45px; }
+      .error-content pre { background: #fef2f2; border-left: 4px solid #dc2626; padding: 12px; border-radius: 4px; color: #7f1d1d; margin: 8px 0; }
+      .trace-content pre { background: #fef7ed; border-left: 4px solid #ea580c; padding: 12px; border-radius: 4px; color: #9a3412; margin: 8px 0; }
+      .details-text div pre { background: #f8fafc; border: 1px solid #e2e8f0; padding: 12px; border-radius: 4px; margin: 8px 0; font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace; font-size: 0.85em; line-height: 1.4; }
+      .details-text div strong { display: inline-flex; align-items: center; gap: 8px; margin-bottom: 8px; font-weight: 600; color: #374151; }
+      .trace-content strong, .error-content strong { margin-bottom: 12px; }
+      .report-metadata {
+        margin-bottom: 5px;
+        font-family: sans-serif;
+        background: #f9f9f9;
+        border: 1px solid #ddd;
+        border-radius: 3px;
+        padding: 5px;
+    }
+
+    .report-metadata summary {
+        font-size: 0.5em;
+        cursor: pointer;
+        margin-bottom: 5px;
+    }
+
+    .report-metadata table {
+        width: 100%;
+        border-collapse: collapse;
+    }
+    
+    .muted-hint code {
+  background: #f1f5f9;
+  padding: 2px 4px;
+  border-radius: 4px;
+  font-size: 0.9em;
+}
+
+    .report-metadata th, .report-metadata td {
+        text-align: left;
+        padding: 8px;
+        border-bottom: 1px solid #ddd;
+    }
+
+    .report-metadata th {
+        background-color: #eee;
+        width: 200px;
+    }
+    .hidden { display: none; }
+    #tests-container.virtual-list { position: relative; height: 75vh; overflow-y: auto; }
+    .virtual-list .virtual-row { position: absolute; top: 0; left: 0; right: 0; padding-bottom: 0.5rem; }
+    .virtual-list .virtual-row .test { margin-bottom: 0; }
+"""
+
+REPORT_SCRIPT = """
+      function toggleDetails(headerElem) {
+        headerElem.classList.toggle('expanded');
+        const details = headerElem.nextElementSibling;
+        const lazyContent = details.querySelector('.details-content[data-shard]');
+        if (lazyContent) loadTestDetails(lazyContent);
+        details.style.display = (details.style.display === 'block') ? 'none' : 'block';
+      }
+
+      const COPY_ICON = '<svg width="12" height="12" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">' +
+        '<rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>' +
+        '<path d="M5 15H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h9a2 2 0 0 1 2 2v1"></path></svg>';
+      const DETAIL_SECTIONS = [
+        ['error', 'Error', 'error-content'],
+        ['trace', 'Trace', 'trace-content'],
+        ['stdout', 'STDOUT', ''],
+        ['stderr', 'STDERR', ''],
+        ['logs', 'Logs', '']
+      ];
+      const detailShards = {};
+
+      // Details shards are plain scripts so they load from file:// without a server
+      function loadTestDetails(content) {
+        if (content.dataset.loaded) return;
+        content.dataset.loaded = 'true';
+        const shard = content.dataset.shard;
+        const position = Number(content.dataset.position);
+        const render = details => renderTestDetails(content, details[position] || {});
+        const entry = detailShards[shard];
+        if (entry && entry.details) {
+          render(entry.details);
+          return;
+        }
+        if (entry) {
+          entry.callbacks.push(render);
+          return;
+        }
+        detailShards[shard] = { details: null, callbacks: [render] };
+        const script = document.createElement('script');
+        script.src = 'plus_details/details_' + String(shard).padStart(5, '0') + '.js';
+        script.onerror = () => {
+          content.textContent = 'Could not load test details.';
+        };
+        document.head.appendChild(script);
+      }
+
+      function plusDetailsLoaded(shard, details) {
+        const entry = detailShards[shard];
+        if (!entry) return;
+        entry.details = details;
+        entry.callbacks.forEach(callback => callback(details));
+        entry.callbacks = [];
+      }
+
+      function renderTestDetails(content, detail) {
+        const text = document.createElement('div');
+        text.className = 'details-text';
+        DETAIL_SECTIONS.forEach(([key, label, className]) => {
+          if (!detail[key]) return;
+          const block = document.createElement('div');
+          if (className) block.className = className;
+          const title = document.createElement('strong');
+          title.textContent = label + ':';
+          const button = document.createElement('button');
+          button.className = 'inline-copy-btn';
+          button.title = 'Copy ' + key;
+          button.innerHTML = COPY_ICON;
+          button.onclick = event => {
+            event.stopPropagation();
+            copyFromElement(button);
+          };
+          const pre = document.createElement('pre');
+          pre.textContent = detail[key];
+          block.append(title, ' ', button, pre);
+          text.appendChild(block);
+        });
+        content.appendChild(text);
+
+        if (detail.screenshot) {
+          const wrapper = document.createElement('div');
+          wrapper.className = 'details-screenshot';
+          const img = document.createElement('img');
+          img.src = detail.screenshot;
+          img.alt = 'Screenshot';
+          img.onclick = () => toggleFullscreen(img);
+          wrapper.appendChild(img);
+          content.appendChild(wrapper);
+        }
+      }
+
+      function copyFromElement(button) {
+        const source = button.dataset.source
+          ? document.getElementById(button.dataset.source)
+          : button.parentElement.querySelector('pre, code');
+        copyText(source ? source.textContent : '', button);
+      }
+
+      function copyFromBase64(base64Content, button) {
+        // Decode base64 content for copy
+        copyText(atob(base64Content), button);
+      }
+
+      function copyText(text, button) {
+        try {
+          const originalContent = button.innerHTML;
+          navigator.clipboard.writeText(text).then(() => {
+            button.innerHTML = '<span style="color: #2f7a33;">✓</span>';
+            setTimeout(() => {
+              button.innerHTML = originalContent;
+            }, 1000);
+          }).catch(err => {
+            console.error("Copy failed:", err);
+            button.innerHTML = '<span style="color: #d32f2f;">✗</span>';
+            setTimeout(() => {
+              button.innerHTML = originalContent;
+            }, 1000);
+          });
+        } catch (error) {
+          console.error("Copy button error:", error);
+        }
+      }
+
+      function toggleFullscreen(img) {
+        const overlay = document.getElementById('fullscreen-overlay');
+        if (img.classList.contains('fullscreen')) {
+          img.classList.remove('fullscreen');
+          overlay.style.display = 'none';
+          document.body.style.overflow = 'auto';
+        } else {
+          img.classList.add('fullscreen');
+          overlay.style.display = 'block';
+          document.body.style.overflow = 'hidden';
+        }
+      }
+
+      function closeFullscreen() {
+        const fullscreenImg = document.querySelector('.details-screenshot img.fullscreen');
+        const overlay = document.getElementById('fullscreen-overlay');
+        
+        if (fullscreenImg) {
+          fullscreenImg.classList.remove('fullscreen');
+          overlay.style.display = 'none';
+          document.body.style.overflow = 'auto';
+        }
+      }
+
+
+      function toggleUntrackedInfo() {
+        const card = document.getElementById('untrackedInfoCard');
+        card.style.display = card.style.display === 'none' ? 'block' : 'none';
+      }
+
+      // Columnar filter index written by the generator (see compute_filter_index)
+      const STATUS_CODES = { passed: 0, failed: 1, error: 2, skipped: 3 };
+      const FILTER_CHECKBOX_IDS = [
+        'failedOnlyCheckbox', 'errorOnlyCheckbox', 'skippedOnlyCheckbox',
+        'longestOnlyCheckbox', 'untrackedOnlyCheckbox', 'flakyOnlyCheckbox', 'historyFlakyOnlyCheckbox',
+        'regressedOnlyCheckbox'
+      ];
+      let filterIndex = null;
+      let virtualList = null;
+      let testCards = null;
+      let cardVisible = null;
+      let cardOrder = 'natural';
+
+      function loadFilterIndex(raw) {
+        return {
+          count: raw.status.length,
+          status: Uint8Array.from(raw.status),
+          duration: Float64Array.from(raw.duration),
+          flaky: Uint8Array.from(raw.flaky),
+          historyFlaky: Uint8Array.from(raw.history_flaky),
+          regressed: Uint8Array.from(raw.regressed),
+          linked: Uint8Array.from(raw.linked),
+          markerNames: raw.marker_names,
+          markerWords: raw.marker_words,
+          markerBits: Uint32Array.from(raw.marker_bits),
+          byDuration: Uint32Array.from(raw.by_duration)
+        };
+      }
+
+      function markerMask(index, markers) {
+        const mask = new Uint32Array(index.markerWords);
+        markers.forEach(marker => {
+          const bit = index.markerNames.indexOf(marker);
+          if (bit >= 0) mask[bit >> 5] |= 1 << (bit & 31);
+        });
+        return mask;
+      }
+
+      function matchesMarkerMask(index, test, mask) {
+        const offset = test * index.markerWords;
+        for (let word = 0; word < index.markerWords; word++) {
+          if (index.markerBits[offset + word] & mask[word]) return true;
+        }
+        return false;
+      }
+
+      // Returns the indexes of the tests to show, in display order. Status checkboxes are
+      // combined with OR; untracked, flaky and marker filters narrow the result further.
+      function selectTests(index, state, searchMatches) {
+        const statuses = new Uint8Array(4);
+        if (state.failed) statuses[STATUS_CODES.failed] = 1;
+        if (state.error) statuses[STATUS_CODES.error] = 1;
+        if (state.skipped) statuses[STATUS_CODES.skipped] = 1;
+        const anyStatus = state.failed || state.error || state.skipped;
+        const mask = state.markers.length ? markerMask(index, state.markers) : null;
+        const order = state.longest ? index.byDuration : null;
+        const selected = [];
+        for (let k = 0; k < index.count; k++) {
+          const test = order ? order[k] : k;
+          if (searchMatches) {
+            // A search query looks across all tests, like the original search box
+            if (searchMatches.has(test)) selected.push(test);
+            continue;
+          }
+          if (anyStatus && !statuses[index.status[test]]) continue;
+          if (state.untracked && index.linked[test]) continue;
+          if (state.flaky && !index.flaky[test]) continue;
+          if (state.historyFlaky && !index.historyFlaky[test]) continue;
+          if (state.regressed && !index.regressed[test]) continue;
+          if (mask && !matchesMarkerMask(index, test, mask)) continue;
+          selected.push(test);
+        }
+        return selected;
+      }
+
+      // Self-contained so its source can also run inside the search worker
+      function createSearchEngine(index) {
+        const postings = new Map();
+        function posting(gram) {
+          if (!postings.has(gram)) {
+            const deltas = index.grams[gram];
+            let ids = null;
+            if (deltas) {
+              ids = new Uint32Array(deltas.length);
+              let id = 0;
+              for (let k = 0; k < deltas.length; k++) {
+                id += deltas[k];
+                ids[k] = id;
+              }
+            }
+            postings.set(gram, ids);
+          }
+          return postings.get(gram);
+        }
+        function intersect(a, b) {
+          const out = [];
+          let i = 0;
+          let j = 0;
+          while (i < a.length && j < b.length) {
+            if (a[i] === b[j]) { out.push(a[i]); i++; j++; } else if (a[i] < b[j]) i++; else j++;
+          }
+          return out;
+        }
+        return function search(query) {
+          const documents = index.documents;
+          const matches = [];
+          if (query.length < index.gram_size) {
+            for (let id = 0; id < documents.length; id++) {
+              if (documents[id].includes(query)) matches.push(id);
+            }
+            return matches;
+          }
+          const lists = [];
+          for (let i = 0; i + index.gram_size <= query.length; i++) {
+            const ids = posting(query.slice(i, i + index.gram_size));
+            if (!ids) return matches;
+            lists.push(ids);
+          }
+          lists.sort((a, b) => a.length - b.length);
+          let candidates = lists[0];
+          for (let k = 1; k < lists.length && candidates.length; k++) candidates = intersect(candidates, lists[k]);
+          for (const id of candidates) {
+            if (documents[id].includes(query)) matches.push(id);
+          }
+          return matches;
+        };
+      }
+
+      const SEARCH_DEBOUNCE_MS = 120;
+      const SEARCH_WORKER_SOURCE = createSearchEngine.toString() + `
+        let search = null;
+        onmessage = event => {
+          if (event.data.index !== undefined) {
+            search = createSearchEngine(JSON.parse(event.data.index));
+          } else {
+            postMessage({ id: event.data.id, matches: search(event.data.query) });
+          }
+        };`;
+      let searchWorker = null;
+      let searchEngine = null;
+      let searchRequest = 0;
+      let searchMatches = null;
+      let searchTimer = null;
+
+      function initializeSearchIndex() {
+        try {
+          const url = URL.createObjectURL(new Blob([SEARCH_WORKER_SOURCE], { type: 'text/javascript' }));
+          searchWorker = new Worker(url);
+          searchWorker.onmessage = event => showSearchResults(event.data.id, event.data.matches);
+          searchWorker.onerror = () => {
+            useMainThreadSearch();
+            runSearch();
+          };
+          searchWorker.postMessage({ index: document.getElementById('plus-search').textContent });
+        } catch (e) {
+          // Workers can be unavailable, e.g. for some browsers on file:// pages
+          useMainThreadSearch();
+        }
+      }
+
+      function useMainThreadSearch() {
+        searchWorker = null;
+        searchEngine = createSearchEngine(JSON.parse(document.getElementById('plus-search').textContent));
+      }
+
+      function runSearch() {
+        const query = readFilterState().query;
+        const id = ++searchRequest;
+        if (!query) {
+          showSearchResults(id, null);
+        } else if (searchWorker) {
+          searchWorker.postMessage({ id, query });
+        } else {
+          showSearchResults(id, searchEngine(query));
+        }
+      }
+
+      function showSearchResults(id, matches) {
+        if (id !== searchRequest) return;
+        searchMatches = matches ? new Set(matches) : null;
+        applyFilters();
+      }
+
+      function readFilterState() {
+        // The history filters are only rendered when the run history is on
+        const checked = id => Boolean(document.getElementById(id)?.checked);
+        const search = document.getElementById('universal-search');
+        return {
+          failed: checked('failedOnlyCheckbox'),
+          error: checked('errorOnlyCheckbox'),
+          skipped: checked('skippedOnlyCheckbox'),
+          longest: checked('longestOnlyCheckbox'),
+          untracked: checked('untrackedOnlyCheckbox'),
+          flaky: checked('flakyOnlyCheckbox'),
+          historyFlaky: checked('historyFlakyOnlyCheckbox'),
+          regressed: checked('regressedOnlyCheckbox'),
+          markers: Array.from(document.querySelectorAll('.marker-filter input[type="checkbox"]:checked')).map(cb => cb.value),
+          query: search ? search.value.toLowerCase() : ''
+        };
+      }
+
+      function applyFilters() {
+        const state = readFilterState();
+        const selected = selectTests(filterIndex, state, searchMatches);
+        if (virtualList) {
+          virtualList.setOrder(selected);
+        } else {
+          showCards(selected, state.longest && !searchMatches ? 'duration' : 'natural');
+        }
+      }
+
+      // Only cards whose visibility changed are touched, and the DOM is reordered only when
+      // switching between the natural and the longest-first order.
+      function showCards(selected, order) {
+        const visible = new Uint8Array(testCards.length);
+        selected.forEach(test => { visible[test] = 1; });
+        for (let test = 0; test < testCards.length; test++) {
+          if (visible[test] !== cardVisible[test]) {
+            testCards[test].style.display = visible[test] ? 'block' : 'none';
+          }
+        }
+        cardVisible = visible;
+        if (order !== cardOrder) {
+          const fragment = document.createDocumentFragment();
+          const sequence = order === 'duration' ? filterIndex.byDuration : testCards.map((_, test) => test);
+          sequence.forEach(test => fragment.appendChild(testCards[test]));
+          document.getElementById('tests-container').appendChild(fragment);
+          cardOrder = order;
+        }
+      }
+
+      function initializeUniversalSearch() {
+          const searchInput = document.getElementById('universal-search');
+          if (!searchInput) return;
+          searchInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(runSearch, SEARCH_DEBOUNCE_MS);
+          });
+      }
+
+      function escapeHtml(value) {
+        return String(value == null ? '' : value)
+          .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;')
+          .replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+      }
+
+      function statusClass(status) {
+        return ['passed', 'failed', 'error'].includes(status) ? status : 'skipped';
+      }
+
+      function renderVirtualCard(row) {
+        const links = row.links.length
+          ? row.links.map(url => '<a class="link-badge" href="' + escapeHtml(url) + '" target="_blank"> Link </a>').join('')
+          : '<span class="link-slot"></span>';
+        const flaky = (row.flaky ? '<span class="is-flaky">FLAKY</span>' : '<span class="flaky-slot"></span>') +
+          (row.history
+            ? '<span class="history-flaky" title="Failed or flaked in ' + row.history[0] + ' of the last ' +
+              row.history[1] + ' runs">FLAKE ' + row.history[0] + '/' + row.history[1] + '</span>'
+            : '') +
+          (row.regression
+            ? '<span class="duration-regression" title="Median ' + row.regression.median.toFixed(2) + 's, p90 ' +
+              row.regression.p90.toFixed(2) + 's over the last ' + row.regression.samples + ' passing runs">SLOWER ' +
+              (row.regression.median > 0
+                ? (row.duration / row.regression.median).toFixed(1) + '×'
+                : '+' + Number(row.duration).toFixed(2) + 's') + '</span>'
+            : '');
+        const lazy = row.shard !== undefined
+          ? ' data-shard="' + row.shard + '" data-position="' + row.position + '"'
+          : '';
+        return '<div class="test test-card">' +
+          '<div class="header ' + statusClass(row.status) + '">' +
+            '<div class="header-section test-info"><span class="toggle"></span>' +
+              '<strong>' + escapeHtml(row.name) + '</strong>' +
+              '<span>— ' + escapeHtml(String(row.status).toUpperCase()) + '</span></div>' +
+            '<div class="header-section meta">' +
+              '<span class="nodeid-badge"><code>' + escapeHtml(row.nodeid) + '</code>' +
+                '<button class="inline-copy-btn" title="Copy nodeid">' + COPY_ICON + '</button></span>' +
+              '<span class="worker-id">' + escapeHtml(row.worker) + '</span></div>' +
+            '<div class="header-section badges-and-timing">' + flaky + links +
+              '<span class="timestamp">⏱ ' + Number(row.duration || 0).toFixed(2) + 's</span></div>' +
+          '</div>' +
+          '<div class="details"><div class="details-content"' + lazy + '></div></div>' +
+        '</div>';
+      }
+
+      class VirtualList {
+        constructor(container, rows) {
+          this.container = container;
+          this.rows = rows;
+          this.order = rows.map((_, index) => index);
+          this.estimatedHeight = 56;
+          this.overscan = 600;
+          this.heights = new Map();
+          this.expanded = new Set();
+          this.rendered = new Map();
+          this.offsets = [0];
+          this.frame = null;
+          this.spacer = document.createElement('div');
+          this.spacer.className = 'virtual-spacer';
+          container.appendChild(this.spacer);
+          this.resizeObserver = new ResizeObserver(entries => this.onResize(entries));
+          container.addEventListener('scroll', () => this.scheduleRender());
+          window.addEventListener('resize', () => this.scheduleRender());
+        }
+
+        setOrder(order) {
+          this.order = order;
+          this.container.scrollTop = 0;
+          this.layout();
+        }
+
+        layout() {
+          const offsets = new Array(this.order.length + 1);
+          offsets[0] = 0;
+          for (let k = 0; k < this.order.length; k++) {
+            offsets[k + 1] = offsets[k] + (this.heights.get(this.order[k]) || this.estimatedHeight);
+          }
+          this.offsets = offsets;
+          this.spacer.style.height = offsets[this.order.length] + 'px';
+          this.render();
+        }
+
+        scheduleRender() {
+          if (this.frame !== null) return;
+          this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+          });
+        }
+
+        firstVisible(top) {
+          let low = 0;
+          let high = this.order.length;
+          while (low < high) {
+            const mid = (low + high) >> 1;
+            if (this.offsets[mid + 1] <= top) low = mid + 1; else high = mid;
+          }
+          return low;
+        }
+
+        render() {
+          const top = Math.max(0, this.container.scrollTop - this.overscan);
+          const bottom = this.container.scrollTop + this.container.clientHeight + this.overscan;
+          const visible = new Set();
+          for (let k = this.firstVisible(top); k < this.order.length && this.offsets[k] < bottom; k++) {
+            const index = this.order[k];
+            visible.add(index);
+            const element = this.rendered.get(index) || this.createRow(index);
+            element.style.transform = 'translateY(' + this.offsets[k] + 'px)';
+          }
+          this.rendered.forEach((element, index) => {
+            if (!visible.has(index)) {
+              this.resizeObserver.unobserve(element);
+              element.remove();
+              this.rendered.delete(index);
+            }
+          });
+        }
+
+        createRow(index) {
+          const row = this.rows[index];
+          const element = document.createElement('div');
+          element.className = 'virtual-row';
+          element.dataset.index = index;
+          element.innerHTML = renderVirtualCard(row);
+          const header = element.querySelector('.header');
+          header.addEventListener('click', () => this.toggle(index, header));
+          element.querySelector('.nodeid-badge button').addEventListener('click', event => {
+            event.stopPropagation();
+            copyText(row.nodeid, event.currentTarget);
+          });
+          if (this.expanded.has(index)) this.expand(index, header);
+          this.container.appendChild(element);
+          this.rendered.set(index, element);
+          this.resizeObserver.observe(element);
+          return element;
+        }
+
+        toggle(index, header) {
+          if (this.expanded.has(index)) this.expanded.delete(index); else this.expanded.add(index);
+          this.expand(index, header);
+        }
+
+        expand(index, header) {
+          const content = header.nextElementSibling.querySelector('.details-content');
+          if (content.dataset.shard === undefined && !content.dataset.loaded) {
+            content.dataset.loaded = 'true';
+            renderTestDetails(content, this.rows[index].details || {});
+          }
+          toggleDetails(header);
+        }
+
+        onResize(entries) {
+          let changed = false;
+          entries.forEach(entry => {
+            const index = Number(entry.target.dataset.index);
+            const height = entry.target.offsetHeight;
+            if (height && this.heights.get(index) !== height) {
+              this.heights.set(index, height);
+              changed = true;
+            }
+          });
+          if (changed) this.layout();
+        }
+      }
+
+      window.onload = function() {
+        filterIndex = loadFilterIndex(JSON.parse(document.getElementById('plus-index').textContent));
+        const rowsElement = document.getElementById('plus-rows');
+        if (rowsElement) {
+          virtualList = new VirtualList(document.getElementById('tests-container'), JSON.parse(rowsElement.textContent));
+        } else {
+          testCards = Array.from(document.querySelectorAll('#tests-container > .test'));
+          cardVisible = new Uint8Array(testCards.length).fill(1);
+        }
+        FILTER_CHECKBOX_IDS.forEach(id => document.getElementById(id)?.addEventListener('change', applyFilters));
+        document.querySelectorAll('.marker-filter input[type="checkbox"]')
+          .forEach(cb => cb.addEventListener('change', applyFilters));
+        initializeSearchIndex();
+        initializeUniversalSearch();
+        document.getElementById('failedOnlyCheckbox').checked = true;
+        applyFilters();
+      };
+"""
+
+
+REPORT_ASSETS = {"css": REPORT_CSS, "js": REPORT_SCRIPT}
+
+
+@lru_cache(maxsize=None)
+def report_asset_filename(kind):
+    digest = hashlib.sha256(REPORT_ASSETS[kind].encode("utf-8")).hexdigest()[:12]
+    return f"plus-report.{digest}.{kind}"
+
+
+def write_report_assets(assets_dir):
+    """
+    Writes the report stylesheet and script as content-hashed files, so reports sharing an
+    assets directory also share browser cache entries. Files that already exist are kept.
+    """
+    os.makedirs(assets_dir, exist_ok=True)
+    filenames = {}
+    for kind, content in REPORT_ASSETS.items():
+        filename = report_asset_filename(kind)
+        path = os.path.join(assets_dir, filename)
+        if not os.path.exists(path):
+            # Written under a temporary name so a concurrent report never serves a partial file
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+            except OSError as e:
+                raise RuntimeError(f"Failed to write report asset {path}: {e}") from e
+        filenames[kind] = filename
+    return filenames
 
 
 def main():
@@ -16,25 +799,87 @@ def main():
     parser.add_argument("--report", required=True, help="Path to the JSON report file")
     parser.add_argument("--screenshots", default="screenshots", help="Folder path where screenshots are saved")
     parser.add_argument("--output", default="report_output", help="Output folder for HTML report")
+    parser.add_argument("--lazy-details", action="store_true",
+                        help="Write test details to shard files loaded when a test is expanded")
+    parser.add_argument("--virtual-list", action="store_true",
+                        help="Render only the visible test cards from an embedded results array")
+    parser.add_argument("--compact", action="store_true",
+                        help="Use CSS classes and DOM-backed copy buttons instead of inline styles and payloads")
+    parser.add_argument("--assets", choices=["inline", "external"], default="inline",
+                        help="Inline the stylesheet and script, or reference content-hashed asset files")
+    parser.add_argument("--assets-dir", default=None,
+                        help="Folder for external asset files (default: the output folder)")
+    parser.add_argument("--history", default=None, help="Run history database to read flake rates from")
+    parser.add_argument("--detect-flake", type=int, default=0,
+                        help="Number of recent runs the flake rates cover (used with --history)")
+    parser.add_argument("--duration-regressions", action="store_true",
+                        help="Mark the duration regressions of the latest run in --history")
     args = parser.parse_args()
 
     reporter = JSONReporter(
         report_path=args.report,
         screenshots_dir=args.screenshots,
         output_dir=args.output,
+        lazy_details=args.lazy_details,
+        virtual_list=args.virtual_list,
+        compact=args.compact,
+        assets=args.assets,
+        assets_dir=args.assets_dir,
     )
     reporter.load_report()
+    if args.history and args.detect_flake:
+        reporter.model.set_flake_history(read_flake_rates(args.history, args.detect_flake))
+        reporter.use_model(reporter.model)
+    if args.history and args.duration_regressions:
+        reporter.model.set_duration_regressions(read_duration_regressions(args.history))
+    reporter.generate_html_report()
+
+
+def render_html_report(model, screenshots_dir="screenshots", output_dir="report_output", lazy_details=False,
+                       virtual_list=False, compact=False, assets="inline", assets_dir=None):
+    """
+    Renders the HTML report in the current interpreter from a ReportModel already held in
+    memory, skipping the interpreter start-up and JSON re-parse of the command line entry point.
+    """
+    reporter = JSONReporter(
+        report_path=model.report_path,
+        screenshots_dir=screenshots_dir,
+        output_dir=output_dir,
+        lazy_details=lazy_details,
+        virtual_list=virtual_list,
+        compact=compact,
+        assets=assets,
+        assets_dir=assets_dir,
+    )
+    reporter.use_model(model)
     reporter.generate_html_report()
+    return reporter
 
 
 class JSONReporter:
-    def __init__(self, report_path="final_report.json", screenshots_dir="screenshots", output_dir="report_output"):
+    def __init__(self, report_path="final_report.json", screenshots_dir="screenshots", output_dir="report_output",
+                 lazy_details=False, virtual_list=False, compact=False, assets="inline", assets_dir=None,
+                 result_log=None):
         self.filters = None
         self.parsed_data = None
         self.report_path = report_path
         self.screenshots_dir = screenshots_dir
         self.output_dir = output_dir
+        self.lazy_details = lazy_details
+        self.virtual_list = virtual_list
+        self.compact = compact
+        self.assets = assets
+        self.assets_dir = assets_dir
+        self.asset_files = None
+        # When set, logged results are streamed to this ResultLog instead of kept in self.results
+        self.result_log = result_log
+        self.detail_shards = None
         self.results = []
+        self.metadata = {}
+        self.flake_history = {}
+        self.model = None
+        self._screenshot_index = None
+        self._copied_screenshots = set()
         all_markers = set()
         for test in self.results:
             for marker in test.get("markers", []):
@@ -42,24 +887,14 @@ class JSONReporter:
         all_markers = sorted(all_markers)
 
     def load_report(self):
-        with open(self.report_path) as f:
-            data = json.load(f)
-        if isinstance(data, dict) and "results" in data:
-            self.results = data["results"]
-            self.filters = data.get("filters", {})
-        elif isinstance(data, list):
-            self.results = data
-            self.filters = {}
-        else:
-            raise ValueError("Unexpected report format.")
-
-        metadata_path = os.path.join(os.path.dirname(self.report_path), "plus_metadata.json")
-        if os.path.exists(metadata_path):
-            with open(metadata_path) as meta_file:
-                self.metadata = json.load(meta_file)
-        else:
-            self.metadata = {}
+        self.use_model(ReportModel.from_json(self.report_path))
 
+    def use_model(self, model):
+        self.model = model
+        self.results = model.results
+        self.filters = model.filters
+        self.metadata = model.metadata
+        self.flake_history = model.flake_history or {}
 
     def log_result(
             self,
@@ -77,31 +912,34 @@ class JSONReporter:
             screenshot=None,
             logs=None,
             worker=None,
-            links=None
+            links=None,
+            keep=True
     ):
-        result = {
-            "test": test_name,
-            "nodeid": nodeid,
-            "status": status,
-            "duration": duration,
-            "trace": trace,
-            "error": error,
-            "markers": markers or [],
-            "file": filepath,
-            "line": lineno,
-            "stdout": stdout,
-            "stderr": stderr,
-            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-            "screenshot": screenshot,
-            "logs": logs or [],
-            "worker": worker,
-            "links": links
-        }
-        if error:
-            result["error"] = error
-        self.results.append(result)
-
-    def write_report(self):
+        result = ResultRecord(
+            test=test_name,
+            nodeid=nodeid,
+            status=status,
+            duration=duration,
+            trace=trace,
+            error=error,
+            markers=markers,
+            file=filepath,
+            line=lineno,
+            stdout=stdout,
+            stderr=stderr,
+            screenshot=screenshot,
+            logs=logs,
+            worker=worker,
+            links=links,
+        )
+        if self.result_log is not None:
+            self.result_log.append(result)
+        elif keep:
+            self.results.append(result)
+        # keep=False: the caller hands the result on itself (e.g. to the xdist controller)
+        return result
+
+    def write_report(self, filters=None):
         dir_path = os.path.dirname(os.path.abspath(self.report_path))
 
         # Ensure directory exists
@@ -109,14 +947,15 @@ class JSONReporter:
             os.makedirs(dir_path, exist_ok=True)
 
 
+        self.filters = filters if filters is not None else compute_filter_count(self.results)
         data = {
-            "filters": compute_filter_count(self.results),
+            "filters": self.filters,
             "results": self.results
         }
 
         try:
             with open(self.report_path, "w") as f:
-                json.dump(data, f, indent=2)
+                json.dump(data, f, indent=2, default=json_default)
         except Exception as e:
             raise RuntimeError(f"Failed to write report to '{path}': {e}") from e
 
@@ -131,23 +970,47 @@ class JSONReporter:
                     if not os.path.exists(dest_path):
                         shutil.copyfile(src_path, dest_path)
 
-    def find_screenshot_and_copy(self, test_name):
-        screenshots_output_dir = os.path.join(self.output_dir, "screenshots")
-        os.makedirs(screenshots_output_dir, exist_ok=True)
-
-        # We'll look for any .png file where test_name is contained in the filename (partial match)
-        for root, _, files in os.walk(self.screenshots_dir):
-            for file in files:
-                if file.endswith(".png") and test_name in file:
-                    src_path = os.path.join(root, file)
-
-                    dest_path = os.path.join(screenshots_output_dir, file)
-
-                    shutil.copyfile(src_path, dest_path)
-
-                    # Return relative path from output_dir for HTML src
-                    return os.path.join("screenshots", file)
-        return None
+    def build_screenshot_index(self):
+        """
+        Walks the screenshots directory once and maps each test name to its screenshot files.
+        Files are indexed by their stem and, for captured screenshots, by the stem without
+        the capture suffix, so a lookup is an exact dictionary hit instead of a substring scan.
+        """
+        index = {}
+        for root, dirs, files in os.walk(self.screenshots_dir):
+            dirs.sort()
+            for file in sorted(files):
+                if not file.endswith(".png"):
+                    continue
+                src_path = os.path.join(root, file)
+                stem = file[:-len(".png")]
+                index.setdefault(stem, []).append(src_path)
+                if stem.endswith(SCREENSHOT_SUFFIX):
+                    index.setdefault(stem[:-len(SCREENSHOT_SUFFIX)], []).append(src_path)
+        self._screenshot_index = index
+        return index
+
+    def find_screenshot_and_copy(self, test_name, screenshot=None):
+        # Prefer the exact file recorded on the result, fall back to the name index
+        if screenshot and screenshot.endswith(".png") and os.path.isfile(screenshot):
+            src_path = screenshot
+        else:
+            if self._screenshot_index is None:
+                self.build_screenshot_index()
+            matches = self._screenshot_index.get(test_name)
+            if not matches:
+                return None
+            src_path = matches[0]
+
+        file = os.path.basename(src_path)
+        if src_path not in self._copied_screenshots:
+            screenshots_output_dir = os.path.join(self.output_dir, "screenshots")
+            os.makedirs(screenshots_output_dir, exist_ok=True)
+            shutil.copyfile(src_path, os.path.join(screenshots_output_dir, file))
+            self._copied_screenshots.add(src_path)
+
+        # Return relative path from output_dir for HTML src
+        return os.path.join("screenshots", file)
 
     def copy_json_report(self):
         """
@@ -184,457 +1047,69 @@ class JSONReporter:
                 </button>
             """
 
-    def generate_html_report(self):
-        # Extract all unique markers
-        self.copy_json_report()
-        ignore_markers = {"link"}
-        all_markers = set()
-        for test in self.results:
-            for marker in test.get("markers", []):
-                if marker not in ignore_markers:
-                    all_markers.add(marker)
-
-        html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-    <meta charset="UTF-8" />
-    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-    <style>
-    
-      body {{
-  font-family: Arial, sans-serif;
-  padding: 1rem;
-  background: #FAF7F2;  
-}}
-      .test {{
-   border: 1px solid #D9C3A5; 
-  margin-bottom: 0.5rem;
-  border-radius: 5px;
-  background: #FDFBF7;     
-}}
-      .header {{ padding: 0.5rem; cursor: pointer; display: flex; justify-content: space-between; align-items: center; gap: 8px; flex-wrap: wrap; }}
-      .header.passed {{
-  background: #E1F3E8; 
-  color: #1E6B3A;   
-  border-left: 4px solid #2E7D32;
-}}
-      .header.failed {{
-  background: #FBE4E4;   
-  color: #8B1E1E;      
-  border-left: 4px solid #C62828;
-}}
-      .header.skipped {{
-  background: #fff8e1;
-  color: #b36b00;
-}}
-      .header.error {{
-  background: #fdecea;
-  color: #b71c1c;
-}}
-      .details {{ padding: 0.5rem 1rem; display: none; border-top: 1px solid #ddd; }}
-      .toggle::before {{ content: "▶"; display: inline-block; margin-right: 0.5rem; transition: transform 0.3s ease; }}
-      .header.expanded .toggle::before {{ transform: rotate(90deg); }}
-      .checkbox-container {{ margin-bottom: 1rem; display: flex; flex-wrap: wrap; gap: 0.5rem; align-items: center; }}
-      .details-content {{ display: flex; gap: 1rem; align-items: flex-start; }}
-      .details-text {{ flex: 1; min-width: 0; }}
-      .details-screenshot {{ flex-shrink: 0; margin: 1rem; box-shadow: 0 0 10px 0 rgba(0, 0, 0, 0.1); }}
-      .details-screenshot img {{width: 300px; height: 200px; object-fit: contain; border: 1px solid #ccc; border-radius: 3px; background: #f8f8f8; cursor: pointer; transition: transform 0.2s ease; transform: scale(1.05); }}
-      .details-screenshot img:hover {{  transform: scale(1.05); }}
-      
-      /* Handle content wrapping */
-      .details-text {{ 
-        word-wrap: break-word;
-        overflow-wrap: break-word;
-      }}
-      
-      /* Special handling for links and pre-formatted text */
-      .details-text a {{ 
-        word-break: break-all; 
-      }}
-      .details-text pre {{ 
-        white-space: pre-wrap;
-        max-width: 100%;
-        word-break: break-all;  
-      }}
-    
-      /* Mobile and tablet responsiveness */
-      @media (max-width: 768px) {{
-        .header {{ flex-direction: column; align-items: stretch; gap: 0.5rem; }}
-        .header-section {{ justify-content: space-between; }}
-        .test-info {{ min-width: auto; }}
-        .meta {{ flex-direction: column; gap: 0.25rem; }}
-        .badges-and-timing {{ justify-content: flex-start; flex-wrap: wrap; }}
-        .badges-and-timing > * {{ margin-left: 0; margin-right: 0.5rem; }}
-        
-        .details-content {{ flex-direction: column; gap: 0.5rem; }}
-        .details-screenshot {{ align-self: center; }}
-        .details-screenshot img {{ width: 100%; max-width: 300px; height: auto; min-height: 150px; }}
-        
-        /* For Mobile URL handling */
-        .header a {{ max-width: 100px; }}
-        .nodeid-badge code {{ max-width: 200px; }}
-      }}
-      
-      @media (max-width: 480px) {{
-        .header {{ padding: 0.75rem 0.5rem; }}
-        .details {{ padding: 0.5rem; }}
-        .test-info strong {{ font-size: 0.9rem; }}
-        .nodeid-badge code {{ font-size: 0.5em; }}
-        .worker-id {{ font-size: 0.75em; }}
-        .timestamp {{ font-size: 0.85em; }}
-        
-        .details-screenshot img {{ max-width: 100%; height: auto; min-height: 120px; }}
-        
-        .checkbox-container {{ flex-direction: column; gap: 0.5rem; }}
-        .checkbox-container label {{ margin-left: 0 !important; }}
-      }}
-      .details-screenshot img.fullscreen {{ position: fixed; top: 50%; left: 50%; transform: translate(-50%, -50%) scale(1); width: auto; height: auto; max-width: 90vw; max-height: 90vh; z-index: 1000; background: white; box-shadow: 0 4px 20px rgba(0,0,0,0.5); border-radius: 8px; }}
-      .fullscreen-overlay {{ position: fixed; top: 0; left: 0; width: 100vw; height: 100vh; background: rgba(0,0,0,0.8); z-index: 999; display: none; }}  
-      .search-container {{ margin-bottom: 1rem; }}
-      .search-container input {{ box-sizing: border-box; }}
-      .header-section {{ display: flex; align-items: center; gap: 8px; flex-wrap: wrap; }}
-      .test-info {{ flex: 1; min-width: 200px; word-break: break-word; white-space: normal; }}
-      .meta {{ justify-content: flex-start; flex: 1; word-break: break-word; white-space: normal; }}
-      .badges-and-timing {{ justify-content: flex-end; flex-wrap: wrap; }}
-      .timestamp {{ white-space: nowrap; font-weight: bold; }}
-      .badges-and-timing > * {{ margin-left: 24px; }}
-      
-      /* Handle long URLs in header links */
-      .header a {{ word-break: break-all; overflow-wrap: break-word; max-width: 150px; display: inline-block; }}
-      .nodeid-badge code {{ word-break: break-all; overflow-wrap: break-word; max-width: 300px; }}
-      
-      .inline-copy-btn {{ cursor: pointer; background: none; border: 1px solid #ddd; border-radius: 3px; padding: 2px 4px; font-size: 0.8em; margin-left: 8px; color: #666; transition: all 0.2s ease; line-height: 1; }} 
-      .inline-copy-btn:hover {{ border-color: #999; background: #f5f5f5; color: #333; }}
-      .error-content pre {{ background: #fef2f2; border-left: 4px solid #dc2626; padding: 12px; border-radius: 4px; color: #7f1d1d; margin: 8px 0; }}
-      .trace-content pre {{ background: #fef7ed; border-left: 4px solid #ea580c; padding: 12px; border-radius: 4px; color: #9a3412; margin: 8px 0; }}
-      .details-text div pre {{ background: #f8fafc; border: 1px solid #e2e8f0; padding: 12px; border-radius: 4px; margin: 8px 0; font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace; font-size: 0.85em; line-height: 1.4; }}
-      .details-text div strong {{ display: inline-flex; align-items: center; gap: 8px; margin-bottom: 8px; font-weight: 600; color: #374151; }}
-      .trace-content strong, .error-content strong {{ margin-bottom: 12px; }}
-      .report-metadata {{
-        margin-bottom: 5px;
-        font-family: sans-serif;
-        background: #f9f9f9;
-        border: 1px solid #ddd;
-        border-radius: 3px;
-        padding: 5px;
-    }}
-
-    .report-metadata summary {{
-        font-size: 0.5em;
-        cursor: pointer;
-        margin-bottom: 5px;
-    }}
+    def render_copy_button(self, label, source=None):
+        # Compact mode: the button copies the text of an element already in the page
+        source_attr = f' data-source="{source}"' if source else ""
+        return (
+            f'<button class="inline-copy-btn"{source_attr} '
+            f'onclick="event.stopPropagation(); copyFromElement(this)" title="Copy {label}">'
+            f'<svg class="copy-icon"><use href="#copy-icon"></use></svg></button>'
+        )
 
-    .report-metadata table {{
-        width: 100%;
-        border-collapse: collapse;
-    }}
-    
-    .muted-hint code {{
-  background: #f1f5f9;
-  padding: 2px 4px;
-  border-radius: 4px;
-  font-size: 0.9em;
-}}
+    def render_metadata_copy_button(self):
+        if self.compact:
+            return self.render_copy_button("metadata", source="plus-metadata")
+        return self.generate_copy_button(self.metadata, "metadata")
+
+    def render_compact_assets(self):
+        if not self.compact:
+            return ""
+        metadata = json.dumps(self.metadata, indent=2, default=str).replace("</", "<\\/")
+        return (
+            '<svg style="display: none"><symbol id="copy-icon" viewBox="0 0 24 24">'
+            '<rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>'
+            '<path d="M5 15H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h9a2 2 0 0 1 2 2v1"></path>'
+            '</symbol></svg>'
+            f'<script type="application/json" id="plus-metadata">{metadata}</script>'
+        )
 
-    .report-metadata th, .report-metadata td {{
-        text-align: left;
-        padding: 8px;
-        border-bottom: 1px solid #ddd;
-    }}
+    def compute_summary(self):
+        if self.model is not None:
+            return self.model.summary
+        return summarize_results(self.results)
 
-    .report-metadata th {{
-        background-color: #eee;
-        width: 200px;
-    }}
-    .hidden {{ display: none; }}
+    def render_assets(self):
+        if self.asset_files is None:
+            return f"""    <style>
+{REPORT_CSS}
     </style>
 
     <script>
-      function toggleDetails(headerElem) {{
-        headerElem.classList.toggle('expanded');
-        const details = headerElem.nextElementSibling;
-        details.style.display = (details.style.display === 'block') ? 'none' : 'block';
-      }}
-
-      function copyFromBase64(base64Content, button) {{
-        try {{
-          const originalContent = button.innerHTML;
-          // Decode base64 content for copy
-          const decodedContent = atob(base64Content);
-          navigator.clipboard.writeText(decodedContent).then(() => {{
-            button.innerHTML = '<span style="color: #2f7a33;">✓</span>';
-            setTimeout(() => {{
-              button.innerHTML = originalContent;
-            }}, 1000);
-          }}).catch(err => {{
-            console.error("Copy failed:", err);
-            button.innerHTML = '<span style="color: #d32f2f;">✗</span>';
-            setTimeout(() => {{
-              button.innerHTML = originalContent;
-            }}, 1000);
-          }});
-        }} catch (error) {{
-          console.error("Copy button error:", error);
-        }}
-      }}
-
-      function toggleFullscreen(img) {{
-        const overlay = document.getElementById('fullscreen-overlay');
-        if (img.classList.contains('fullscreen')) {{
-          img.classList.remove('fullscreen');
-          overlay.style.display = 'none';
-          document.body.style.overflow = 'auto';
-        }} else {{
-          img.classList.add('fullscreen');
-          overlay.style.display = 'block';
-          document.body.style.overflow = 'hidden';
-        }}
-      }}
-
-      function closeFullscreen() {{
-        const fullscreenImg = document.querySelector('.details-screenshot img.fullscreen');
-        const overlay = document.getElementById('fullscreen-overlay');
-        
-        if (fullscreenImg) {{
-          fullscreenImg.classList.remove('fullscreen');
-          overlay.style.display = 'none';
-          document.body.style.overflow = 'auto';
-        }}
-      }}
-
-
-      function toggleFilter(longestCheckbox) {{
-        const failedCheckbox = document.getElementById('failedOnlyCheckbox');
-        const skippedCheckbox = document.getElementById('skippedOnlyCheckbox');
-        const untrackedCheckbox = document.getElementById('untrackedOnlyCheckbox');
-        const flakyCheckbox = document.getElementById('flakyOnlyCheckbox');
-        const testsContainer = document.getElementById('tests-container');
-        const testElements = Array.from(testsContainer.querySelectorAll('.test'));
-        const errorCheckbox = document.getElementById('errorOnlyCheckbox');
-
-        if (longestCheckbox.checked) {{
-          failedCheckbox.checked = false;
-          skippedCheckbox.checked = false;
-          untrackedCheckbox.checked = false;
-          flakyCheckbox.checked = false;
-          errorCheckbox.checked = false;
-          // Re-enable all tests before sorting
-          testElements.forEach(el => el.style.display = 'block');
-
-          // Sort and reorder
-          testElements.sort((a, b) => {{
-            const aDuration = parseFloat(
-        a.querySelector('.timestamp').textContent.replace(/[^\\d.]/g, '')
-        ) || 0;
-            const bDuration = parseFloat(b.querySelector('.timestamp').textContent.replace(/[^\\d.]/g, '')) || 0;
-            return bDuration - aDuration;
-          }});
-
-          testElements.forEach(el => testsContainer.appendChild(el));
-        }}
-
-        // Reapply marker filter (should now handle failed/skipped too)
-        filterByMarkers();
-      }}
-
-      function toggleUntrackedOnly(checkbox) {{
-        const testCards = document.querySelectorAll('.test-card');
-        const longestCheckbox = document.getElementById('longestOnlyCheckbox');
-        const skippedCheckbox = document.getElementById('skippedOnlyCheckbox');
-        const failedCheckbox = document.getElementById('failedOnlyCheckbox');
-        const flakyCheckbox = document.getElementById('flakyOnlyCheckbox');
-        const errorCheckbox = document.getElementById('errorOnlyCheckbox');
-
-        if (checkbox.checked) {{
-          longestCheckbox.checked = false;
-          skippedCheckbox.checked = false;
-          failedCheckbox.checked = false;
-          errorCheckbox.checked = false;
-          flakyCheckbox.checked = false
-          testCards.forEach(card => {{
-            const hasLink = card.querySelector('a[href]');
-            card.style.display = hasLink ? 'none' : 'block';
-          }});
-        }} else {{
-          testCards.forEach(card => {{
-            card.style.display = 'block';
-          }});
-        }}
-      }}
-
-      function toggleUntrackedInfo() {{
-        const card = document.getElementById('untrackedInfoCard');
-        card.style.display = card.style.display === 'none' ? 'block' : 'none';
-      }}
-
-      function toggleFlakyOnly(checkbox) {{
-          const longestCheckbox = document.getElementById('longestOnlyCheckbox');
-          const untrackedCheckbox = document.getElementById('untrackedOnlyCheckbox');
-          const skippedCheckbox = document.getElementById('skippedOnlyCheckbox');
-          const failedCheckbox = document.getElementById('failedOnlyCheckbox');
-          const errorCheckbox = document.getElementById('errorOnlyCheckbox');
-        const testElements = document.querySelectorAll('.test');
-        if (checkbox.checked) {{
-          longestCheckbox.checked = false;
-          skippedCheckbox.checked = false;
-          failedCheckbox.checked = false;
-          errorCheckbox.checked = false;
-          untrackedCheckbox.checked = false;
-          testElements.forEach(el => {{
-            const isFlaky = el.querySelector('.is-flaky') !== null;
-            el.style.display = isFlaky ? 'block' : 'none';
-          }});
-        }} else {{
-          testElements.forEach(el => {{
-            el.style.display = 'block';
-          }});
-        }}
-      }}
-
-      function toggleFailedOnly(failedCheckbox) {{
-        const longestCheckbox = document.getElementById('longestOnlyCheckbox');
-        const untrackedCheckbox = document.getElementById('untrackedOnlyCheckbox');
-        const skippedCheckbox = document.getElementById('skippedOnlyCheckbox');
-        const flakyCheckbox = document.getElementById('flakyOnlyCheckbox');
-        const errorCheckbox = document.getElementById('errorOnlyCheckbox');
-        const testElements = document.querySelectorAll('.test');
-        if (failedCheckbox.checked) {{
-          longestCheckbox.checked = false;
-          untrackedCheckbox.checked = false;
-          skippedCheckbox.checked = false;
-          flakyCheckbox.checked = false;
-          errorCheckbox.checked = false;
-          testElements.forEach(el => {{
-            const header = el.querySelector('.header');
-            const isFailed = header.classList.contains('failed');
-            el.style.display = isFailed ? 'block' : 'none';
-          }});
-        }} else {{
-          testElements.forEach(el => el.style.display = 'block');
-        }}
-        filterByMarkers(); // Reapply marker filter
-      }}
-
-      function toggleSkippedOnly(skippedCheckbox) {{
-        const longestCheckbox = document.getElementById('longestOnlyCheckbox');
-        const failedCheckbox = document.getElementById('failedOnlyCheckbox');
-        const untrackedCheckbox = document.getElementById('untrackedOnlyCheckbox');
-        const flakyCheckbox = document.getElementById('flakyOnlyCheckbox');
-        const errorCheckbox = document.getElementById('errorOnlyCheckbox');
-        const testElements = document.querySelectorAll('.test');
-
-        if (skippedCheckbox.checked) {{
-          longestCheckbox.checked = false;
-          failedCheckbox.checked = false;
-          untrackedCheckbox.checked = false;
-          flakyCheckbox.checked = false;
-          errorCheckbox.checked = false;
-          testElements.forEach(el => {{
-            const header = el.querySelector('.header');
-            const isSkipped = header.classList.contains('skipped');
-            el.style.display = isSkipped ? 'block' : 'none';
-          }});
-        }} else {{
-          testElements.forEach(el => el.style.display = 'block');
-        }}
-
-        filterByMarkers(); // Reapply marker filter
-      }}
-
-      function toggleErrorOnly(errorCheckbox) {{
-        const longestCheckbox = document.getElementById('longestOnlyCheckbox');
-        const failedCheckbox = document.getElementById('failedOnlyCheckbox');
-        const untrackedCheckbox = document.getElementById('untrackedOnlyCheckbox');
-        const flakyCheckbox = document.getElementById('flakyOnlyCheckbox');
-        const skippedCheckbox = document.getElementById('skippedOnlyCheckbox');
-        const testElements = document.querySelectorAll('.test');
-
-        if (errorCheckbox.checked) {{
-          longestCheckbox.checked = false;
-          failedCheckbox.checked = false;
-          untrackedCheckbox.checked = false;
-          flakyCheckbox.checked = false;
-          skippedCheckbox.checked = false;
-          testElements.forEach(el => {{
-            const header = el.querySelector('.header');
-            const isError = header.classList.contains('error');
-            el.style.display = isError ? 'block' : 'none';
-          }});
-        }} else {{
-          testElements.forEach(el => el.style.display = 'block');
-        }}
-
-        filterByMarkers();
-      }}
-
-      function initializeUniversalSearch() {{
-          const searchInput = document.getElementById('universal-search');
-          if (!searchInput) return;
+{REPORT_SCRIPT}
+    </script>"""
+        assets_dir = self.assets_dir or self.output_dir
+        prefix = os.path.relpath(assets_dir, self.output_dir).replace(os.sep, "/")
+        prefix = "" if prefix == "." else f"{prefix}/"
+        return (
+            f'    <link rel="stylesheet" href="{prefix}{self.asset_files["css"]}" />\n'
+            f'    <script src="{prefix}{self.asset_files["js"]}"></script>'
+        )
 
-          searchInput.addEventListener('input', function (e) {{
-              const filter = e.target.value.toLowerCase();
-              document.querySelectorAll('.test-card').forEach(card => {{
-                  const name = card.getAttribute('data-name') || '';
-                  const link = card.getAttribute('data-link') || '';
-                  const isVisible = name.toLowerCase().includes(filter) || link.toLowerCase().includes(filter);
-                  card.style.display = isVisible ? '' : 'none';
-              }});
-          }});
-        }}
-
-      document.addEventListener('DOMContentLoaded', initializeUniversalSearch);
-
-      function filterByMarkers() {{
-        const selected = Array.from(document.querySelectorAll('.marker-filter input[type="checkbox"]:checked')).map(cb => cb.value);
-        const failedOnly = document.getElementById('failedOnlyCheckbox').checked;
-        const skippedOnly = document.getElementById('skippedOnlyCheckbox').checked;
-        const errorOnly = document.getElementById('errorOnlyCheckbox').checked;
-
-        document.querySelectorAll('.test').forEach(el => {{
-          const header = el.querySelector('.header');
-          const markers = el.getAttribute('data-markers').split(',');
-          const isFailed = header.classList.contains('failed');
-          const isSkipped = header.classList.contains('skipped');
-          const isError = header.classList.contains('error');
-
-          const showAllMarkers = selected.length === 0;
-          const matchesMarker = showAllMarkers || selected.some(m => markers.includes(m));
-          const matchesFailed = !failedOnly || isFailed;
-          const matchesSkipped = !skippedOnly || isSkipped;
-          const matchesError = !errorOnly || isError;
-
-          el.style.display = (matchesMarker && matchesFailed && matchesSkipped && matchesError) ? 'block' : 'none';
-        }});
-      }}
-
-
-      window.onload = function() {{
-        const failedCheckbox = document.getElementById('failedOnlyCheckbox');
-        const longestCheckbox = document.getElementById('longestOnlyCheckbox');
-        const skippedCheckbox = document.getElementById('skippedOnlyCheckbox');
-        const untrackedCheckbox = document.getElementById('untrackedOnlyCheckbox');
-        const flakyCheckbox = document.getElementById('flakyOnlyCheckbox');
-        const errorCheckbox = document.getElementById('errorOnlyCheckbox');
-        failedCheckbox.checked = true;
-        toggleFailedOnly(failedCheckbox);
-        failedCheckbox.addEventListener('change', () => toggleFailedOnly(failedCheckbox));
-        errorCheckbox.addEventListener('change', () => toggleErrorOnly(errorCheckbox));
-        longestCheckbox.addEventListener('change', () => toggleFilter(longestCheckbox));
-        skippedCheckbox.addEventListener('change', () => toggleSkippedOnly(skippedCheckbox));
-        untrackedCheckbox.addEventListener('change', () => toggleUntrackedOnly(untrackedCheckbox));
-        flakyCheckbox.addEventListener('change', () => toggleFlakyOnly(flakyCheckbox));
-        const markerCheckboxes = document.querySelectorAll('.marker-filter input[type="checkbox"]');
-        markerCheckboxes.forEach(cb => cb.addEventListener('change', filterByMarkers));
-      }};
-    </script>
+    def render_head(self):
+        return f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+    <meta charset="UTF-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+{self.render_assets()}
     </head>
     <body>
+    {self.render_compact_assets()}
     <div class="report-metadata" style="background: #f2f4f7;">
     <h2 onclick="this.nextElementSibling.classList.toggle('hidden')" style="cursor: pointer; font-size: 12px; ">
         Execution Metadata (click to toggle)
-         {self.generate_copy_button(self.metadata, "metadata")}
+         {self.render_metadata_copy_button()}
     </h2>
     <table class="hidden" style="margin-top:10px;">
         <tr><th>Title</th><td>{self.metadata.get('report_title', '')}</td></tr>
@@ -643,6 +1118,7 @@ class JSONReporter:
         <tr><th>Commit</th><td>{self.metadata.get('commit', '')}</td></tr>
         <tr><th>Generated At</th><td>{self.metadata.get('generated_at', '')}</td></tr>
         <tr><th>Python version</th><td>{self.metadata.get('python_version', '')}</td></tr>
+        {self.render_shard_plan_row()}
     </table>
 </div>
     <div id="fullscreen-overlay" class="fullscreen-overlay" onclick="closeFullscreen()"></div>
@@ -709,6 +1185,7 @@ class JSONReporter:
   <input type="checkbox" id="flakyOnlyCheckbox">
   Show flaky tests only (<span>{self.filters.get("flaky", 0)}</span>)
 </label>
+{self.render_history_filter()}
     </div>
     <div class="search-container">
           <input
@@ -724,115 +1201,205 @@ class JSONReporter:
       <strong>Filter by Markers:</strong><br/>
     """
 
+    def render_shard_plan_row(self):
+        plan = self.metadata.get("shard_plan")
+        if not isinstance(plan, dict):
+            return ""
+        return (
+            f'<tr><th>Shard</th><td>{plan.get("shard")}/{plan.get("shards")} — {plan.get("tests")} of '
+            f'{plan.get("collected")} tests, ~{plan.get("expected_duration", 0):.1f}s expected</td></tr>'
+        )
 
-        # Add checkboxes for all markers
+    def render_history_filter(self):
+        labels = []
+        if "history_flaky" in self.filters:
+            labels.append(("historyFlakyOnlyCheckbox", "Show flaky in recent runs", self.filters["history_flaky"]))
+        if "regressed" in self.filters:
+            labels.append(("regressedOnlyCheckbox", "Show duration regressions", self.filters["regressed"]))
+        return "\n".join(
+            '<label style="margin-left: 1rem;">\n'
+            f'  <input type="checkbox" id="{checkbox_id}">\n'
+            f'  {label} (<span>{count}</span>)\n'
+            '</label>'
+            for checkbox_id, label, count in labels
+        )
+
+    def render_history_badge(self, test):
+        history = self.flake_history.get(test["nodeid"])
+        if not history:
+            return ""
+        unstable, runs = history
+        style = "" if self.compact else (
+            ' style="background:#8e44ad;color:white;padding:2px 6px;border-radius:3px;'
+            'font-weight:bold;font-size:0.85em;margin:0 6px;"'
+        )
+        return (
+            f'<span class="history-flaky"{style} title="Failed or flaked in {unstable} of the last {runs} runs">'
+            f'FLAKE {unstable}/{runs}</span>'
+        )
+
+    def render_regression_badge(self, test):
+        baseline = test.get("duration_regression")
+        if not baseline:
+            return ""
+        duration = test.get("duration") or 0
+        slower = f"{duration / baseline['median']:.1f}×" if baseline["median"] > 0 else f"+{duration:.2f}s"
+        style = "" if self.compact else (
+            ' style="background:#c0392b;color:white;padding:2px 6px;border-radius:3px;'
+            'font-weight:bold;font-size:0.85em;margin-right:6px;"'
+        )
+        return (
+            f'<span class="duration-regression"{style} title="Median {baseline["median"]:.2f}s, '
+            f'p90 {baseline["p90"]:.2f}s over the last {baseline["samples"]} passing runs">'
+            f'SLOWER {slower}</span>'
+        )
+
+    def render_marker_filters(self):
         marker_counts = self.filters.get("marker_counts", {})
         if not marker_counts:
-            html += (
+            return (
                 '<span class="muted-hint">'
                 'Use <code>pytest.mark.*</code> to enable marker filters'
                 '</span>'
             )
-        else:
-            for marker in sorted(marker_counts):
-                count = marker_counts[marker]
-                html += (
-                    f'<label>'
-                    f'<input type="checkbox" value="{marker}" /> '
-                    f'{marker} ({count})'
-                    f'</label> '
+        return "".join(
+            f'<label>'
+            f'<input type="checkbox" value="{marker}" /> '
+            f'{marker} ({marker_counts[marker]})'
+            f'</label> '
+            for marker in sorted(marker_counts)
+        )
+
+    def render_summary(self, summary):
+        total_tests = summary["total"]
+        failed_tests = summary["failed"]
+        error_tests = summary["error"]
+        slowest_test_name = summary["slowest_name"]
+        slowest_test_duration = summary["slowest_duration"]
+        summary_html = f"""
+            <div style="padding: 1rem; background: {'#e6f4ea' if failed_tests == 0 and error_tests == 0 else '#fdecea'}; 
+            border: 1px solid {'#2f7a33' if failed_tests == 0 and error_tests == 0 else '#a83232'}; 
+            border-radius: 5px; margin-bottom: 1rem;">
+              {'<strong>Bingo!</strong> All your tests passed!' if failed_tests == 0 and error_tests == 0 else
+        f'Total tests: {total_tests}, Failures: {failed_tests}, Errors: {error_tests}.'}
+              The slowest test was <strong>{slowest_test_name}</strong> at {slowest_test_duration:.2f}s.
+            </div>
+            """
+        return summary_html
+
+    def render_test_details(self, test, screenshot_path):
+        details = collect_test_details(test)
+        if self.compact:
+            return self.render_compact_test_details(details, screenshot_path)
+        blocks = []
+        for key, label, css_class in DETAIL_SECTIONS:
+            if key in details:
+                class_attr = f' class="{css_class}"' if css_class else ""
+                blocks.append(f"""
+            <div{class_attr}><strong>{label}:</strong> {self.generate_copy_button(details[key], key)}
+            <pre>{details[key]}</pre></div>
+            """)
+        screenshot_html = f'<div class="details-screenshot"><img src="{screenshot_path}" alt="Screenshot" onclick="toggleFullscreen(this)"></div>' if screenshot_path else ""
+        return f"""
+    <div class="details-content">
+      <div class="details-text">
+        {"".join(blocks)}
+      </div>
+      {screenshot_html}
+    </div>
+  """
+
+    def render_compact_test_details(self, details, screenshot_path):
+        blocks = []
+        for key, label, css_class in DETAIL_SECTIONS:
+            if key in details:
+                class_attr = f' class="{css_class}"' if css_class else ""
+                blocks.append(
+                    f'<div{class_attr}><strong>{label}:</strong> {self.render_copy_button(key)}'
+                    f'<pre>{html.escape(details[key])}</pre></div>'
                 )
+        screenshot_html = (
+            f'<div class="details-screenshot"><img src="{html.escape(screenshot_path)}" alt="Screenshot" '
+            f'onclick="toggleFullscreen(this)"></div>'
+        ) if screenshot_path else ""
+        return f'<div class="details-content"><div class="details-text">{"".join(blocks)}</div>{screenshot_html}</div>'
 
-        html += '<div id="tests-container">'
+    def render_compact_test_card(self, test, status_class, marker_str, details_html):
+        """
+        The same card as render_test_card, with shared classes instead of inline styles,
+        a DOM-backed nodeid copy button and escaped text.
+        """
+        escape = html.escape
+        links = test.get("links") or []
+        flaky_badge = '<span class="is-flaky">FLAKY</span>' if test.get("flaky") else '<span class="flaky-slot"></span>'
+        flaky_badge += self.render_history_badge(test) + self.render_regression_badge(test)
+        link_html = "".join(
+            f'<a class="link-badge" href="{escape(url)}" target="_blank"> Link </a>' for url in links
+        ) or '<span class="link-slot"></span>'
+        return (
+            f'<div class="test test-card" data-name="{escape(test["test"])}" data-link="{escape(",".join(links))}" '
+            f'data-markers="{escape(marker_str)}">'
+            f'<div class="header {status_class}" onclick="toggleDetails(this)">'
+            f'<div class="header-section test-info"><span class="toggle"></span>'
+            f'<strong>{escape(test["test"])}</strong><span>— {escape(test["status"].upper())}</span></div>'
+            f'<div class="header-section meta">'
+            f'<span class="nodeid-badge"><code>{escape(test["nodeid"])}</code>{self.render_copy_button("nodeid")}</span>'
+            f'<span class="worker-id">{escape(str(test["worker"]))}</span></div>'
+            f'<div class="header-section badges-and-timing">{flaky_badge}{link_html}'
+            f'<span class="timestamp">⏱ {test.get("duration", 0):.2f}s</span></div>'
+            f'</div>'
+            f'<div class="details">{details_html}</div>'
+            f'</div>\n'
+        )
 
-        # Generate test blocks
-        for test in self.results:
-            status_class = (
-                'passed' if test['status'] == 'passed' else
-                'failed' if test['status'] == 'failed' else
-                'error'  if test['status'] == 'error' else
-                'skipped'
+    def render_test_card(self, test):
+        status_class = (
+            'passed' if test['status'] == 'passed' else
+            'failed' if test['status'] == 'failed' else
+            'error'  if test['status'] == 'error' else
+            'skipped'
+        )
+        screenshot_path = self.find_screenshot_and_copy(test['test'], test.get('screenshot'))
+        markers = test.get("markers")
+        marker_str = ",".join(markers) if isinstance(markers, list) else ""
+
+        if self.detail_shards is not None:
+            # Details are fetched from a shard file when the card is first expanded
+            shard, position = self.detail_shards.add(collect_test_details(test), screenshot_path)
+            details_html = f'<div class="details-content" data-shard="{shard}" data-position="{position}"></div>'
+        else:
+            details_html = self.render_test_details(test, screenshot_path)
+
+        if self.compact:
+            return self.render_compact_test_card(test, status_class, marker_str, details_html)
+
+        flaky_badge = ""
+        if test.get("flaky"):
+            flaky_badge = (
+                '<span class="is-flaky" '
+                'style="background:#f39c12;color:white;padding:2px 6px;'
+                'border-radius:3px;font-weight:bold;font-size:0.85em;">FLAKY</span>'
             )
-            screenshot_path = self.find_screenshot_and_copy(test['test'])
-            screenshot_html = f'<div class="details-screenshot"><img src="{screenshot_path}" alt="Screenshot" onclick="toggleFullscreen(this)"></div>' if screenshot_path else ""
-            markers = test.get("markers")
-            marker_str = ",".join(markers) if isinstance(markers, list) else ""
-            stdout_html = ""
-            if test.get('stdout'):
-                stdout_escaped = test['stdout'].replace("`", "\\`")  # Escape backticks
-                stdout_html = f"""
-                <div><strong>STDOUT:</strong> {self.generate_copy_button(stdout_escaped, 'stdout')}
-                <pre>{test['stdout']}</pre></div>
-                """
-
-            stderr_html = ""
-            if test.get('stderr'):
-                stderr_escaped = test['stderr'].replace("`", "\\`")
-                stderr_html = f"""
-                <div><strong>STDERR:</strong> {self.generate_copy_button(stderr_escaped, 'stderr')}
-                <pre>{test['stderr']}</pre></div>
-                """
-
-            logs_html = ""
-            logs_content = test.get('logs')
-            if logs_content:
-                if isinstance(logs_content, list):
-                    logs_display = '\n'.join(str(item) for item in logs_content if item)
-                else:
-                    logs_display = str(logs_content)
-                if logs_display.strip():
-                    logs_html = f"""
-                    <div><strong>Logs:</strong> {self.generate_copy_button(logs_content, 'logs')}
-                    <pre>{logs_display}</pre></div>
-                    """
-
-            trace_html = ""
-            error_html = ""
-            
-            if test.get('error'):
-                full_error = test['error']
-                full_trace = test['trace']
-                trace_content = extract_trace_block(full_trace)
-                error_content = extract_error_block(full_error)
-                
-                if trace_content and trace_content.strip():
-                    trace_html = f"""
-                    <div class="trace-content"><strong>Trace:</strong> {self.generate_copy_button(trace_content, 'trace')}
-                    <pre>{trace_content}</pre></div>
-                    """
-                
-                if error_content and error_content.strip():
-                    error_html = f"""
-                    <div class="error-content"><strong>Error:</strong> {self.generate_copy_button(error_content, 'error')}
-                    <pre>{error_content}</pre></div>
-                    """
-
-            flaky_badge = ""
-            if test.get("flaky"):
-                flaky_badge = (
-                    '<span class="is-flaky" '
-                    'style="background:#f39c12;color:white;padding:2px 6px;'
-                    'border-radius:3px;font-weight:bold;font-size:0.85em;">FLAKY</span>'
+        else:
+            # Invisible placeholder to preserve layout
+            flaky_badge = '<span style="display:inline-block; min-width:40px;"></span>'
+        flaky_badge += self.render_history_badge(test) + self.render_regression_badge(test)
+
+        link_html = ""
+        links = test.get("links", [])
+        if links:
+            for url in links:
+                link_html += (
+                    f'<a href="{url}" target="_blank" '
+                    f'style="background:#3498db;color:white;padding:2px 6px;'
+                    f'border-radius:3px;font-weight:bold;font-size:0.85em;'
+                    f'text-decoration:none;margin-right:6px;"> Link </a>'
                 )
-            else:
-                 # Invisible placeholder to preserve layout
-                flaky_badge = '<span style="display:inline-block; min-width:40px;"></span>'
-
-            link_html = ""
-            links = test.get("links", [])
-            if links:
-                for url in links:
-                    link_html += (
-                        f'<a href="{url}" target="_blank" '
-                        f'style="background:#3498db;color:white;padding:2px 6px;'
-                        f'border-radius:3px;font-weight:bold;font-size:0.85em;'
-                        f'text-decoration:none;margin-right:6px;"> Link </a>'
-                    )
-            else:
-              # Invisible placeholder to preserve layout
-              link_html = '<span style="display:inline-block; min-width:45px;"></span>'
+        else:
+            # Invisible placeholder to preserve layout
+            link_html = '<span style="display:inline-block; min-width:45px;"></span>'
 
-            html += f'''
+        return f'''
     
 <div class="test test-card" data-name="{test['test']}" data-link="{','.join(test.get('links') or [])}" data-markers="{marker_str}">
   <div class="header {status_class}" onclick="toggleDetails(this)">
@@ -856,48 +1423,91 @@ class JSONReporter:
     </div>
   </div>
 
-  <div class="details">
-    <div class="details-content">
-      <div class="details-text">
-         {error_html}
-        {trace_html}
-        {stdout_html}
-        {stderr_html}
-        {logs_html}
-      </div>
-      {screenshot_html}
-    </div>
-  </div>
+  <div class="details">{details_html}</div>
 </div>
 
     '''
 
-        # Add summary
-        total_tests = len(self.results)
-        failed_tests = sum(1 for t in self.results if t['status'] == 'failed')
-        error_tests = sum(1 for t in self.results if t['status'] == 'error')
-        slowest_test = max(self.results, key=lambda x: x.get('duration', 0), default=None)
-        slowest_test_name = slowest_test['test'] if slowest_test else 'N/A'
-        slowest_test_duration = slowest_test.get('duration', 0) if slowest_test else 0
-
-        summary_html = f"""
-            <div style="padding: 1rem; background: {'#e6f4ea' if failed_tests == 0 and error_tests == 0 else '#fdecea'}; 
-            border: 1px solid {'#2f7a33' if failed_tests == 0 and error_tests == 0 else '#a83232'}; 
-            border-radius: 5px; margin-bottom: 1rem;">
-              {'<strong>Bingo!</strong> All your tests passed!' if failed_tests == 0 and error_tests == 0 else
-        f'Total tests: {total_tests}, Failures: {failed_tests}, Errors: {error_tests}.'}
-              The slowest test was <strong>{slowest_test_name}</strong> at {slowest_test_duration:.2f}s.
-            </div>
-            """
+    def build_test_row(self, test):
+        """
+        Returns the compact record the virtual list renders a card from.
+        """
+        screenshot_path = self.find_screenshot_and_copy(test['test'], test.get('screenshot'))
+        markers = test.get("markers")
+        row = {
+            "name": test["test"],
+            "nodeid": test["nodeid"],
+            "status": test["status"],
+            "duration": test.get("duration", 0),
+            "worker": test.get("worker"),
+            "flaky": bool(test.get("flaky")),
+            "links": test.get("links") or [],
+            "markers": markers if isinstance(markers, list) else [],
+        }
+        history = self.flake_history.get(test["nodeid"])
+        if history:
+            row["history"] = history
+        if test.get("duration_regression"):
+            row["regression"] = test["duration_regression"]
+        details = collect_test_details(test)
+        if self.detail_shards is not None:
+            row["shard"], row["position"] = self.detail_shards.add(details, screenshot_path)
+        else:
+            if screenshot_path:
+                details["screenshot"] = screenshot_path.replace("\\", "/")
+            row["details"] = details
+        return row
+
+    def write_test_rows(self, f):
+        # "</" is escaped so captured output can never close the script element early
+        f.write('<script type="application/json" id="plus-rows">[')
+        for index, test in enumerate(self.results):
+            if index:
+                f.write(",")
+            f.write(json.dumps(self.build_test_row(test), separators=(",", ":")).replace("</", "<\\/"))
+        f.write("]</script>")
+
+    def write_filter_index(self, f):
+        index = json.dumps(compute_filter_index(self.results, self.flake_history), separators=(",", ":")).replace("</", "<\\/")
+        f.write(f'<script type="application/json" id="plus-index">{index}</script>')
+
+    def write_search_index(self, f):
+        index = json.dumps(build_search_index(self.results), separators=(",", ":")).replace("</", "<\\/")
+        f.write(f'<script type="application/json" id="plus-search">{index}</script>')
 
-        html = html.replace('<div id="tests-container">', summary_html + '<div id="tests-container">')
-        html += "</div></body></html>"
+    def generate_html_report(self):
+        """
+        Streams the report to disk: the page head, the precomputed summary and then one
+        card per test are written through a buffered file, so the full document is never
+        held in memory.
+        """
+        self.copy_json_report()
+        summary = self.compute_summary()
 
-        # Save report
         os.makedirs(self.output_dir, exist_ok=True)
+        if self.assets == "external":
+            self.asset_files = write_report_assets(self.assets_dir or self.output_dir)
         output_file = os.path.join(self.output_dir, "report.html")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(html)
+        with open(output_file, "w", encoding="utf-8", buffering=HTML_WRITE_BUFFER_SIZE) as f:
+            f.write(self.render_head())
+            f.write(self.render_marker_filters())
+            f.write(self.render_summary(summary))
+            if self.lazy_details:
+                self.detail_shards = DetailShardWriter(self.output_dir)
+            if self.virtual_list:
+                f.write('<div id="tests-container" class="virtual-list"></div>')
+                self.write_test_rows(f)
+            else:
+                f.write('<div id="tests-container">')
+                for test in self.results:
+                    f.write(self.render_test_card(test))
+                f.write("</div>")
+            self.write_filter_index(f)
+            self.write_search_index(f)
+            if self.detail_shards is not None:
+                self.detail_shards.flush()
+                self.detail_shards = None
+            f.write("</body></html>")
 
 if __name__ == "__main__":
     main()
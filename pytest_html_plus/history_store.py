@@ -0,0 +1,262 @@
+import math
+import os
+import sqlite3
+from array import array
+from datetime import datetime, timezone
+
+HISTORY_FILENAME = "history.sqlite"
+HISTORY_CACHE_DIR = "pytest_html_plus"
+HISTORY_RETENTION_RUNS = 100
+# Rebuild the database file once this share of its pages is free after pruning
+HISTORY_VACUUM_RATIO = 0.25
+
+# Rolling duration baseline: the latest passing durations of each test and a decayed mean
+DURATION_WINDOW = 20
+DURATION_EWMA_ALPHA = 0.2
+DURATION_MIN_SAMPLES = 5
+# A regression must beat the baseline p90, be this many times the median, be at least this
+# many seconds slower and lie this many standard deviations above the decayed mean
+DURATION_REGRESSION_RATIO = 1.5
+DURATION_MIN_DELTA = 0.1
+DURATION_Z_SCORE = 3.0
+
+
+def history_path(config):
+    """
+    Location of the run history, inside the pytest cache directory.
+    """
+    cache = getattr(config, "cache", None)
+    if cache is not None:
+        directory = str(cache.mkdir(HISTORY_CACHE_DIR))
+    else:
+        # The cacheprovider plugin is disabled; use the folder it would have used
+        directory = os.path.join(str(config.rootpath), ".pytest_cache", "d", HISTORY_CACHE_DIR)
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, HISTORY_FILENAME)
+
+
+class HistoryStore:
+    """
+    SQLite store with one row per test per run, indexed both by nodeid and by run. Only the
+    latest ``retention`` runs are kept; the file is compacted when pruning frees enough of it.
+
+    It also keeps one row of rolling duration statistics per test, and the duration
+    regressions found in each run.
+    """
+
+    def __init__(self, path, retention=HISTORY_RETENTION_RUNS):
+        self.path = path
+        self.retention = max(1, retention)
+        try:
+            self.connection = sqlite3.connect(path, timeout=30)
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, finished_at TEXT NOT NULL)"
+                )
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results (nodeid TEXT NOT NULL, run_id INTEGER NOT NULL, "
+                    "status TEXT NOT NULL, flaky INTEGER NOT NULL, duration REAL NOT NULL, "
+                    "PRIMARY KEY (nodeid, run_id)) WITHOUT ROWID"
+                )
+                self.connection.execute("CREATE INDEX IF NOT EXISTS results_by_run ON results (run_id)")
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS duration_stats (nodeid TEXT PRIMARY KEY, last_run_id INTEGER NOT NULL, "
+                    "samples INTEGER NOT NULL, ewma REAL NOT NULL, ewm_variance REAL NOT NULL, recent BLOB NOT NULL) "
+                    "WITHOUT ROWID"
+                )
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS duration_regressions (run_id INTEGER NOT NULL, nodeid TEXT NOT NULL, "
+                    "duration REAL NOT NULL, median REAL NOT NULL, p90 REAL NOT NULL, samples INTEGER NOT NULL, "
+                    "PRIMARY KEY (run_id, nodeid)) WITHOUT ROWID"
+                )
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to open run history {path}: {e}") from e
+
+    def record_run(self, results, track_durations=False):
+        """
+        Stores the final results of a run and prunes runs past the retention. Returns the run id.
+        With ``track_durations``, passing durations are also checked against and folded into
+        the rolling baselines. Results without a nodeid are skipped, as in the worker merge.
+        """
+        try:
+            with self.connection:
+                cursor = self.connection.execute(
+                    "INSERT INTO runs (finished_at) VALUES (?)", (datetime.now(timezone.utc).isoformat(),)
+                )
+                run_id = cursor.lastrowid
+                rows = []
+                for test in results:
+                    nodeid = test.get("nodeid") or test.get("test")
+                    if nodeid:
+                        rows.append((nodeid, run_id, test.get("status") or "", 1 if test.get("flaky") else 0,
+                                     test.get("duration") or 0))
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO results (nodeid, run_id, status, flaky, duration) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                if track_durations:
+                    self.update_duration_stats(run_id)
+            self.prune()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to record run history in {self.path}: {e}") from e
+        return run_id
+
+    def prune(self):
+        with self.connection:
+            oldest = self.connection.execute(
+                "SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1 OFFSET ?", (self.retention - 1,)
+            ).fetchone()
+            if oldest is None:
+                return
+            deleted = self.connection.execute("DELETE FROM results WHERE run_id < ?", oldest).rowcount
+            self.connection.execute("DELETE FROM runs WHERE run_id < ?", oldest)
+            self.connection.execute("DELETE FROM duration_regressions WHERE run_id < ?", oldest)
+            # Baselines of tests that have not run within the retention are dropped too
+            deleted += self.connection.execute("DELETE FROM duration_stats WHERE last_run_id < ?", oldest).rowcount
+        if deleted:
+            free_pages = self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+            pages = self.connection.execute("PRAGMA page_count").fetchone()[0]
+            if pages and free_pages / pages >= HISTORY_VACUUM_RATIO:
+                self.connection.execute("VACUUM")
+
+    def flake_rates(self, builds):
+        """
+        Tests that were unstable over the last ``builds`` runs: nodeid -> (unstable runs,
+        runs). A run is unstable when the test failed, errored or flaked within it; a test
+        qualifies when it flaked within a run, or both failed and passed across runs.
+        """
+        try:
+            rows = self.connection.execute(
+                "SELECT nodeid, SUM(status IN ('failed', 'error') OR flaky), COUNT(*) FROM results "
+                "WHERE run_id >= COALESCE((SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1 OFFSET ?), 0) "
+                "GROUP BY nodeid "
+                "HAVING SUM(flaky) > 0 OR (SUM(status IN ('failed', 'error')) > 0 AND SUM(status = 'passed') > 0)",
+                (max(1, builds) - 1,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to read run history {self.path}: {e}") from e
+        return {nodeid: (unstable, runs) for nodeid, unstable, runs in rows}
+
+    def update_duration_stats(self, run_id):
+        """
+        Compares each passing duration of the run with the test's baseline from earlier runs,
+        records the regressions, then adds the duration to the baseline.
+        """
+        rows = self.connection.execute(
+            "SELECT r.nodeid, r.duration, s.samples, s.ewma, s.ewm_variance, s.recent FROM results r "
+            "LEFT JOIN duration_stats s ON s.nodeid = r.nodeid WHERE r.run_id = ? AND r.status = 'passed'",
+            (run_id,),
+        )
+        stats = []
+        regressions = []
+        for nodeid, duration, samples, ewma, ewm_variance, recent in rows:
+            if samples is None:
+                stats.append((nodeid, run_id, 1, duration, 0.0, array("d", [duration]).tobytes()))
+                continue
+            window = array("d")
+            window.frombytes(recent)
+            baseline = duration_baseline(window)
+            if samples >= DURATION_MIN_SAMPLES and is_duration_regression(duration, baseline, ewma, ewm_variance):
+                regressions.append((run_id, nodeid, duration, baseline[0], baseline[1], len(window)))
+            # Exponentially weighted mean and variance
+            diff = duration - ewma
+            increment = DURATION_EWMA_ALPHA * diff
+            ewm_variance = (1 - DURATION_EWMA_ALPHA) * (ewm_variance + diff * increment)
+            window.append(duration)
+            stats.append((nodeid, run_id, samples + 1, ewma + increment, ewm_variance,
+                          window[-DURATION_WINDOW:].tobytes()))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO duration_stats (nodeid, last_run_id, samples, ewma, ewm_variance, recent) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            stats,
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO duration_regressions (run_id, nodeid, duration, median, p90, samples) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            regressions,
+        )
+
+    def duration_regressions(self):
+        """
+        Duration regressions of the latest run: nodeid -> {"median", "p90", "samples"} of the
+        baseline it was compared with.
+        """
+        try:
+            rows = self.connection.execute(
+                "SELECT nodeid, median, p90, samples FROM duration_regressions "
+                "WHERE run_id = (SELECT MAX(run_id) FROM runs)"
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to read run history {self.path}: {e}") from e
+        return {nodeid: {"median": median, "p90": p90, "samples": samples} for nodeid, median, p90, samples in rows}
+
+    def latest_unstable(self):
+        """
+        Nodeids that failed, errored or flaked in the latest recorded run.
+        """
+        try:
+            rows = self.connection.execute(
+                "SELECT nodeid FROM results WHERE run_id = (SELECT MAX(run_id) FROM runs) "
+                "AND (status IN ('failed', 'error') OR flaky)"
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to read run history {self.path}: {e}") from e
+        return {nodeid for nodeid, in rows}
+
+    def recent_durations(self, runs=DURATION_WINDOW):
+        """
+        Median duration of each test over the last ``runs`` recorded runs.
+        """
+        try:
+            rows = self.connection.execute(
+                "SELECT nodeid, duration FROM results "
+                "WHERE run_id >= COALESCE((SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1 OFFSET ?), 0) "
+                "ORDER BY nodeid",
+                (max(1, runs) - 1,),
+            )
+            durations = {}
+            for nodeid, duration in rows:
+                durations.setdefault(nodeid, array("d")).append(duration)
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to read run history {self.path}: {e}") from e
+        return {nodeid: duration_baseline(window)[0] for nodeid, window in durations.items()}
+
+    def close(self):
+        self.connection.close()
+
+
+def duration_baseline(window):
+    """
+    Median and 90th percentile (nearest rank) of the recent durations.
+    """
+    ordered = sorted(window)
+    middle = len(ordered) // 2
+    median = ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+    p90 = ordered[max(0, math.ceil(0.9 * len(ordered)) - 1)]
+    return median, p90
+
+
+def is_duration_regression(duration, baseline, ewma, ewm_variance):
+    median, p90 = baseline
+    return (
+        duration > p90
+        and duration >= median * DURATION_REGRESSION_RATIO
+        and duration - median >= DURATION_MIN_DELTA
+        and duration - ewma > DURATION_Z_SCORE * math.sqrt(ewm_variance)
+    )
+
+
+def read_flake_rates(path, builds):
+    store = HistoryStore(path)
+    try:
+        return store.flake_rates(builds)
+    finally:
+        store.close()
+
+
+def read_duration_regressions(path):
+    store = HistoryStore(path)
+    try:
+        return store.duration_regressions()
+    finally:
+        store.close()
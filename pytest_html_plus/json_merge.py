@@ -1,53 +1,312 @@
 import json
+import logging
+import multiprocessing
 import os
-from collections import defaultdict
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 from pytest_html_plus.compute_filter_counts import compute_filter_count
+from pytest_html_plus.result_log import RESULT_LOG_SUFFIX, iter_result_lines
+
+logger = logging.getLogger(__name__)
+
+MERGE_READ_SIZE = 1024 * 1024
+# Below this total input size a process pool costs more than it saves
+MERGE_PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+# Cap on report files held open while the merged report is written
+MERGE_MAX_OPEN_FILES = 64
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class JSONStream:
+   """
+   Minimal incremental reader for one JSON document: values are decoded one at a time from
+   a growing buffer, together with their byte offset and length in the file.
+   """
+
+   def __init__(self, f):
+       self.f = f
+       self.buffer = ""
+       self.pos = 0
+       self.mark = 0  # buffer index whose byte offset in the file is known
+       self.offset = 0  # byte offset of buffer[mark] in the file
+       self.eof = False
+
+   def _fill(self, size=MERGE_READ_SIZE):
+       chunk = self.f.read(size)
+       if not chunk:
+           self.eof = True
+           return False
+       # The only place the buffer is compacted: the consumed prefix is dropped once per read
+       self._byte_position()
+       self.buffer = self.buffer[self.pos:] + chunk
+       self.pos = self.mark = 0
+       return True
+
+   def peek(self):
+       while True:
+           while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+               self.pos += 1
+           if self.pos < len(self.buffer) or not self._fill():
+               return self.buffer[self.pos] if self.pos < len(self.buffer) else ""
+
+   def expect(self, char):
+       if self.peek() != char:
+           raise ValueError(f"Expecting '{char}' at byte {self._byte_position()}")
+       self.pos += 1
+
+   def _byte_position(self):
+       # The position only moves forward, so each character is encoded once
+       self.offset += len(self.buffer[self.mark:self.pos].encode("utf-8"))
+       self.mark = self.pos
+       return self.offset
+
+   def value(self):
+       self.peek()
+       while True:
+           try:
+               value, end = _decoder.raw_decode(self.buffer, self.pos)
+           except json.JSONDecodeError:
+               # Most likely the value continues past the buffer; grow it geometrically
+               if not self._fill(max(MERGE_READ_SIZE, len(self.buffer) - self.pos)):
+                   raise
+               continue
+           if end == len(self.buffer) and self._fill():
+               continue  # a number could continue in the next chunk
+           break
+       offset = self._byte_position()
+       self.pos = end
+       return value, offset, self._byte_position() - offset
+
+   def array_items(self):
+       self.expect("[")
+       if self.peek() == "]":
+           self.pos += 1
+           return
+       while True:
+           yield self.value()
+           char = self.peek()
+           self.pos += 1
+           if char == "]":
+               return
+           if char != ",":
+               raise ValueError(f"Expecting ',' or ']' at byte {self._byte_position() - 1}")
+
+
+def iter_json_report_records(path):
+   """
+   Yields (record, byte offset, byte length) for each result of a JSON report, which is
+   either a list of results or an object with a "results" list, without loading the file.
+   """
+   with open(path, "r", encoding="utf-8", newline="") as f:
+       stream = JSONStream(f)
+       first = stream.peek()
+       if first == "[":
+           yield from stream.array_items()
+       elif first == "{":
+           stream.expect("{")
+           while stream.peek() != "}":
+               key, _, _ = stream.value()
+               stream.expect(":")
+               if key == "results" and stream.peek() == "[":
+                   yield from stream.array_items()
+               else:
+                   stream.value()
+               if stream.peek() == ",":
+                   stream.pos += 1
+               elif stream.peek() != "}":
+                   raise ValueError(f"Expecting ',' or '}}' at byte {stream._byte_position()}")
+           stream.pos += 1
+       else:
+           stream.value()
+       if stream.peek():
+           raise ValueError(f"Extra data at byte {stream._byte_position()}")
+
+
+def iter_report_records(path):
+   if str(path).endswith(RESULT_LOG_SUFFIX):
+       return iter_result_lines(path)
+   return iter_json_report_records(path)
+
+
+def read_record(f, offset, length):
+   f.seek(offset)
+   return json.loads(f.read(length))
+
 
+def scan_report_file(path):
+   """
+   First merge pass over one worker file: nodeid -> [statuses, offset, length, has links,
+   markers] of its attempts in that file, in first-seen order. Runs in a worker process
+   when the merge is parallel. A record from an already merged report brings along the
+   attempts recorded in its ``flaky_attempts``.
+   """
+   attempts = {}
+   try:
+       for test, offset, length in iter_report_records(path):
+           nodeid = test.get("nodeid") or test.get("test")  # fallback if needed
+           entry = attempts.setdefault(nodeid, [[]])
+           entry[0].extend(test.get("flaky_attempts") or [test.get("status")])
+           entry[1:] = [offset, length, bool(test.get("links")), tuple(test.get("markers") or ())]
+   except (ValueError, UnicodeDecodeError) as e:
+       raise ValueError(f"Could not parse {os.path.basename(path)}: {e}") from e
+   return attempts
+
+
+def merge_workers(paths, workers):
+   if workers is not None:
+       return max(1, min(workers, len(paths)))
+   if len(paths) < 2 or sum(os.path.getsize(path) for path in paths) < MERGE_PARALLEL_MIN_BYTES:
+       return 1
+   return min(len(paths), os.cpu_count() or 1)
+
+
+def scan_report_files(paths, workers):
+   if workers > 1:
+       try:
+           # Never fork: the xdist controller runs execnet threads, and forking a threaded
+           # process can deadlock
+           with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+               # map keeps the input order, so combining stays deterministic
+               return list(executor.map(scan_report_file, paths))
+       except (OSError, BrokenProcessPool) as e:
+           logger.warning(f"Parallel merge unavailable ({e}); parsing worker reports sequentially")
+   return [scan_report_file(path) for path in paths]
+
+
+class ReportHandles:
+   """
+   Binary handles on the merged report files, opened on first use. At most ``limit`` stay
+   open; the least recently used one is closed to make room, so merging hundreds of shard
+   reports does not run into the open file limit.
+   """
+
+   def __init__(self, paths, limit=MERGE_MAX_OPEN_FILES):
+       self.paths = paths
+       self.limit = max(1, limit)
+       self.handles = OrderedDict()
+
+   def get(self, path_index):
+       handle = self.handles.get(path_index)
+       if handle is not None:
+           self.handles.move_to_end(path_index)
+           return handle
+       if len(self.handles) >= self.limit:
+           _, oldest = self.handles.popitem(last=False)
+           oldest.close()
+       handle = self.handles[path_index] = open(self.paths[path_index], "rb")
+       return handle
+
+   def close(self):
+       for handle in self.handles.values():
+           handle.close()
+       self.handles.clear()
 
-def merge_json_reports(directory=".pytest_worker_jsons", output_path="final_report.json"):
-   all_tests = []
-   for filename in sorted(os.listdir(directory)):
-       if filename.endswith(".json"):
-           filepath = os.path.join(directory, filename)
-           with open(filepath) as f:
-               try:
-                   data = json.load(f)
-                   if isinstance(data, list):
-                       all_tests.extend(data)
-                   elif isinstance(data, dict) and "results" in data:
-                       all_tests.extend(data["results"])
-               except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                   raise ValueError(f"Could not parse {filename}: {e}") from e
-
-   # Group tests by nodeid
-   tests_by_nodeid = defaultdict(list)
-   for test in all_tests:
-       nodeid = test.get("nodeid") or test.get("test")  # fallback if needed
-       tests_by_nodeid[nodeid].append(test)
-
-   # Create merged results with flaky info
-   merged_results = []
-   for nodeid, attempts in tests_by_nodeid.items():
-       final_test = attempts[-1].copy()
-       statuses = [t.get("status") for t in attempts]
-       unique_statuses = set(statuses)
-
-       # Mark flaky only if test status changed across runs
-       final_test["flaky"] = len(unique_statuses) > 1
-       final_test["flaky_attempts"] = statuses
-
-       merged_results.append(final_test)
-
-   report_data = {
-       "filters": compute_filter_count(merged_results),
-       "results": merged_results
-   }
 
+def merge_json_reports(directory=".pytest_worker_jsons", output_path="final_report.json", workers=None,
+                       suffixes=(".json", RESULT_LOG_SUFFIX)):
+   """
+   Merges the worker reports found in ``directory`` whose names end with one of ``suffixes``;
+   see merge_report_files. Returns the filters.
+   """
+   paths = [
+       os.path.join(directory, filename)
+       for filename in sorted(os.listdir(directory))
+       if filename.endswith(tuple(suffixes))
+   ]
+   return merge_report_files(paths, output_path, workers=workers)
+
+
+def merge_report_files(paths, output_path="final_report.json", workers=None, rewrite=None,
+                       max_open_files=MERGE_MAX_OPEN_FILES):
+   """
+   Merges report files in two streaming passes. The first pass keeps, per nodeid, only
+   the attempt statuses and where the final attempt is stored; the second re-reads each
+   final record by offset and writes the merged report as it goes. Peak memory depends on
+   the number of unique nodeids, not on the size of the captured output. Returns the filters.
+
+   The first pass parses the files in a process pool when there are several large ones
+   (``workers`` overrides the pool size; 1 disables it). The per-file groupings are
+   combined in file order, so the result is the same either way. ``rewrite`` is called on
+   each final record before it is written.
+   """
+   # nodeid -> [statuses, path index, offset, length, has links, markers], in first-seen order
+   entries = {}
+   marker_sets = {}
+   for path_index, attempts in enumerate(scan_report_files(paths, merge_workers(paths, workers))):
+       for nodeid, (statuses, offset, length, linked, markers) in attempts.items():
+           entry = entries.setdefault(nodeid, [[]])
+           entry[0].extend(statuses)
+           entry[1:] = [path_index, offset, length, linked, marker_sets.setdefault(markers, markers)]
+
+   # Mark flaky only if test status changed across runs
+   filters = compute_filter_count([
+       {"status": statuses[-1], "flaky": len(set(statuses)) > 1, "links": linked, "markers": markers}
+       for statuses, _, _, _, linked, markers in entries.values()
+   ])
+
+   handles = ReportHandles(paths, limit=max_open_files)
    try:
        with open(output_path, "w", encoding="utf-8") as f:
-           json.dump(report_data, f, indent=2)
+           # Same layout as json.dump(report, f, indent=2), written one result at a time
+           f.write('{\n  "filters": ' + json.dumps(filters, indent=2).replace("\n", "\n  ") + ',\n  "results": [')
+           for position, (statuses, path_index, offset, length, _, _) in enumerate(entries.values()):
+               final_test = read_record(handles.get(path_index), offset, length)
+               final_test["flaky"] = len(set(statuses)) > 1
+               final_test["flaky_attempts"] = statuses
+               if rewrite is not None:
+                   rewrite(final_test)
+               f.write(("," if position else "") + "\n    " + json.dumps(final_test, indent=2).replace("\n", "\n    "))
+           f.write("\n  ]\n}" if entries else "]\n}")
    except OSError as e:
        raise RuntimeError(f"Failed to write merged report to {output_path}: {e}") from e
+   finally:
+       handles.close()
+
+   return filters
+
+
+class WorkerResultMerge:
+   """
+   Folds results arriving from xdist workers into the merged report as they come in. The
+   outcome matches merge_json_reports over per-worker files: results are ordered by where
+   each nodeid first appeared (worker id, then arrival order on that worker) and the last
+   attempt wins.
+   """
+
+   def __init__(self):
+       # nodeid -> [first key, final key, [(key, status)], final result]
+       self.attempts = {}
+       self.sequence = {}
 
+   def add(self, result, phase=1):
+       # phase 0 is for results a worker only hands over when it exits (collection errors),
+       # which it logged before running any test
+       worker = result.get("worker") or ""
+       sequence = self.sequence.get(worker, 0)
+       self.sequence[worker] = sequence + 1
+       key = (worker, phase, sequence)
+       nodeid = result.get("nodeid") or result.get("test")  # fallback if needed
+       entry = self.attempts.get(nodeid)
+       if entry is None:
+           self.attempts[nodeid] = [key, key, [(key, result.get("status"))], result]
+           return
+       entry[2].append((key, result.get("status")))
+       if key < entry[0]:
+           entry[0] = key
+       if key > entry[1]:
+           entry[1] = key
+           entry[3] = result
 
-   
+   def results(self):
+       merged_results = []
+       for _, _, attempts, final in sorted(self.attempts.values(), key=lambda entry: entry[0]):
+           statuses = [status for _, status in sorted(attempts)]
+           final_test = dict(final)
+           # Mark flaky only if test status changed across runs
+           final_test["flaky"] = len(set(statuses)) > 1
+           final_test["flaky_attempts"] = statuses
+           merged_results.append(final_test)
+       return merged_results
@@ -1,5 +1,13 @@
-import json
+import os
+import shutil
+import tempfile
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+from pytest_html_plus.json_merge import JSONStream
+
+XML_LAYOUTS = ("suite", "suites", "per-file")
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
 
 def sanitize_classname(filepath):
     if not filepath:
@@ -9,95 +17,229 @@ def sanitize_classname(filepath):
 def sanitize_test_name(test):
     return test.get("test") or test.get("nodeid", "unknown").split("::")[-1]
 
-def convert_json_to_junit_xml(json_path, xml_path):
-    with open(json_path, "r", encoding="utf-8") as f:
-         payload = json.load(f)
+def iter_report_results(json_path):
+    """
+    Yields the results of a JSON report one at a time, so the report is never fully loaded.
+    """
+    with open(json_path, "r", encoding="utf-8", newline="") as f:
+        stream = JSONStream(f)
+        if stream.peek() != "{":
+            raise RuntimeError(f"Invalid report format: expected JSON object at top-level in {json_path}")
+        stream.expect("{")
+        found = False
+        while stream.peek() != "}":
+            key, _, _ = stream.value()
+            stream.expect(":")
+            if key == "results":
+                if stream.peek() != "[":
+                    raise RuntimeError(f"Invalid report format: 'results' must be a list in {json_path}")
+                found = True
+                for test, _, _ in stream.array_items():
+                    yield test
+            else:
+                stream.value()
+            if stream.peek() == ",":
+                stream.pos += 1
+        if not found:
+            raise RuntimeError(f"Invalid report format: missing 'results' key in {json_path}")
+
+
+def convert_json_to_junit_xml(json_path, xml_path, layout="suite"):
+    try:
+        write_junit_xml(iter_report_results(json_path), xml_path, layout=layout)
+    except ValueError as e:
+        raise RuntimeError(f"Invalid report format: could not parse {json_path}: {e}") from e
 
-    if not isinstance(payload, dict):
-        raise RuntimeError(f"Invalid report format: expected JSON object at top-level in {json_path}")
 
-    if "results" not in payload:
-        raise RuntimeError(f"Invalid report format: missing 'results' key in {json_path}")
+def convert_report_to_junit_xml(model, xml_path, layout="suite"):
+    write_junit_xml(model.results, xml_path, summary=model.summary, layout=layout)
 
-    test_results = payload["results"]
 
-    if not isinstance(test_results, list):
-        raise RuntimeError(f"Invalid report format: 'results' must be a list in {json_path}")
+def build_testcase(test):
+    testcase = ET.Element("testcase", {
+        "classname": sanitize_classname(test.get("file")),
+        "name": sanitize_test_name(test),
+        "time": str(test.get("duration", 0)),
+    })
 
+    if test.get("timestamp"):
+        testcase.set("timestamp", test["timestamp"])
+    if test.get("line") is not None:
+        testcase.set("line", str(test["line"]))
+    if test.get("worker"):
+        testcase.set("worker", test["worker"])
+    if test.get("flaky") is not None:
+        testcase.set("flaky", str(test["flaky"]).lower())
+
+    # Add status tag
+    status = test.get("status", "").lower()
+    if status == "failed":
+        failure = ET.SubElement(testcase, "failure", {
+            "message": test.get("error") or "Test failed",
+            "type": "AssertionError"
+        })
+        failure.text = test.get("stderr", "")
+    elif status == "skipped":
+        ET.SubElement(testcase, "skipped")
+
+    # Add stdout/stderr
+    if test.get("stdout"):
+        system_out = ET.SubElement(testcase, "system-out")
+        system_out.text = test["stdout"]
+    if test.get("stderr"):
+        system_err = ET.SubElement(testcase, "system-err")
+        system_err.text = test["stderr"]
+
+    # Add <properties>
+    properties = ET.SubElement(testcase, "properties")
+
+    # Markers
+    for marker in test.get("markers", []):
+        ET.SubElement(properties, "property", {
+            "name": "marker",
+            "value": marker
+        })
 
-    testsuite = ET.Element("testsuite", {
-        "name": "Test Suite",
-        "tests": str(len(test_results)),
-    })
+    # Links
+    for link in test.get("links", []):
+        ET.SubElement(properties, "property", {
+            "name": "link",
+            "value": link
+        })
 
-    for test in test_results:
-        testcase = ET.SubElement(testsuite, "testcase", {
-            "classname": sanitize_classname(test.get("file")),
-            "name": sanitize_test_name(test),
-            "time": str(test.get("duration", 0)),
+    # Screenshot
+    if test.get("screenshot"):
+        ET.SubElement(properties, "property", {
+            "name": "screenshot",
+            "value": test["screenshot"]
         })
 
-        if test.get("timestamp"):
-            testcase.set("timestamp", test["timestamp"])
-        if test.get("line") is not None:
-            testcase.set("line", str(test["line"]))
-        if test.get("worker"):
-            testcase.set("worker", test["worker"])
-        if test.get("flaky") is not None:
-            testcase.set("flaky", str(test["flaky"]).lower())
-
-        # Add status tag
-        status = test.get("status", "").lower()
-        if status == "failed":
-            failure = ET.SubElement(testcase, "failure", {
-                "message": test.get("error") or "Test failed",
-                "type": "AssertionError"
-            })
-            failure.text = test.get("stderr", "")
-        elif status == "skipped":
-            ET.SubElement(testcase, "skipped")
-
-        # Add stdout/stderr
-        if test.get("stdout"):
-            system_out = ET.SubElement(testcase, "system-out")
-            system_out.text = test["stdout"]
-        if test.get("stderr"):
-            system_err = ET.SubElement(testcase, "system-err")
-            system_err.text = test["stderr"]
-
-        # Add <properties>
-        properties = ET.SubElement(testcase, "properties")
-
-        # Markers
-        for marker in test.get("markers", []):
-            ET.SubElement(properties, "property", {
-                "name": "marker",
-                "value": marker
-            })
-
-        # Links
-        for link in test.get("links", []):
-            ET.SubElement(properties, "property", {
-                "name": "link",
-                "value": link
-            })
-
-        # Screenshot
-        if test.get("screenshot"):
-            ET.SubElement(properties, "property", {
-                "name": "screenshot",
-                "value": test["screenshot"]
-            })
-
-        # Logs
-        for log in test.get("logs", []):
-            ET.SubElement(properties, "property", {
-                "name": "log",
-                "value": str(log)
-            })
+    # Logs: the plugin stores the captured log text as one string, older reports hold a list
+    logs = test.get("logs") or []
+    if isinstance(logs, str):
+        logs = [logs]
+    for log in logs:
+        ET.SubElement(properties, "property", {
+            "name": "log",
+            "value": str(log)
+        })
+
+    return testcase
+
+
+def xml_shard_dir(xml_path):
+    """
+    Folder the per-file layout writes its shards to: the XML report path without its extension.
+    """
+    return os.path.splitext(xml_path)[0]
+
+
+def write_junit_xml(test_results, xml_path, summary=None, layout="suite"):
+    """
+    Writes one <testcase> at a time, so only a single test is held as XML. The <testsuite>
+    attributes come first in the file; without a precomputed summary they are counted while
+    the testcases are spooled to a temporary file, which is then copied behind them.
+
+    The "suites" layout groups the testcases by file into a <testsuites> document, and
+    "per-file" writes each group as its own file under xml_shard_dir(xml_path).
+    """
+    if layout not in XML_LAYOUTS:
+        raise ValueError(f"Unknown XML layout {layout!r}; expected one of {', '.join(XML_LAYOUTS)}")
+    if layout != "suite":
+        write_grouped_junit_xml(test_results, xml_path, layout)
+        return
+
+    counts = new_counts()
+    try:
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write(XML_DECLARATION)
+            if summary:
+                f.write(open_tag("testsuite", "Test Suite", summary_counts(summary)))
+                write_testcases(test_results, f, counts)
+            else:
+                with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+                    write_testcases(test_results, spool, counts)
+                    f.write(open_tag("testsuite", "Test Suite", counts))
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, f)
+            f.write("</testsuite>")
+    except OSError as e:
+        raise RuntimeError(f"Failed to write XML report to {xml_path}: {e}") from e
 
+
+def write_grouped_junit_xml(test_results, xml_path, layout):
+    """
+    Spools every testcase once while the per-file and overall counts accumulate, remembering
+    where each one landed; each file's <testsuite> is then written from its spooled ranges.
+    """
+    # classname -> [counts, [(offset, length)]], in first-seen order
+    groups = {}
+    totals = new_counts()
     try:
-        tree = ET.ElementTree(testsuite)
-        tree.write(xml_path, encoding="utf-8", xml_declaration=True)
+        with tempfile.TemporaryFile() as spool:
+            for test in test_results:
+                counts, ranges = groups.setdefault(sanitize_classname(test.get("file")), [new_counts(), []])
+                data = ET.tostring(build_testcase(test), encoding="unicode").encode("utf-8")
+                ranges.append((spool.tell(), len(data)))
+                spool.write(data)
+                count_testcase(counts, test)
+                count_testcase(totals, test)
+
+            if layout == "suites":
+                with open(xml_path, "w", encoding="utf-8") as f:
+                    f.write(XML_DECLARATION + open_tag("testsuites", "Test Suite", totals))
+                    for name, (counts, ranges) in groups.items():
+                        write_spooled_suite(f, spool, name, counts, ranges)
+                    f.write("</testsuites>")
+            else:
+                shard_dir = xml_shard_dir(xml_path)
+                os.makedirs(shard_dir, exist_ok=True)
+                for name, (counts, ranges) in groups.items():
+                    with open(os.path.join(shard_dir, f"{name}.xml"), "w", encoding="utf-8") as f:
+                        f.write(XML_DECLARATION)
+                        write_spooled_suite(f, spool, name, counts, ranges)
     except OSError as e:
         raise RuntimeError(f"Failed to write XML report to {xml_path}: {e}") from e
+
+
+def write_spooled_suite(f, spool, name, counts, ranges):
+    f.write(open_tag("testsuite", name, counts))
+    for offset, length in ranges:
+        spool.seek(offset)
+        f.write(spool.read(length).decode("utf-8"))
+    f.write("</testsuite>")
+
+
+def write_testcases(test_results, f, counts):
+    for test in test_results:
+        count_testcase(counts, test)
+        f.write(ET.tostring(build_testcase(test), encoding="unicode"))
+
+
+def new_counts():
+    return {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0}
+
+
+def count_testcase(counts, test):
+    status = (test.get("status") or "").lower()
+    counts["tests"] += 1
+    counts["failures"] += status == "failed"
+    counts["errors"] += status == "error"
+    counts["skipped"] += status == "skipped"
+    counts["time"] += test.get("duration") or 0
+
+
+def summary_counts(summary):
+    return {
+        "tests": summary["total"],
+        "failures": summary["failed"],
+        "errors": summary["error"],
+        "skipped": summary["skipped"],
+        "time": summary["duration"],
+    }
+
+
+def open_tag(tag, name, counts):
+    attributes = {"name": name, **{key: str(value) for key, value in counts.items()}}
+    attributes["time"] = str(round(counts["time"], 3))
+    return f"<{tag} " + " ".join(f"{key}={quoteattr(value)}" for key, value in attributes.items()) + ">"
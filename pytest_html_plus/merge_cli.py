@@ -0,0 +1,179 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from pytest_html_plus.json_merge import MERGE_MAX_OPEN_FILES, merge_report_files
+
+PLUS_METADATA_FILENAME = "plus_metadata.json"
+GZIP_SUFFIX = ".gz"
+
+
+def expand_report_paths(patterns):
+    """
+    Resolves report paths and glob patterns, keeping argument order and sorting the matches of
+    each glob. A report given twice is merged once.
+    """
+    paths = []
+    for pattern in patterns:
+        if any(char in pattern for char in "*?["):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                raise ValueError(f"No shard reports match {pattern}")
+        else:
+            matches = [pattern]
+        for path in matches:
+            if not os.path.isfile(path):
+                raise ValueError(f"Shard report not found: {path}")
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def decompress_reports(paths, temp_dir):
+    """
+    Streams gzipped reports into ``temp_dir`` so the merge can read records back by byte
+    offset. The .gz suffix is dropped, keeping .json or .ndjson to select the parser.
+    """
+    readable = []
+    for index, path in enumerate(paths):
+        if not path.endswith(GZIP_SUFFIX):
+            readable.append(path)
+            continue
+        target = os.path.join(temp_dir, f"{index}_{os.path.basename(path)[:-len(GZIP_SUFFIX)]}")
+        try:
+            with gzip.open(path, "rb") as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Could not decompress {path}: {e}") from e
+        readable.append(target)
+    return readable
+
+
+def merge_screenshot_dirs(directories, output_dir):
+    """
+    Copies the screenshots of every shard into one folder and returns their file names. Files
+    are copied in shard order, so as with the results the last shard wins a name clash.
+    """
+    names = set()
+    for directory in directories:
+        if not os.path.isdir(directory):
+            raise ValueError(f"Screenshot folder not found: {directory}")
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.endswith(".png"):
+                    os.makedirs(output_dir, exist_ok=True)
+                    shutil.copy2(os.path.join(root, file), os.path.join(output_dir, file))
+                    names.add(file)
+    return names
+
+
+def merge_metadata(metadata_paths):
+    """
+    Combines the plus_metadata.json of each shard: values the shards agree on are kept, others
+    are joined in shard order (structured ones, like shard plans, as a list), and
+    generated_at is the latest one.
+    """
+    merged = {}
+    for path in metadata_paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Could not read {path}: {e}") from e
+        for key, value in metadata.items():
+            merged.setdefault(key, []).append(value)
+
+    combined = {}
+    for key, values in merged.items():
+        if key == "generated_at":
+            combined[key] = max(values)
+            continue
+        distinct = []
+        for value in values:
+            if value not in distinct:
+                distinct.append(value)
+        if len(distinct) == 1:
+            combined[key] = distinct[0]
+        elif any(isinstance(value, (dict, list)) for value in distinct):
+            combined[key] = distinct
+        else:
+            combined[key] = ", ".join(str(value) for value in distinct)
+    if merged:
+        combined["shards"] = len(metadata_paths)
+    return combined
+
+
+def shard_metadata_paths(report_paths):
+    paths = []
+    for report_path in report_paths:
+        path = os.path.join(os.path.dirname(report_path), PLUS_METADATA_FILENAME)
+        if os.path.isfile(path) and path not in paths:
+            paths.append(path)
+    return paths
+
+
+def merge_shard_reports(patterns, output_path="final_report.json", screenshot_dirs=(),
+                        screenshots_output="screenshots", workers=None, max_open_files=MERGE_MAX_OPEN_FILES):
+    """
+    Merges the final reports of separately run shards into one report, as the plugin does for
+    xdist workers, together with their screenshots and run metadata. Returns the filters.
+    """
+    report_paths = expand_report_paths(patterns)
+    metadata = merge_metadata(shard_metadata_paths(report_paths))
+    screenshots = merge_screenshot_dirs(screenshot_dirs, screenshots_output)
+
+    def rewrite(test):
+        # Point at the merged copy, since the shard's own path only existed on its machine
+        screenshot = test.get("screenshot")
+        if screenshot and os.path.basename(screenshot) in screenshots:
+            test["screenshot"] = os.path.join(screenshots_output, os.path.basename(screenshot))
+
+    with tempfile.TemporaryDirectory(prefix="plus_merge_") as temp_dir:
+        filters = merge_report_files(decompress_reports(report_paths, temp_dir), output_path, workers=workers,
+                                     rewrite=rewrite if screenshots else None, max_open_files=max_open_files)
+
+    if metadata:
+        metadata_path = os.path.join(os.path.dirname(output_path), PLUS_METADATA_FILENAME)
+        try:
+            with open(metadata_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=2)
+        except OSError as e:
+            raise RuntimeError(f"Failed to write merged metadata to {metadata_path}: {e}") from e
+    return filters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the JSON reports of separately run test shards")
+    parser.add_argument("reports", nargs="+",
+                        help="Shard report paths or glob patterns (.json, .ndjson, optionally gzipped)")
+    parser.add_argument("--output", default="final_report.json", help="Path of the merged JSON report")
+    parser.add_argument("--screenshots", action="append", default=[],
+                        help="Screenshot folder of a shard; repeat for each shard")
+    parser.add_argument("--screenshots-output", default="screenshots",
+                        help="Folder the shard screenshots are merged into")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used to parse the shard reports (default: by input size)")
+    parser.add_argument("--max-open-files", type=int, default=MERGE_MAX_OPEN_FILES,
+                        help="Shard reports kept open at once while writing the merged report")
+    args = parser.parse_args(argv)
+
+    try:
+        filters = merge_shard_reports(
+            args.reports,
+            output_path=args.output,
+            screenshot_dirs=args.screenshots,
+            screenshots_output=args.screenshots_output,
+            workers=args.workers,
+            max_open_files=args.max_open_files,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Merged {filters['total']} tests into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,20 @@ from datetime import datetime
 from pathlib import Path
 
 import pytest
-import json
 
-from pytest_html_plus.compute_report_metadata import write_plus_metadata_if_main_worker
+from pytest_html_plus.artifact_pipeline import ArtifactPipeline
+from pytest_html_plus.compute_report_metadata import update_plus_metadata_if_main_worker, \
+    write_plus_metadata_if_main_worker
+from pytest_html_plus.duration_history import failed_first_order, load_run_history, lpt_order, parse_shard, \
+    plan_shards
 from pytest_html_plus.extract_link import extract_links_from_item
-from pytest_html_plus.generate_html_report import JSONReporter
-from pytest_html_plus.json_merge import merge_json_reports
-from pytest_html_plus.json_to_xml_converter import convert_json_to_junit_xml
+from pytest_html_plus.generate_html_report import JSONReporter, render_html_report
+from pytest_html_plus.history_store import HISTORY_RETENTION_RUNS, HistoryStore, history_path
+from pytest_html_plus.json_merge import WorkerResultMerge, merge_json_reports
+from pytest_html_plus.json_to_xml_converter import XML_LAYOUTS, convert_report_to_junit_xml, xml_shard_dir
+from pytest_html_plus.report_model import ReportModel, load_plus_metadata
 from pytest_html_plus.resolver_driver import take_screenshot_generic, resolve_driver
+from pytest_html_plus.result_log import RESULT_LOG_SUFFIX, ResultLog, iter_results, result_log_path
 from pytest_html_plus.send_email_report import EmailSender
 from pytest_html_plus.utils import extract_error_block, extract_trace_block, load_email_env
 
@@ -37,6 +43,69 @@ def pytest_runtest_setup(item):
        item.fixturenames.append("caplog")
 
 
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+   shard = config._plus_shard
+   schedule = config._plus_schedule
+   if shard is None and schedule == "collection":
+       return
+   durations, unstable = load_run_history(config)
+   if shard is not None:
+       select_shard(config, items, durations, shard)
+   if schedule == "lpt":
+       items[:] = lpt_order(items, durations, workers=int(os.getenv("PYTEST_XDIST_WORKER_COUNT") or 0))
+   elif schedule == "failed-first":
+       items[:] = failed_first_order(items, durations, unstable)
+
+
+def configure_schedule(config):
+   """
+   Returns the test order to apply. Longest-first only balances xdist workers when they take
+   one new test at a time: by default its load scheduling hands out blocks of consecutive
+   tests, which would give the first worker all the longest ones.
+   """
+   schedule = config.getoption("--plus-schedule")
+   if schedule != "lpt":
+       return schedule
+   dist = config.getoption("dist", default="no")
+   if dist == "load":
+       if config.getoption("maxschedchunk", default=None) is None:
+           config.option.maxschedchunk = 1
+   elif dist != "no":
+       if not os.getenv("PYTEST_XDIST_WORKER"):
+           logger.warning(f"--plus-schedule=lpt needs --dist=load; keeping the collection order with --dist={dist}")
+       return "collection"
+   return schedule
+
+
+def select_shard(config, items, durations, shard):
+   """
+   Keeps the items planned for this shard and deselects the rest; the plan goes into the run metadata.
+   """
+   index, count = shard
+   if not config.getoption("--plus-durations-from"):
+       # Local durations differ between machines, and each shard run rewrites the local report,
+       # so only a plan that ignores them is the same for every shard
+       logger.warning("--plus-shard without --plus-durations-from splits tests by count, not by duration")
+       durations = {}
+   nodeids = [item.nodeid for item in items]
+   assignment, expected = plan_shards(nodeids, durations, count)
+   selected = [item for item, planned in zip(items, assignment) if planned == index - 1]
+   deselected = [item for item, planned in zip(items, assignment) if planned != index - 1]
+   if deselected:
+       config.hook.pytest_deselected(items=deselected)
+   items[:] = selected
+   update_plus_metadata_if_main_worker(shard_plan={
+       "shard": index,
+       "shards": count,
+       "tests": len(selected),
+       "collected": len(nodeids),
+       "known_durations": sum(1 for nodeid in nodeids if nodeid in durations),
+       "expected_duration": round(expected[index - 1], 3),
+       "expected_durations": [round(load, 3) for load in expected],
+   })
+
+
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_makereport(item, call):
    outcome = yield
@@ -86,11 +155,13 @@ def pytest_runtest_makereport(item, call):
 
        reporter = config._json_reporter
        worker_id = os.getenv("PYTEST_XDIST_WORKER") or "main"
+       # In channel mode a worker ships the result with the test report instead of keeping it
+       send_to_controller = worker_id != "main" and config.getoption("--plus-xdist-transport") == "channel"
        test_name =  "".join(c if c.isalnum() else "_" for c in item.name)
        status = report.outcome
        if report.when in ("setup", "teardown") and report.failed:
             status = "error"
-       reporter.log_result(
+       result = reporter.log_result(
            test_name=test_name,
            nodeid=item.nodeid,
            status=status,
@@ -105,8 +176,31 @@ def pytest_runtest_makereport(item, call):
            screenshot=screenshot_path,
            logs=caplog_text,
            worker=worker_id,
-           links=extract_links_from_item(item)
+           links=extract_links_from_item(item),
+           keep=not send_to_controller
        )
+       if send_to_controller:
+           # Extra report attributes survive xdist's report serialization
+           report.plus_result = result.to_dict()
+
+
+def pytest_runtest_logreport(report):
+   plus_result = getattr(report, "plus_result", None)
+   if plus_result is None or os.getenv("PYTEST_XDIST_WORKER"):
+       return
+   worker_merge = getattr(_saved_config, "_plus_worker_merge", None)
+   if worker_merge is not None:
+       worker_merge.add(plus_result)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+   worker_merge = getattr(node.config, "_plus_worker_merge", None)
+   if worker_merge is None:
+       return
+   # Whatever the worker logged outside of a test report (collection errors)
+   for result in getattr(node, "workeroutput", {}).get("plus_results", []):
+       worker_merge.add(result, phase=0)
 
 
 import subprocess
@@ -126,53 +220,154 @@ def pytest_sessionfinish(session, exitstatus):
    except ValueError:
        is_xdist = False
 
+   use_channel = session.config.getoption("--plus-xdist-transport") == "channel"
+   if reporter.result_log is not None:
+       reporter.result_log.close()
+
    if is_worker:
-       reporter.write_report()
+       if use_channel:
+           session.config.workeroutput["plus_results"] = [dict(result) for result in reporter.results]
+       elif reporter.result_log is None:
+           # Otherwise the worker's results are already on disk and the merge streams them from the log
+           reporter.write_report()
        print(f"Worker {os.getenv('PYTEST_XDIST_WORKER')} finished – skipping merge.")
        return
 
-   if is_xdist:
-       merge_json_reports(directory=".pytest_worker_jsons", output_path=json_path)
+   record_history = session.config.getoption("--detect-flake") or session.config.getoption("--plus-duration-regressions")
+   if is_xdist and use_channel:
+       # Worker results were folded in as their reports arrived, so the merge is already done
+       reporter.results = session.config._plus_worker_merge.results()
+       model = ReportModel(reporter.results, metadata=load_plus_metadata(json_path), report_path=json_path)
+   elif is_xdist:
+       # The merge streams the worker reports to disk; the report model is then read back once.
+       # Only the format written this run: the folder keeps the other one from earlier runs
+       worker_suffix = RESULT_LOG_SUFFIX if session.config.getoption("--plus-result-log") else ".json"
+       merge_json_reports(directory=".pytest_worker_jsons", output_path=json_path, suffixes=(worker_suffix,))
+       model = ReportModel.from_json(json_path)
    else:
+       if reporter.result_log is not None:
+           reporter.results = iter_results(reporter.result_log.path)
        reporter.results = mark_flaky_tests(reporter.results)
-       reporter.write_report()
+       model = ReportModel(reporter.results, metadata=load_plus_metadata(json_path), report_path=json_path)
 
-   script_path = os.path.join(os.path.dirname(__file__), "generate_html_report.py")
+   if record_history:
+       # Before the JSON report is written, so it carries the history counts and regression marks
+       try:
+           record_run_history(session.config, model)
+       except RuntimeError as e:
+           logger.warning(f"Run history not updated: {e}")
+   if not is_xdist or use_channel or record_history:
+       # A files merge already wrote the report; it is only rewritten to add the history
+       reporter.results = model.results
+       reporter.write_report(filters=model.filters)
 
-   if not os.path.exists(script_path):
-       logger.warning(f"Report generation script not found at {script_path}. Skipping HTML report generation.")
+   pipeline = ArtifactPipeline(max_workers=session.config.getoption("--artifact-workers"))
+   pipeline.add_stage("html", lambda: generate_html_output(session.config, model, screenshots_path, html_output))
+
+   if session.config.getoption("--generate-xml"):
+       xml_layout = session.config.getoption("--xml-layout")
+       pipeline.add_stage("xml", lambda: generate_xml_output(model, xml_path, layout=xml_layout))
+
+   if session.config.getoption("--plus-email"):
+       pipeline.add_stage("email", lambda: send_email_report(model, html_output), depends_on=["html"])
+
+   pipeline.add_stage(
+       "open",
+       lambda: open_html_report(report_path=f"{html_output}/report.html", config=session.config, model=model),
+       depends_on=["html"]
+   )
+   pipeline.run()
+
+
+def record_run_history(config, model):
+   """
+   Adds this run to the history store and marks the model with the flake rates over the last
+   --detect-flake runs and with the duration regressions against the rolling baselines.
+   """
+   builds = config.getoption("--detect-flake")
+   track_durations = config.getoption("--plus-duration-regressions")
+   store = HistoryStore(history_path(config), retention=max(builds, config.getoption("--plus-history-retention")))
+   try:
+       store.record_run(model.results, track_durations=track_durations)
+       if builds:
+           model.set_flake_history(store.flake_rates(builds))
+       if track_durations:
+           model.set_duration_regressions(store.duration_regressions())
+   finally:
+       store.close()
+
+
+def html_render_options(config):
+   return {
+       "lazy_details": config.getoption("--html-lazy-details"),
+       "virtual_list": config.getoption("--html-virtual-list"),
+       "compact": config.getoption("--html-compact"),
+       "assets": config.getoption("--html-assets"),
+       "assets_dir": config.getoption("--html-assets-dir"),
+   }
+
+
+def generate_html_output(config, model, screenshots_path, html_output):
+   options = html_render_options(config)
+   if config.getoption("--html-render") == "subprocess":
+       if config.getoption("--detect-flake") or config.getoption("--plus-duration-regressions"):
+           # The subprocess reads the flake rates and regressions back from the history store
+           options.update(history=history_path(config), detect_flake=config.getoption("--detect-flake"),
+                          duration_regressions=config.getoption("--plus-duration-regressions"))
+       generate_html_in_subprocess(model.report_path, screenshots_path, html_output, **options)
        return
 
    try:
-       subprocess.run([
-           sys.executable,
-           script_path,
-           "--report", json_path,
-           "--screenshots", screenshots_path,
-           "--output", html_output
-       ], check=True)
+       render_html_report(model, screenshots_dir=screenshots_path, output_dir=html_output, **options)
    except Exception as e:
        raise RuntimeError(f"Exception during HTML report generation: {e}") from e
 
-   if session.config.getoption("--plus-email"):
-       print("📬 --plus-email enabled. Sending report...")
-       try:
-           config = load_email_env()
-           config["report_path"] = f"{html_output}"
-           sender = EmailSender(config, report_path=config["report_path"])
-           sender.send()
-       except Exception as e:
-           raise RuntimeError(f"Failed to send email: {e}") from e
 
-   open_html_report(report_path=f"{html_output}/report.html",json_path=json_path, config=session.config)
+def generate_xml_output(model, xml_path, layout="suite"):
+   try:
+       convert_report_to_junit_xml(model, xml_path, layout=layout)
+       print(f"XML report generated: {xml_shard_dir(xml_path) if layout == 'per-file' else xml_path}")
+   except Exception as e:
+       raise RuntimeError(f"Failed to generate XML report: {e}") from e
 
-   if session.config.getoption("--generate-xml"):
-       try:
-           json_path = reporter.report_path
-           convert_json_to_junit_xml(json_path, xml_path)
-           print(f"XML report generated: {xml_path}")
-       except Exception as e:
-           raise RuntimeError(f"Failed to generate XML report: {e}") from e
+
+def send_email_report(model, html_output):
+   print("📬 --plus-email enabled. Sending report...")
+   try:
+       config = load_email_env()
+       config["report_path"] = f"{html_output}"
+       sender = EmailSender(config, report_path=config["report_path"], model=model)
+       sender.send()
+   except Exception as e:
+       raise RuntimeError(f"Failed to send email: {e}") from e
+
+
+def generate_html_in_subprocess(json_path, screenshots_path, html_output, **options):
+   script_path = os.path.join(os.path.dirname(__file__), "generate_html_report.py")
+
+   if not os.path.exists(script_path):
+       logger.warning(f"Report generation script not found at {script_path}. Skipping HTML report generation.")
+       return
+
+   command = [
+       sys.executable,
+       script_path,
+       "--report", json_path,
+       "--screenshots", screenshots_path,
+       "--output", html_output
+   ]
+   # Render options map onto the generate_html_report command line flags
+   for name, value in options.items():
+       flag = f"--{name.replace('_', '-')}"
+       if value is True:
+           command.append(flag)
+       elif value not in (None, False):
+           command.extend([flag, str(value)])
+
+   try:
+       subprocess.run(command, check=True)
+   except Exception as e:
+       raise RuntimeError(f"Exception during HTML report generation: {e}") from e
 
 
 def pytest_sessionstart(session):
@@ -218,8 +413,45 @@ def pytest_addoption(parser):
    parser.addoption(
        "--detect-flake",
        action="store",
+       type=int,
+       default=0,
+       help="Helps capture flaky tests in the last n number of builds, from a run history kept in the pytest cache"
+   )
+   parser.addoption(
+       "--plus-history-retention",
+       action="store",
+       type=int,
+       default=HISTORY_RETENTION_RUNS,
+       help="Number of runs kept in the run history used by --detect-flake"
+   )
+   parser.addoption(
+       "--plus-schedule",
+       action="store",
+       choices=["collection", "lpt", "failed-first"],
+       default="collection",
+       help="Test order: as collected (default); longest expected duration first (lpt), which balances the work "
+            "across xdist workers (sets --maxschedchunk=1 with --dist=load, keeps the collection order with other "
+            "--dist modes); or last run's failed, errored and flaky tests first, then the rest fastest "
+            "first (failed-first). Durations come from the run history or the previous JSON report"
+   )
+   parser.addoption(
+       "--plus-shard",
+       action="store",
+       default=None,
+       help="Run only shard i of N (as i/N) of a duration-balanced split of the collected tests"
+   )
+   parser.addoption(
+       "--plus-durations-from",
+       action="store",
+       default=None,
+       help="JSON report or run history (.sqlite) to take expected durations from for --plus-shard and "
+            "--plus-schedule, instead of this machine's history or previous report"
+   )
+   parser.addoption(
+       "--plus-duration-regressions",
+       action="store_true",
        default=False,
-       help="Helps capture flaky tests in the last n number of builds"
+       help="Keep rolling duration baselines in the run history and flag tests that got significantly slower"
    )
    parser.addoption(
        "--should-open-report",
@@ -228,6 +460,71 @@ def pytest_addoption(parser):
        choices=["always", "failed", "never"],
        help="When to open the HTML report: always, failed, or never (default: failed)",
    )
+   parser.addoption(
+       "--plus-result-log",
+       action="store_true",
+       default=False,
+       help="Append each result to an NDJSON log next to the JSON report as the run progresses, "
+            "instead of holding all results in memory until the session ends"
+   )
+   parser.addoption(
+       "--plus-xdist-transport",
+       action="store",
+       default="files",
+       choices=["files", "channel"],
+       help="How xdist workers hand results to the controller: files (default) writes one report per "
+            "worker for the controller to merge; channel sends each result along with its test report"
+   )
+   parser.addoption(
+       "--html-render",
+       action="store",
+       default="inprocess",
+       choices=["inprocess", "subprocess"],
+       help="How to render the HTML report: inprocess (default) or subprocess (isolated interpreter)"
+   )
+   parser.addoption(
+       "--html-lazy-details",
+       action="store_true",
+       default=False,
+       help="Keep only a summary row per test in report.html and load error, trace and output "
+            "from shard files next to it when a test is expanded"
+   )
+   parser.addoption(
+       "--html-virtual-list",
+       action="store_true",
+       default=False,
+       help="Render only the test cards visible on screen from an embedded results array, "
+            "so very large reports scroll and filter quickly"
+   )
+   parser.addoption(
+       "--html-compact",
+       action="store_true",
+       default=False,
+       help="Shrink report.html: copy buttons read text already in the page instead of embedding "
+            "a base64 copy, and repeated inline styles and icons are shared"
+   )
+   parser.addoption(
+       "--html-assets",
+       action="store",
+       default="inline",
+       choices=["inline", "external"],
+       help="inline (default) embeds the report CSS and JavaScript in report.html; external writes them "
+            "once as content-hashed files the page links to, so browsers can cache them across reports"
+   )
+   parser.addoption(
+       "--html-assets-dir",
+       action="store",
+       default=None,
+       help="Folder for the external CSS/JavaScript files, e.g. one shared by several reports "
+            "(default: the HTML output folder)"
+   )
+   parser.addoption(
+       "--artifact-workers",
+       action="store",
+       type=int,
+       default=4,
+       help="Number of threads used to emit the HTML, XML and email artifacts after the run (1 = sequential)"
+   )
    parser.addoption(
        "--generate-xml",
        action="store_true",
@@ -240,6 +537,14 @@ def pytest_addoption(parser):
        default=None,
        help="Path to output the XML report (used with --generatexml)"
    )
+   parser.addoption(
+       "--xml-layout",
+       action="store",
+       choices=XML_LAYOUTS,
+       default="suite",
+       help="XML layout: one testsuite (default), a testsuites document with one testsuite per file, "
+            "or one XML file per test file in a folder named after --xml-report"
+   )
    parser.addoption(
        "--git-branch",
        action="store",
@@ -288,7 +593,26 @@ def pytest_configure(config):
        name, ext = os.path.splitext(report_path)
        report_path = INTERNAL_JSON_DIR / f"{name}_{worker_id}{ext}"
 
-   config._json_reporter = JSONReporter(report_path=report_path)
+   config._plus_schedule = configure_schedule(config)
+   config._plus_shard = None
+   if config.getoption("--plus-shard"):
+       try:
+           config._plus_shard = parse_shard(config.getoption("--plus-shard"))
+       except ValueError as e:
+           raise pytest.UsageError(f"--plus-shard: {e}") from e
+   durations_from = config.getoption("--plus-durations-from")
+   if durations_from and not os.path.exists(durations_from):
+       raise pytest.UsageError(f"--plus-durations-from: {durations_from} does not exist")
+
+   use_channel = config.getoption("--plus-xdist-transport") == "channel"
+   result_log = None
+   # A channel worker sends its test results along with their reports and hands the rest
+   # (collection errors) over from memory when it exits, so nothing would read its log back
+   if config.getoption("--plus-result-log") and not (worker_id and use_channel):
+       result_log = ResultLog(result_log_path(report_path))
+   config._json_reporter = JSONReporter(report_path=report_path, result_log=result_log)
+   if not worker_id and use_channel:
+       config._plus_worker_merge = WorkerResultMerge()
 
 
 def pytest_collectreport(report):
@@ -341,7 +665,7 @@ def mark_flaky_tests(results):
 
    return final_results
 
-def open_html_report(report_path: str, json_path: str, config) -> None:
+def open_html_report(report_path: str, json_path: str = None, config=None, model=None) -> None:
    if os.environ.get("CI") == "true":
        return
 
@@ -351,21 +675,14 @@ def open_html_report(report_path: str, json_path: str, config) -> None:
        return
 
    try:
-       with open(json_path, "r", encoding="utf-8") as f:
-           report_data = json.load(f)
-
-       results = report_data.get("results", [])
-
-       has_failures = any(
-           t.get("status") == "failed" or t.get("error")
-           for t in results
-       )
+       if model is None:
+           model = ReportModel.from_json(json_path)
 
-       if should_open == "always" or (should_open == "failed" and has_failures):
+       if should_open == "always" or (should_open == "failed" and model.has_failures):
            webbrowser.open(f"file://{os.path.abspath(report_path)}")
 
    except Exception as e:
        try:
            logger.warning(f"Could not open report in browser: {e}")
        except Exception:
-           print(f"Could not open report in browser: {e}")
\ No newline at end of file
+           print(f"Could not open report in browser: {e}")
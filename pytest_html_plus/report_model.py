@@ -0,0 +1,108 @@
+import json
+import os
+
+from pytest_html_plus.compute_filter_counts import compute_filter_count
+
+
+def load_plus_metadata(report_path):
+    metadata_path = os.path.join(os.path.dirname(report_path), "plus_metadata.json")
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path) as meta_file:
+        return json.load(meta_file)
+
+
+def summarize_results(results):
+    """
+    Computes the run aggregates every artifact needs (counts per status, flaky count,
+    total and slowest duration) in a single pass over the results.
+    """
+    summary = {
+        "total": 0,
+        "passed": 0,
+        "failed": 0,
+        "error": 0,
+        "skipped": 0,
+        "flaky": 0,
+        "duration": 0.0,
+        "slowest_name": "N/A",
+        "slowest_duration": 0,
+        "has_failures": False,
+    }
+    slowest_test = None
+    for test in results:
+        status = test.get("status")
+        duration = test.get("duration") or 0
+        summary["total"] += 1
+        if status in ("passed", "failed", "error", "skipped"):
+            summary[status] += 1
+        if test.get("flaky"):
+            summary["flaky"] += 1
+        if status == "failed" or test.get("error"):
+            summary["has_failures"] = True
+        summary["duration"] += duration
+        if slowest_test is None or duration > (slowest_test.get("duration") or 0):
+            slowest_test = test
+
+    if slowest_test is not None:
+        summary["slowest_name"] = slowest_test.get("test", "N/A")
+        summary["slowest_duration"] = slowest_test.get("duration") or 0
+    return summary
+
+
+class ReportModel:
+    """
+    The final results of a run with their filter counts, run metadata and aggregates,
+    built once and shared by the HTML renderer, the JUnit XML converter, the browser-open
+    decision and the email sender.
+    """
+
+    def __init__(self, results, filters=None, metadata=None, report_path="final_report.json"):
+        self.results = results
+        self.filters = filters if filters is not None else compute_filter_count(results)
+        self.metadata = metadata if metadata is not None else {}
+        self.report_path = report_path
+        self.summary = summarize_results(results)
+        # nodeid -> (unstable runs, runs) over the recent run history, when --detect-flake is on
+        self.flake_history = None
+
+    @classmethod
+    def from_json(cls, report_path):
+        with open(report_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and "results" in data:
+            results, filters = data["results"], data.get("filters")
+        elif isinstance(data, list):
+            results, filters = data, None
+        else:
+            raise ValueError("Unexpected report format.")
+        return cls(results, filters=filters, metadata=load_plus_metadata(report_path), report_path=report_path)
+
+    def set_flake_history(self, flake_rates):
+        self.flake_history = flake_rates
+        self.filters["history_flaky"] = sum(
+            1 for test in self.results if (test.get("nodeid") or test.get("test")) in flake_rates
+        )
+
+    def set_duration_regressions(self, regressions):
+        """
+        Marks each result whose duration regressed against its baseline with that baseline.
+        The count comes from compute_filter_count, like it does for merged or reloaded reports.
+        """
+        for test in self.results:
+            baseline = regressions.get(test.get("nodeid") or test.get("test"))
+            if baseline is not None:
+                test["duration_regression"] = baseline
+        self.filters["regressed"] = compute_filter_count(self.results).get("regressed", 0)
+
+    @property
+    def has_failures(self):
+        return self.summary["has_failures"]
+
+    def describe(self):
+        summary = self.summary
+        return (
+            f"Total tests: {summary['total']}, Passed: {summary['passed']}, "
+            f"Failures: {summary['failed']}, Errors: {summary['error']}, "
+            f"Skipped: {summary['skipped']}, Flaky: {summary['flaky']}."
+        )
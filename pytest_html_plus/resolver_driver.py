@@ -25,12 +25,16 @@ def resolve_driver(item):
 
 
 import os
+
+SCREENSHOT_SUFFIX = "_failure"
+
+
 def sanitize_filename(name):
    return "".join(c if c.isalnum() else "_" for c in name)
 
 def take_screenshot_generic(path, item, driver):
    os.makedirs(path, exist_ok=True)
-   filename = os.path.join(path, f"{sanitize_filename(item.name)}_failure.png")
+   filename = os.path.join(path, f"{sanitize_filename(item.name)}{SCREENSHOT_SUFFIX}.png")
 
    if hasattr(driver, "screenshot"):
        driver.screenshot(path=filename)
@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+
+from pytest_html_plus.result_record import ResultRecord
+
+logger = logging.getLogger(__name__)
+
+RESULT_LOG_BATCH_SIZE = 100
+RESULT_LOG_SUFFIX = ".ndjson"
+
+
+def result_log_path(report_path):
+    return os.path.splitext(str(report_path))[0] + RESULT_LOG_SUFFIX
+
+
+class ResultLog:
+    """
+    Append-only NDJSON sink for test results: one JSON document per line, written in
+    batches so results do not pile up in memory and survive a crashed or killed process.
+    """
+
+    def __init__(self, path, batch_size=RESULT_LOG_BATCH_SIZE):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.pending = []
+        self.count = 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        try:
+            # Each session starts a fresh log
+            self.file = open(self.path, "w", encoding="utf-8")
+        except OSError as e:
+            raise RuntimeError(f"Failed to open result log '{self.path}': {e}") from e
+
+    def append(self, result):
+        if isinstance(result, ResultRecord):
+            result = result.to_dict()
+        self.pending.append(json.dumps(result, separators=(",", ":"), default=str))
+        self.count += 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending or self.file is None:
+            return
+        try:
+            self.file.write("\n".join(self.pending) + "\n")
+            self.file.flush()
+        except OSError as e:
+            raise RuntimeError(f"Failed to write result log '{self.path}': {e}") from e
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def iter_result_lines(path):
+    """
+    Yields (result, byte offset, byte length) for each line of an NDJSON result log, so a
+    result can be read back later with a single seek. A partial last line, left by a
+    process killed mid-write, is skipped.
+    """
+    with open(path, "rb") as f:
+        offset = 0
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line), offset, len(line)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    if not line.endswith(b"\n"):
+                        logger.warning(f"Ignoring truncated last line of result log {path}")
+                        return
+                    raise ValueError(f"Could not parse {path} line {line_number}: {e}") from e
+            offset += len(line)
+
+
+def iter_results(path):
+    for result, _, _ in iter_result_lines(path):
+        yield result
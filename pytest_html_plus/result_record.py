@@ -0,0 +1,158 @@
+import sys
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MISSING = object()
+# One shared tuple per distinct marker combination
+_marker_sets = {}
+
+# Keys in the order of the JSON report; PLAIN_FIELDS are stored in a slot of the same name
+FIELDS = (
+    "test", "nodeid", "status", "duration", "trace", "error", "markers", "file", "line",
+    "stdout", "stderr", "timestamp", "screenshot", "logs", "worker", "links",
+)
+PLAIN_FIELDS = {"test", "status", "duration", "trace", "error", "file", "line", "stdout", "stderr",
+                "screenshot", "worker"}
+OPTIONAL_FIELDS = ("flaky", "flaky_attempts")
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _marker_set(markers):
+    markers = tuple(_intern(marker) for marker in markers or ())
+    return _marker_sets.setdefault(markers, markers)
+
+
+def utc_now_micros():
+    return (datetime.now(timezone.utc) - _EPOCH) // timedelta(microseconds=1)
+
+
+class ResultRecord(Mapping):
+    """
+    Compact in-memory form of one result. Repeated strings (status, worker, file, markers,
+    screenshot folder) are interned, parametrized nodeids share their interned prefix and
+    the timestamp is kept as an integer. It reads like the result dict it replaces and is
+    turned back into one only when written out (see to_dict and json_default).
+    """
+
+    __slots__ = (
+        "test", "_nodeid_prefix", "_nodeid_param", "status", "duration", "trace", "error", "_markers",
+        "file", "line", "stdout", "stderr", "_timestamp", "screenshot", "_logs", "worker", "_links",
+        "_flaky", "_flaky_attempts", "_extra",
+    )
+
+    def __init__(self, test, nodeid, status, duration, trace=None, error=None, markers=None, file=None,
+                 line=None, stdout=None, stderr=None, timestamp=None, screenshot=None, logs=None,
+                 worker=None, links=None):
+        self.test = test
+        self._nodeid_prefix, self._nodeid_param = self._split_nodeid(nodeid)
+        self.status = _intern(status)
+        self.duration = duration
+        self.trace = trace
+        self.error = error
+        self._markers = _marker_set(markers)
+        self.file = _intern(file)
+        self.line = line
+        self.stdout = stdout
+        self.stderr = stderr
+        self._timestamp = utc_now_micros() if timestamp is None else timestamp
+        self.screenshot = _intern(screenshot)
+        self._logs = logs or None
+        self.worker = _intern(worker)
+        self._links = tuple(links) if links is not None else None
+        self._flaky = _MISSING
+        self._flaky_attempts = _MISSING
+        self._extra = None
+
+    @staticmethod
+    def _split_nodeid(nodeid):
+        if not isinstance(nodeid, str):
+            return nodeid, ""
+        prefix, bracket, param = nodeid.partition("[")
+        return sys.intern(prefix), bracket + param
+
+    def _get(self, key):
+        if key in PLAIN_FIELDS:
+            return getattr(self, key)
+        if key == "nodeid":
+            if self._nodeid_param:
+                return self._nodeid_prefix + self._nodeid_param
+            return self._nodeid_prefix
+        if key == "markers":
+            return list(self._markers)
+        if key == "timestamp":
+            timestamp = _EPOCH + timedelta(microseconds=self._timestamp)
+            return timestamp.isoformat().replace("+00:00", "Z")
+        if key == "logs":
+            return self._logs if self._logs is not None else []
+        if key == "links":
+            return list(self._links) if self._links is not None else None
+        if key in OPTIONAL_FIELDS:
+            value = getattr(self, f"_{key}")
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        return self._get(key)
+
+    def __setitem__(self, key, value):
+        if key in PLAIN_FIELDS:
+            setattr(self, key, value)
+        elif key in OPTIONAL_FIELDS:
+            setattr(self, f"_{key}", value)
+        elif key == "nodeid":
+            self._nodeid_prefix, self._nodeid_param = self._split_nodeid(value)
+        elif key == "markers":
+            self._markers = _marker_set(value)
+        elif key == "timestamp":
+            timestamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            self._timestamp = (timestamp - _EPOCH) // timedelta(microseconds=1)
+        elif key == "logs":
+            self._logs = value or None
+        elif key == "links":
+            self._links = tuple(value) if value is not None else None
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __iter__(self):
+        yield from FIELDS
+        for key in OPTIONAL_FIELDS:
+            if getattr(self, f"_{key}") is not _MISSING:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"ResultRecord({self.to_dict()!r})"
+
+    def copy(self):
+        clone = ResultRecord.__new__(ResultRecord)
+        for slot in self.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        if self._extra is not None:
+            clone._extra = dict(self._extra)
+        return clone
+
+    def to_dict(self):
+        return {key: self._get(key) for key in self}
+
+
+def json_default(value):
+    """
+    ``default`` hook for json.dump: serializes ResultRecords one at a time as the encoder
+    reaches them, so a whole plain copy of the results is never built.
+    """
+    if isinstance(value, ResultRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
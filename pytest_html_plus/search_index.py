@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+SEARCH_GRAM_SIZE = 3
+SEARCH_ERROR_CHARS = 500
+
+
+def search_text(test):
+    """
+    Returns the lowercased text a test can be found by: its name, nodeid, markers, links
+    and the start of its error.
+    """
+    parts = [test.get("test") or "", test.get("nodeid") or ""]
+    for key in ("markers", "links"):
+        values = test.get(key)
+        if isinstance(values, list):
+            parts.extend(str(value) for value in values)
+    if test.get("error"):
+        parts.append(str(test["error"])[:SEARCH_ERROR_CHARS])
+    return "\n".join(parts).lower()
+
+
+def build_search_index(results, gram_size=SEARCH_GRAM_SIZE):
+    """
+    Builds a trigram inverted index over the searchable text of each test. Posting lists
+    are delta-encoded test positions; the page intersects them to get candidates and then
+    confirms each candidate against its document.
+    """
+    documents = []
+    postings = defaultdict(list)
+    for position, test in enumerate(results):
+        text = search_text(test)
+        documents.append(text)
+        # dict keeps first-occurrence order, so the index is identical for identical results
+        for gram in dict.fromkeys(text[i:i + gram_size] for i in range(len(text) - gram_size + 1)):
+            postings[gram].append(position)
+
+    grams = {}
+    for gram, positions in postings.items():
+        previous = 0
+        deltas = []
+        for position in positions:
+            deltas.append(position - previous)
+            previous = position
+        grams[gram] = deltas
+    return {"gram_size": gram_size, "documents": documents, "grams": grams}
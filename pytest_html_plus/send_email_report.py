@@ -5,11 +5,12 @@ from pytest_html_plus.utils import zip_report_folder
 
 
 class EmailSender:
-    def __init__(self, config: dict, report_path=None):
+    def __init__(self, config: dict, report_path=None, model=None):
         self.sender = config.get("EMAIL_SENDER") or os.getenv("EMAIL_FROM")
         self.recipient = config.get("EMAIL_RECIPIENT") or os.getenv("EMAIL_TO")
         self.subject = config.get("EMAIL_SUBJECT")
         self.report_path = report_path
+        self.model = model
         self.smtp_server = config.get("SMTP_SERVER") or os.getenv("SMTP_HOST")
         self.smtp_port = int(config.get("SMTP_PORT") or os.getenv("SMTP_PORT", "587"))
         self.password = config.get("EMAIL_PASSWORD") or os.getenv("SMTP_PASSWORD")
@@ -25,12 +26,17 @@ class EmailSender:
         msg.add_attachment(report_data, maintype="application", subtype="zip", filename=filename)
         return filename
 
+    def build_body(self) -> str:
+        if self.model is None:
+            return self.subject
+        return "\n\n".join(part for part in (self.subject, self.model.describe()) if part)
+
     def send(self):
         msg = EmailMessage()
         msg["Subject"] = self.subject
         msg["From"] = self.sender
         msg["To"] = self.recipient
-        msg.set_content(self.subject)
+        msg.set_content(self.build_body())
         self.zip_and_attach(msg)
 
         try:
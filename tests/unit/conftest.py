@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_result():
+    """
+    Factory for a result record with every field the plugin writes.
+    """
+    def factory(name, status="passed", duration=0.1, **extra):
+        result = {
+            "test": name,
+            "nodeid": f"tests/test_mod.py::{name}",
+            "status": status,
+            "duration": duration,
+            "trace": None,
+            "error": None,
+            "markers": [],
+            "file": "tests/test_mod.py",
+            "line": 1,
+            "stdout": "",
+            "stderr": "",
+            "screenshot": None,
+            "logs": [],
+            "worker": "main",
+            "links": [],
+        }
+        result.update(extra)
+        return result
+
+    return factory
+
+
+@pytest.fixture
+def run_plugin(tmp_path):
+    """
+    Runs pytest with the plugin in a fresh interpreter from ``tmp_path``, whether or not the
+    package is installed.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    env.pop("PYTEST_XDIST_WORKER", None)
+
+    def run(*args):
+        command = [sys.executable, "-m", "pytest", "-p", "no:pytest_html_plus", "-p", "pytest_html_plus.plugin",
+                   "-p", "no:cacheprovider", "--should-open-report=never", "-q", *args]
+        return subprocess.run(command, cwd=tmp_path, env=env, capture_output=True, text=True)
+
+    return run
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from pytest_html_plus.artifact_pipeline import ArtifactPipeline, ArtifactPipelineError
+
+
+def test_dependent_stage_runs_after_its_dependency():
+    order = []
+    pipeline = ArtifactPipeline()
+    pipeline.add_stage("html", lambda: order.append("html"))
+    pipeline.add_stage("email", lambda: order.append("email"), depends_on=["html"])
+
+    pipeline.run()
+
+    assert order == ["html", "email"]
+    assert set(pipeline.timings) == {"html", "email"}
+
+
+def test_independent_stages_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    pipeline = ArtifactPipeline(max_workers=2)
+    pipeline.add_stage("html", barrier.wait)
+    pipeline.add_stage("xml", barrier.wait)
+
+    # Both stages must be in flight at the same time for the barrier to release
+    pipeline.run()
+
+
+def test_single_worker_runs_stages_in_order():
+    order = []
+    pipeline = ArtifactPipeline(max_workers=1)
+    pipeline.add_stage("html", lambda: order.append("html"))
+    pipeline.add_stage("xml", lambda: order.append("xml"))
+    pipeline.add_stage("open", lambda: order.append("open"), depends_on=["html"])
+
+    pipeline.run()
+
+    assert order == ["html", "xml", "open"]
+
+
+def test_errors_are_aggregated_and_dependents_skipped():
+    ran = []
+
+    def broken_html():
+        raise RuntimeError("render failed")
+
+    def broken_xml():
+        raise RuntimeError("xml failed")
+
+    pipeline = ArtifactPipeline()
+    pipeline.add_stage("html", broken_html)
+    pipeline.add_stage("xml", broken_xml)
+    pipeline.add_stage("email", lambda: ran.append("email"), depends_on=["html"])
+
+    with pytest.raises(ArtifactPipelineError) as exc_info:
+        pipeline.run()
+
+    assert set(exc_info.value.errors) == {"html", "xml"}
+    assert "render failed" in str(exc_info.value)
+    assert pipeline.skipped == ["email"]
+    assert ran == []
+
+
+def test_unknown_dependency_is_rejected():
+    pipeline = ArtifactPipeline()
+
+    with pytest.raises(ValueError, match="unknown stages: html"):
+        pipeline.add_stage("email", lambda: None, depends_on=["html"])
@@ -5,7 +5,7 @@ import xml.etree.ElementTree as ET
 import pytest
 from pathlib import Path
 
-from pytest_html_plus.json_to_xml_converter import convert_json_to_junit_xml, sanitize_classname
+from pytest_html_plus.json_to_xml_converter import convert_json_to_junit_xml, sanitize_classname, write_junit_xml
 
 
 @pytest.mark.skip(reason="Skipping for test coverage")
@@ -112,4 +112,81 @@ def test_convert_json_to_xml(sample_json_file):
     ("", "default"),                                  # Empty string
 ])
 def test_sanitize_classname(filepath, expected):
-    assert sanitize_classname(filepath) == expected
\ No newline at end of file
+    assert sanitize_classname(filepath) == expected
+
+def test_string_logs_become_one_property(tmp_path):
+    report = tmp_path / "report.json"
+    report.write_text(json.dumps({"results": [
+        {"test": "test_a", "status": "passed", "logs": "INFO first line\nINFO second line\n"},
+    ]}))
+
+    convert_json_to_junit_xml(str(report), str(tmp_path / "report.xml"))
+
+    properties = ET.parse(tmp_path / "report.xml").getroot().find("testcase/properties")
+    assert [(p.attrib["name"], p.attrib["value"]) for p in properties] == [
+        ("log", "INFO first line\nINFO second line\n"),
+    ]
+
+
+def test_suite_attributes_are_counted_while_streaming(tmp_path):
+    results = ({"test": f"test_{i}", "status": status, "duration": 0.5}
+               for i, status in enumerate(["passed", "failed", "skipped", "error", "failed"]))
+    xml_path = tmp_path / "report.xml"
+
+    write_junit_xml(results, str(xml_path))
+
+    root = ET.parse(xml_path).getroot()
+    assert {key: root.attrib[key] for key in ("tests", "failures", "errors", "skipped", "time")} == {
+        "tests": "5", "failures": "2", "errors": "1", "skipped": "1", "time": "2.5",
+    }
+    assert len(root.findall("testcase")) == 5
+
+
+@pytest.mark.parametrize("payload, message", [
+    ([], "expected JSON object"),
+    ({"filters": {}}, "missing 'results'"),
+    ({"results": {}}, "must be a list"),
+])
+def test_invalid_reports_are_rejected(tmp_path, payload, message):
+    report = tmp_path / "report.json"
+    report.write_text(json.dumps(payload))
+
+    with pytest.raises(RuntimeError, match=message):
+        convert_json_to_junit_xml(str(report), str(tmp_path / "report.xml"))
+
+
+def grouped_results():
+    return [
+        {"test": "test_a", "file": "tests/test_a.py", "status": "passed", "duration": 1.0},
+        {"test": "test_b", "file": "tests/test_b.py", "status": "failed", "duration": 0.5},
+        {"test": "test_a2", "file": "tests/test_a.py", "status": "skipped", "duration": 0.25},
+    ]
+
+
+def suite_counts(element):
+    return {key: element.attrib[key] for key in ("name", "tests", "failures", "skipped", "time")}
+
+
+def test_suites_layout_groups_testcases_by_file(tmp_path):
+    xml_path = tmp_path / "report.xml"
+
+    write_junit_xml(grouped_results(), str(xml_path), layout="suites")
+
+    root = ET.parse(xml_path).getroot()
+    assert root.tag == "testsuites"
+    assert suite_counts(root) == {"name": "Test Suite", "tests": "3", "failures": "1", "skipped": "1", "time": "1.75"}
+    assert [suite_counts(suite) for suite in root] == [
+        {"name": "tests.test_a", "tests": "2", "failures": "0", "skipped": "1", "time": "1.25"},
+        {"name": "tests.test_b", "tests": "1", "failures": "1", "skipped": "0", "time": "0.5"},
+    ]
+    assert [case.attrib["name"] for case in root.iter("testcase")] == ["test_a", "test_a2", "test_b"]
+
+
+def test_per_file_layout_writes_one_shard_per_file(tmp_path):
+    write_junit_xml(grouped_results(), str(tmp_path / "report.xml"), layout="per-file")
+
+    shards = sorted(path.name for path in (tmp_path / "report").iterdir())
+    assert shards == ["tests.test_a.xml", "tests.test_b.xml"]
+    suite = ET.parse(tmp_path / "report" / "tests.test_a.xml").getroot()
+    assert suite_counts(suite) == {"name": "tests.test_a", "tests": "2", "failures": "0", "skipped": "1", "time": "1.25"}
+    assert not (tmp_path / "report.xml").exists()
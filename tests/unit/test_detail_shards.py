@@ -0,0 +1,74 @@
+import json
+
+from pytest_html_plus.detail_shards import DetailShardWriter, collect_test_details, shard_filename
+from pytest_html_plus.generate_html_report import JSONReporter
+
+
+def read_shard(path):
+    content = path.read_text(encoding="utf-8")
+    prefix, payload = content.split(", ", 1)
+    return prefix, json.loads(payload.rstrip().rstrip(");"))
+
+
+def test_collect_test_details_keeps_non_empty_sections():
+    test = {
+        "error": "line\nE   AssertionError: boom",
+        "trace": "def test_x():\n>   assert False\nE   AssertionError: boom",
+        "stdout": "printed",
+        "stderr": "",
+        "logs": ["first", None, "second"],
+    }
+
+    details = collect_test_details(test)
+
+    assert details == {
+        "error": "E   AssertionError: boom",
+        "trace": "def test_x():\n>   assert False",
+        "stdout": "printed",
+        "logs": "first\nsecond",
+    }
+
+
+def test_collect_test_details_skips_trace_without_error():
+    assert collect_test_details({"trace": "something", "logs": "  "}) == {}
+
+
+def test_detail_shard_writer_splits_into_fixed_size_shards(tmp_path):
+    writer = DetailShardWriter(str(tmp_path), shard_size=2)
+
+    positions = [writer.add({"stdout": f"out {i}"}) for i in range(5)]
+    writer.flush()
+
+    assert positions == [(0, 0), (0, 1), (1, 0), (1, 1), (2, 0)]
+    prefix, payload = read_shard(tmp_path / "plus_details" / shard_filename(1))
+    assert prefix == "plusDetailsLoaded(1"
+    assert payload == [{"stdout": "out 2"}, {"stdout": "out 3"}]
+
+
+def test_detail_shard_writer_removes_stale_shards(tmp_path):
+    stale = tmp_path / "plus_details" / shard_filename(7)
+    stale.parent.mkdir()
+    stale.write_text("old")
+
+    DetailShardWriter(str(tmp_path))
+
+    assert not stale.exists()
+
+
+def test_lazy_report_keeps_details_out_of_the_page(tmp_path, make_result):
+    reporter = JSONReporter(
+        report_path=str(tmp_path / "final_report.json"),
+        screenshots_dir=str(tmp_path / "screenshots"),
+        output_dir=str(tmp_path / "report_output"),
+        lazy_details=True,
+    )
+    reporter.results = [make_result("test_noisy", stdout="very long captured output")]
+    reporter.filters = {}
+
+    reporter.generate_html_report()
+
+    html = (tmp_path / "report_output" / "report.html").read_text(encoding="utf-8")
+    assert "very long captured output" not in html
+    assert 'data-shard="0" data-position="0"' in html
+    _, payload = read_shard(tmp_path / "report_output" / "plus_details" / shard_filename(0))
+    assert payload == [{"stdout": "very long captured output"}]
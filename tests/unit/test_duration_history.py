@@ -0,0 +1,190 @@
+import heapq
+import json
+import random
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from pytest_html_plus import plugin
+from pytest_html_plus.duration_history import estimate_durations, failed_first_order, load_run_history, lpt_order, \
+    parse_shard, plan_shards
+from pytest_html_plus.history_store import HistoryStore
+
+
+def make_config(tmp_path, report_path):
+    cache = SimpleNamespace(mkdir=lambda name: tmp_path.joinpath("cache", name).mkdir(parents=True, exist_ok=True)
+                            or tmp_path / "cache" / name)
+    options = {"--json-report": str(report_path), "--plus-durations-from": None}
+    return SimpleNamespace(cache=cache, getoption=options.get)
+
+
+def xdist_load_makespan(durations, workers, maxschedchunk=None):
+    """
+    Wall-clock time of pytest-xdist's LoadScheduling over tests in this order: each worker
+    starts with a block of consecutive tests, and is topped up from the front of the pending
+    tests in chunks of at most ``maxschedchunk`` once its queue runs low.
+    """
+    pending = deque(range(len(durations)))
+    chunk_limit = len(durations) if maxschedchunk is None else maxschedchunk
+    queues = [deque() for _ in range(workers)]
+
+    def send(worker, count):
+        for _ in range(min(count, len(pending))):
+            queues[worker].append(pending.popleft())
+
+    if len(pending) < 2 * workers:
+        for index in range(len(pending)):
+            send(index % workers, 1)
+    else:
+        for worker in range(workers):
+            send(worker, max(min(len(durations) // workers // 4, chunk_limit), 2))
+    events = [(durations[queue[0]], worker) for worker, queue in enumerate(queues) if queue]
+    heapq.heapify(events)
+    finish = 0.0
+    while events:
+        now, worker = heapq.heappop(events)
+        finish = now
+        done = queues[worker].popleft()
+        queued = len(queues[worker])
+        low = max(2, len(pending) // workers // 4)
+        high = max(2, len(pending) // workers // 2)
+        # A worker busy with long tests keeps its queue for a while
+        if pending and queued < low and not (durations[done] >= 0.1 and queued >= 2):
+            send(worker, min(high - queued, max(2 - queued, chunk_limit)))
+        if queues[worker]:
+            heapq.heappush(events, (now + durations[queues[worker][0]], worker))
+    return finish
+
+
+def test_unknown_tests_get_the_median_estimate():
+    assert estimate_durations(["a", "b", "c", "d"], {"a": 1.0, "b": 5.0, "c": 2.0}) == [1.0, 5.0, 2.0, 2.0]
+    assert estimate_durations(["a"], {}) == [1.0]
+
+
+def test_lpt_order_balances_workers():
+    random.seed(7)
+    durations = {f"test_{i}": random.expovariate(1.0) * (20 if i % 50 == 0 else 1) for i in range(2000)}
+    items = [SimpleNamespace(nodeid=nodeid) for nodeid in durations]
+
+    ordered = [durations[item.nodeid] for item in lpt_order(items, durations, workers=32)]
+
+    total = sum(durations.values())
+    # The plugin limits xdist to one new test at a time for this order
+    lpt = xdist_load_makespan(ordered, 32, maxschedchunk=1)
+    collection = xdist_load_makespan(list(durations.values()), 32)
+    assert lpt < collection * 0.7
+    # No schedule can beat the average work per worker or the longest single test
+    assert lpt < max(total / 32, max(durations.values())) * 1.05
+    # With xdist's default chunks the first worker would get all the longest tests
+    assert xdist_load_makespan(ordered, 32) > collection
+
+
+def test_lpt_schedule_limits_xdist_to_one_test_at_a_time(monkeypatch):
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+
+    def configure(**options):
+        options = {"--plus-schedule": "lpt", **options}
+        config = SimpleNamespace(option=SimpleNamespace(**{k: v for k, v in options.items() if k.isidentifier()}),
+                                 getoption=lambda name, default=None: options.get(name, default))
+        return plugin.configure_schedule(config), getattr(config.option, "maxschedchunk", None)
+
+    assert configure(dist="load", maxschedchunk=None) == ("lpt", 1)
+    assert configure(dist="load", maxschedchunk=4) == ("lpt", 4)
+    assert configure(dist="worksteal") == ("collection", None)
+    assert configure() == ("lpt", None)
+
+
+def test_lpt_order_keeps_collection_order_for_ties():
+    items = [SimpleNamespace(nodeid=nodeid) for nodeid in ("a", "b", "c", "d")]
+
+    assert [item.nodeid for item in lpt_order(items, {"c": 3.0, "d": 1.0})] == ["c", "a", "b", "d"]
+
+
+def test_durations_come_from_history_or_previous_report(tmp_path):
+    report_path = tmp_path / "final_report.json"
+    report_path.write_text(json.dumps({"results": [
+        {"nodeid": "test_a", "status": "failed", "duration": 2.5},
+        {"nodeid": "test_c", "status": "passed", "flaky": True, "duration": 0.5},
+        {"nodeid": "test_d", "status": "passed", "duration": 0.5},
+    ]}))
+    config = make_config(tmp_path, report_path)
+
+    assert load_run_history(config) == ({"test_a": 2.5, "test_c": 0.5, "test_d": 0.5}, {"test_a", "test_c"})
+
+    store = HistoryStore(str(tmp_path / "cache" / "pytest_html_plus" / "history.sqlite"))
+    for status, duration in (("passed", 1.0), ("passed", 3.0), ("error", 2.0)):
+        store.record_run([{"nodeid": "test_b", "status": status, "duration": duration}])
+    store.close()
+
+    assert load_run_history(config) == ({"test_b": 2.0}, {"test_b"})
+
+
+@pytest.mark.parametrize("value, expected", [("1/4", (1, 4)), ("4/4", (4, 4))])
+def test_parse_shard(value, expected):
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "2", "a/b", "1/0"])
+def test_parse_shard_rejects_bad_specs(value):
+    with pytest.raises(ValueError):
+        parse_shard(value)
+
+
+def test_shard_plan_is_balanced_and_deterministic():
+    random.seed(11)
+    durations = {f"test_{i}": random.expovariate(1.0) for i in range(3000)}
+    durations.update({f"test_slow_{i}": 30.0 for i in range(8)})
+    nodeids = list(durations)
+
+    assignment, expected = plan_shards(nodeids, durations, 4)
+
+    shuffled = random.sample(nodeids, len(nodeids))
+    reordered, _ = plan_shards(shuffled, durations, 4)
+    assert dict(zip(nodeids, assignment)) == dict(zip(shuffled, reordered))
+    assert [sum(1 for node in nodeids[-8:] if assignment[nodeids.index(node)] == shard) for shard in range(4)] == [2] * 4
+    assert max(expected) - min(expected) < 0.5
+    assert sum(expected) == pytest.approx(sum(durations.values()))
+
+
+def test_select_shard_deselects_other_shards(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+    deselected = []
+    config = SimpleNamespace(hook=SimpleNamespace(pytest_deselected=lambda items: deselected.extend(items)),
+                             getoption={"--plus-durations-from": "previous/final_report.json"}.get)
+    durations = {"a": 4.0, "b": 3.0, "c": 2.0, "d": 1.0}
+    items = [SimpleNamespace(nodeid=nodeid) for nodeid in "abcd"]
+
+    plugin.select_shard(config, items, durations, (2, 2))
+
+    assert [item.nodeid for item in items] == ["b", "c"]
+    assert [item.nodeid for item in deselected] == ["a", "d"]
+    plan = json.loads((tmp_path / "plus_metadata.json").read_text())["shard_plan"]
+    assert plan == {"shard": 2, "shards": 2, "tests": 2, "collected": 4, "known_durations": 4,
+                    "expected_duration": 5.0, "expected_durations": [5.0, 5.0]}
+
+
+def test_every_test_runs_in_exactly_one_shard(tmp_path, run_plugin):
+    # Shards run one after another in the same tree, each rewriting the local report
+    tests = "".join(f"def test_{i}():\n    time.sleep({i % 4} * 0.02)\n\n\n" for i in range(12))
+    (tmp_path / "test_suite.py").write_text("import time\n\n\n" + tests)
+    assert run_plugin("test_suite.py").returncode == 0
+
+    ran = []
+    for shard in ("1/3", "2/3", "3/3"):
+        assert run_plugin("test_suite.py", f"--plus-shard={shard}").returncode == 0
+        report = json.loads((tmp_path / "final_report.json").read_text())
+        ran.extend(test["nodeid"] for test in report["results"])
+
+    assert sorted(ran) == sorted(f"test_suite.py::test_{i}" for i in range(12))
+
+
+def test_failed_first_order_runs_last_failures_then_fastest():
+    items = [SimpleNamespace(nodeid=nodeid) for nodeid in ("slow", "fast", "failed_slow", "new", "flaky_fast")]
+    durations = {"slow": 30.0, "fast": 0.1, "failed_slow": 20.0, "flaky_fast": 1.0}
+
+    ordered = failed_first_order(items, durations, {"failed_slow", "flaky_fast"})
+
+    # "new" has no history and is estimated at the median duration (10.5s)
+    assert [item.nodeid for item in ordered] == ["flaky_fast", "failed_slow", "fast", "new", "slow"]
@@ -0,0 +1,36 @@
+from pytest_html_plus.compute_filter_counts import compute_filter_index
+
+
+results = [
+    {"test": "test_a", "status": "passed", "duration": 0.2, "links": ["JIRA-1"], "markers": ["smoke"]},
+    {"test": "test_b", "status": "failed", "duration": 1.5, "flaky": True, "links": [], "markers": ["smoke", "slow"]},
+    {"test": "test_c", "status": "error", "duration": 0.7, "links": [], "markers": []},
+    {"test": "test_d", "status": "skipped", "duration": None, "links": [], "markers": None},
+]
+
+
+def test_filter_index_has_one_column_entry_per_test():
+    index = compute_filter_index(results)
+
+    assert index["status"] == [0, 1, 2, 3]
+    assert index["duration"] == [0.2, 1.5, 0.7, 0]
+    assert index["flaky"] == [0, 1, 0, 0]
+    assert index["linked"] == [1, 0, 0, 0]
+    assert index["by_duration"] == [1, 2, 0, 3]
+
+
+def test_filter_index_packs_markers_into_bitsets():
+    index = compute_filter_index(results)
+
+    assert index["marker_names"] == ["slow", "smoke"]
+    assert index["marker_words"] == 1
+    assert index["marker_bits"] == [0b10, 0b11, 0, 0]
+
+
+def test_filter_index_uses_several_words_for_many_markers():
+    tests = [{"test": "test_a", "status": "passed", "markers": [f"m{i:02d}" for i in range(40)]}]
+
+    index = compute_filter_index(tests)
+
+    assert index["marker_words"] == 2
+    assert index["marker_bits"] == [0xFFFFFFFF, 0xFF]
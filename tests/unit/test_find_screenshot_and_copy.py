@@ -35,3 +35,58 @@ def test_find_screenshot_and_copy(tmp_path):
 
     assert rel_path.replace("\\", "/") == f"screenshots/{file_name}"
     assert (output_dir / "screenshots" / file_name).exists()
+
+
+def test_screenshot_index_matches_exact_test_name(tmp_path):
+    from pytest_html_plus.generate_html_report import JSONReporter
+
+    screenshots_dir = tmp_path / "screenshots_src"
+    screenshots_dir.mkdir()
+    (screenshots_dir / "test_ab_failure.png").write_text("ab")
+    (screenshots_dir / "test_a_failure.png").write_text("a")
+
+    reporter = JSONReporter(screenshots_dir=str(screenshots_dir), output_dir=str(tmp_path / "output"))
+
+    assert reporter.find_screenshot_and_copy("test_a").replace("\\", "/") == "screenshots/test_a_failure.png"
+    assert reporter.find_screenshot_and_copy("test_ab").replace("\\", "/") == "screenshots/test_ab_failure.png"
+    assert reporter.find_screenshot_and_copy("test_abc") is None
+
+
+def test_screenshot_index_walks_directory_once(tmp_path, monkeypatch):
+    from pytest_html_plus import generate_html_report
+    from pytest_html_plus.generate_html_report import JSONReporter
+
+    screenshots_dir = tmp_path / "screenshots_src"
+    (screenshots_dir / "nested").mkdir(parents=True)
+    (screenshots_dir / "nested" / "test_one_failure.png").write_text("1")
+    (screenshots_dir / "test_two_failure.png").write_text("2")
+
+    walks = []
+    real_walk = os.walk
+
+    def counting_walk(path):
+        walks.append(path)
+        return real_walk(path)
+
+    monkeypatch.setattr(generate_html_report.os, "walk", counting_walk)
+
+    reporter = JSONReporter(screenshots_dir=str(screenshots_dir), output_dir=str(tmp_path / "output"))
+    for name in ("test_one", "test_two", "test_three"):
+        reporter.find_screenshot_and_copy(name)
+
+    assert len(walks) == 1
+    assert (tmp_path / "output" / "screenshots" / "test_one_failure.png").exists()
+
+
+def test_screenshot_recorded_on_result_is_used(tmp_path):
+    from pytest_html_plus.generate_html_report import JSONReporter
+
+    recorded = tmp_path / "elsewhere" / "custom_name.png"
+    recorded.parent.mkdir()
+    recorded.write_text("img")
+
+    reporter = JSONReporter(screenshots_dir=str(tmp_path / "missing"), output_dir=str(tmp_path / "output"))
+    rel_path = reporter.find_screenshot_and_copy("test_x", screenshot=str(recorded))
+
+    assert rel_path.replace("\\", "/") == "screenshots/custom_name.png"
+    assert (tmp_path / "output" / "screenshots" / "custom_name.png").exists()
@@ -0,0 +1,151 @@
+from pytest_html_plus.generate_html_report import JSONReporter
+
+
+def make_reporter(tmp_path, results):
+    reporter = JSONReporter(
+        report_path=str(tmp_path / "final_report.json"),
+        screenshots_dir=str(tmp_path / "screenshots"),
+        output_dir=str(tmp_path / "report_output"),
+    )
+    reporter.results = results
+    reporter.filters = {}
+    reporter.metadata = {}
+    return reporter
+
+
+def test_compute_summary_single_pass(make_result):
+    reporter = JSONReporter()
+    reporter.results = [
+        make_result("test_a", duration=0.5),
+        make_result("test_b", status="failed", duration=2.0),
+        make_result("test_c", status="error", duration=1.0),
+    ]
+
+    summary = reporter.compute_summary()
+
+    assert summary["total"] == 3
+    assert summary["failed"] == 1
+    assert summary["error"] == 1
+    assert summary["slowest_name"] == "test_b"
+    assert summary["slowest_duration"] == 2.0
+
+
+def test_generate_html_report_streams_every_card(tmp_path, make_result):
+    results = [make_result(f"test_{i}", status="failed" if i == 3 else "passed") for i in range(50)]
+    reporter = make_reporter(tmp_path, results)
+
+    reporter.generate_html_report()
+
+    html = (tmp_path / "report_output" / "report.html").read_text(encoding="utf-8")
+    assert html.count('<div class="test test-card" data-name=') == 50
+    assert html.count('<div id="tests-container">') == 1
+    assert html.index("Total tests: 50, Failures: 1, Errors: 0.") < html.index('<div id="tests-container">')
+    assert html.index('<script type="application/json" id="plus-index">') > html.index('<div id="tests-container">')
+    assert html.rstrip().endswith("</script></body></html>")
+
+
+def test_render_html_report_uses_in_memory_results(tmp_path, make_result):
+    from pytest_html_plus.generate_html_report import render_html_report
+    from pytest_html_plus.report_model import ReportModel
+
+    model = ReportModel(
+        [make_result("test_in_memory", status="failed")],
+        report_path=str(tmp_path / "never_written.json"),
+    )
+    render_html_report(
+        model,
+        screenshots_dir=str(tmp_path / "screenshots"),
+        output_dir=str(tmp_path / "report_output"),
+    )
+
+    html = (tmp_path / "report_output" / "report.html").read_text(encoding="utf-8")
+    assert "test_in_memory" in html
+    assert "Show only failed tests (<span>1</span>)" in html
+
+
+def test_virtual_list_embeds_rows_instead_of_cards(tmp_path, make_result):
+    import json
+    import re
+
+    results = [
+        make_result("test_a", status="failed", stdout="</script><b>out</b>"),
+        make_result("test_b", links=["https://example.com/T-1"], markers=["smoke"]),
+    ]
+    reporter = make_reporter(tmp_path, results)
+    reporter.virtual_list = True
+
+    reporter.generate_html_report()
+
+    html = (tmp_path / "report_output" / "report.html").read_text(encoding="utf-8")
+    assert '<div class="test test-card" data-name=' not in html
+    assert '<div id="tests-container" class="virtual-list"></div>' in html
+    payload = re.search(r'<script type="application/json" id="plus-rows">(.*?)</script>', html, re.S).group(1)
+    rows = json.loads(payload)
+    assert [row["name"] for row in rows] == ["test_a", "test_b"]
+    assert rows[0]["details"] == {"stdout": "</script><b>out</b>"}
+    assert rows[1]["links"] == ["https://example.com/T-1"]
+    assert rows[1]["markers"] == ["smoke"]
+
+
+def test_virtual_list_with_lazy_details_references_shards(tmp_path, make_result):
+    import json
+    import re
+
+    reporter = make_reporter(tmp_path, [make_result("test_a", stdout="captured")])
+    reporter.virtual_list = True
+    reporter.lazy_details = True
+
+    reporter.generate_html_report()
+
+    html = (tmp_path / "report_output" / "report.html").read_text(encoding="utf-8")
+    rows = json.loads(re.search(r'id="plus-rows">(.*?)</script>', html, re.S).group(1))
+    assert rows[0]["shard"] == 0
+    assert rows[0]["position"] == 0
+    assert "details" not in rows[0]
+    assert (tmp_path / "report_output" / "plus_details" / "details_00000.js").exists()
+
+
+def test_compact_report_drops_copy_payloads_and_escapes_text(tmp_path, make_result):
+    results = [
+        make_result(f"test_{i}", status="failed", stdout="<b>captured</b> output\n" * 50,
+                    error="E   AssertionError: boom", trace="trace line")
+        for i in range(20)
+    ]
+    default_reporter = make_reporter(tmp_path / "default", results)
+    default_reporter.generate_html_report()
+    compact_reporter = make_reporter(tmp_path / "compact", results)
+    compact_reporter.compact = True
+    compact_reporter.generate_html_report()
+
+    default_html = (tmp_path / "default" / "report_output" / "report.html").read_text(encoding="utf-8")
+    compact_html = (tmp_path / "compact" / "report_output" / "report.html").read_text(encoding="utf-8")
+    assert "copyFromBase64('" not in compact_html
+    assert compact_html.count('<symbol id="copy-icon"') == 1
+    assert "&lt;b&gt;captured&lt;/b&gt; output" in compact_html
+    assert 'id="plus-metadata"' in compact_html
+    assert compact_html.count('<div class="test test-card" data-name=') == 20
+
+    def cards(html):
+        return html[html.index('<div id="tests-container">'):html.index('id="plus-index"')]
+
+    assert len(cards(compact_html)) < len(cards(default_html)) * 0.6
+
+
+def test_external_assets_are_content_hashed_and_linked(tmp_path, make_result):
+    from pytest_html_plus.generate_html_report import REPORT_CSS, report_asset_filename
+
+    shared = tmp_path / "assets"
+    for run in ("run1", "run2"):
+        reporter = make_reporter(tmp_path / run, [make_result("test_a")])
+        reporter.assets = "external"
+        reporter.assets_dir = str(shared)
+        reporter.generate_html_report()
+
+    css_name = report_asset_filename("css")
+    js_name = report_asset_filename("js")
+    assert sorted(path.name for path in shared.iterdir()) == sorted([css_name, js_name])
+    assert (shared / css_name).read_text(encoding="utf-8") == REPORT_CSS
+    html = (tmp_path / "run2" / "report_output" / "report.html").read_text(encoding="utf-8")
+    assert f'<link rel="stylesheet" href="../../assets/{css_name}" />' in html
+    assert f'<script src="../../assets/{js_name}"></script>' in html
+    assert "<style>" not in html
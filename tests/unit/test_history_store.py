@@ -0,0 +1,143 @@
+import json
+import sqlite3
+
+from pytest_html_plus.compute_filter_counts import compute_filter_count
+from pytest_html_plus.generate_html_report import JSONReporter
+from pytest_html_plus.history_store import HistoryStore
+from pytest_html_plus.report_model import ReportModel
+
+
+def run(*statuses):
+    return [{"nodeid": f"test_{i}", "status": status, "duration": 0.1} for i, status in enumerate(statuses)]
+
+
+def test_flake_rates_cover_the_last_builds(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    store.record_run(run("failed", "passed", "failed", "passed"))
+    store.record_run(run("passed", "passed", "failed", "passed"))
+    store.record_run(run("passed", "passed", "failed", "passed") + [
+        {"nodeid": "test_4", "status": "passed", "flaky": True},
+    ])
+
+    # test_0 flipped, test_2 always fails, test_4 flaked within a run
+    assert store.flake_rates(3) == {"test_0": (1, 3), "test_4": (1, 1)}
+    assert store.flake_rates(2) == {"test_4": (1, 1)}
+    store.close()
+
+
+def test_results_without_a_nodeid_are_skipped(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    store.record_run([
+        {"status": "error"},
+        {"test": "test_named", "status": "passed"},
+        {"nodeid": "test_0", "status": "failed"},
+    ])
+    store.record_run(run("passed"))
+
+    assert store.flake_rates(2) == {"test_0": (1, 2)}
+    assert store.connection.execute("SELECT COUNT(*) FROM results").fetchone() == (3,)
+    store.close()
+
+
+def test_history_counts_reach_the_json_report(tmp_path, run_plugin):
+    # Fails on the first run only, so the second run finds it flaky across runs
+    (tmp_path / "test_suite.py").write_text(
+        "import os\n\n\n"
+        "def test_flips():\n"
+        "    if not os.path.exists('ran'):\n"
+        "        open('ran', 'w').close()\n"
+        "        assert False\n\n\n"
+        "def test_steady():\n"
+        "    pass\n"
+    )
+    run_plugin("test_suite.py", "--detect-flake=5")
+    run_plugin("test_suite.py", "--detect-flake=5")
+
+    report = json.loads((tmp_path / "final_report.json").read_text())
+    assert report["filters"]["history_flaky"] == 1
+
+
+def test_retention_prunes_old_runs(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    store = HistoryStore(path, retention=2)
+    for _ in range(5):
+        store.record_run(run("passed", "failed"))
+    store.close()
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("SELECT COUNT(*) FROM runs").fetchone() == (2,)
+    assert connection.execute("SELECT COUNT(DISTINCT run_id) FROM results").fetchone() == (2,)
+    plan = " ".join(row[-1] for row in connection.execute(
+        "EXPLAIN QUERY PLAN SELECT nodeid FROM results WHERE run_id >= 4"
+    ))
+    assert "results_by_run" in plan
+    connection.close()
+
+
+def test_report_shows_history_badge_and_filter_count(tmp_path):
+    results = [
+        {"test": "test_a", "nodeid": "t.py::test_a", "status": "passed", "duration": 0.1, "worker": "main", "links": []},
+        {"test": "test_b", "nodeid": "t.py::test_b", "status": "passed", "duration": 0.1, "worker": "main", "links": []},
+    ]
+    model = ReportModel(results, report_path=str(tmp_path / "final_report.json"))
+    model.set_flake_history({"t.py::test_b": (3, 10)})
+    reporter = JSONReporter(output_dir=str(tmp_path))
+    reporter.use_model(model)
+
+    assert model.filters["history_flaky"] == 1
+    assert "FLAKE 3/10" not in reporter.render_test_card(results[0])
+    assert "FLAKE 3/10" in reporter.render_test_card(results[1])
+    assert 'id="historyFlakyOnlyCheckbox"' in reporter.render_history_filter()
+
+
+def test_duration_regressions_against_rolling_baseline(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    for duration in (1.0, 1.1, 0.9, 1.0, 1.05, 0.95):
+        store.record_run([
+            {"nodeid": "test_steady", "status": "passed", "duration": duration},
+            {"nodeid": "test_slow", "status": "passed", "duration": duration},
+        ], track_durations=True)
+    store.record_run([
+        {"nodeid": "test_steady", "status": "passed", "duration": 1.1},
+        {"nodeid": "test_slow", "status": "passed", "duration": 3.2},
+    ], track_durations=True)
+
+    regressions = store.duration_regressions()
+    assert list(regressions) == ["test_slow"]
+    assert regressions["test_slow"] == {"median": 1.0, "p90": 1.1, "samples": 6}
+    store.close()
+
+
+def test_regressions_are_counted_and_badged(tmp_path):
+    results = [
+        {"test": "test_a", "nodeid": "t.py::test_a", "status": "passed", "duration": 3.0, "worker": "main", "links": []},
+        {"test": "test_b", "nodeid": "t.py::test_b", "status": "passed", "duration": 1.0, "worker": "main", "links": []},
+    ]
+    model = ReportModel(results, report_path=str(tmp_path / "final_report.json"))
+    model.set_duration_regressions({"t.py::test_a": {"median": 1.0, "p90": 1.2, "samples": 10}})
+    reporter = JSONReporter(output_dir=str(tmp_path), compact=True)
+    reporter.use_model(model)
+
+    assert model.filters["regressed"] == 1
+    assert compute_filter_count(results)["regressed"] == 1
+    assert "SLOWER 3.0×" in reporter.render_test_card(results[0])
+    assert "SLOWER" not in reporter.render_test_card(results[1])
+
+
+def test_regressions_reach_the_json_report(tmp_path, run_plugin):
+    # Without the cache plugin the history lives where the cache directory would be
+    history = tmp_path / ".pytest_cache" / "d" / "pytest_html_plus" / "history.sqlite"
+    history.parent.mkdir(parents=True)
+    store = HistoryStore(str(history))
+    for _ in range(6):
+        store.record_run([{"nodeid": "test_suite.py::test_slow", "status": "passed", "duration": 0.001}],
+                         track_durations=True)
+    store.close()
+    (tmp_path / "test_suite.py").write_text("import time\n\n\ndef test_slow():\n    time.sleep(0.3)\n")
+
+    run_plugin("test_suite.py", "--plus-duration-regressions")
+
+    report = json.loads((tmp_path / "final_report.json").read_text())
+    assert report["filters"]["regressed"] == 1
+    assert report["results"][0]["duration_regression"]["samples"] == 6
+    assert compute_filter_count(report["results"])["regressed"] == 1
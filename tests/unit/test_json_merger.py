@@ -119,3 +119,120 @@ def test_compute_filter_count_error_non_flaky():
     assert filters["total"] == 1
     assert filters["marker_counts"]["setup"] == 1
 
+
+
+def test_merge_keeps_first_seen_order_with_final_attempt(tmp_path):
+    (tmp_path / "a_gw0.json").write_text(json.dumps({"filters": {}, "results": [
+        {"nodeid": "test_1", "status": "failed", "stdout": "first"},
+        {"nodeid": "test_2", "status": "passed", "stdout": "ünïcode"},
+    ]}, ensure_ascii=False, indent=2).replace("\n", "\r\n"), encoding="utf-8")
+    (tmp_path / "b_gw1.json").write_text(json.dumps([
+        {"nodeid": "test_1", "status": "passed", "stdout": "second"},
+    ]))
+    output = tmp_path / "merged.json"
+
+    filters = merge_json_reports(directory=str(tmp_path), output_path=str(output))
+
+    data = json.loads(output.read_text())
+    assert [(t["nodeid"], t["stdout"], t["flaky"]) for t in data["results"]] == [
+        ("test_1", "second", True),
+        ("test_2", "ünïcode", False),
+    ]
+    assert data["results"][0]["flaky_attempts"] == ["failed", "passed"]
+    assert data["filters"] == filters
+
+
+def test_json_report_records_are_read_with_their_offsets(tmp_path):
+    from pytest_html_plus.json_merge import iter_json_report_records, read_record
+
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps({"filters": {"total": 2}, "results": [{"nodeid": "é"}, {"nodeid": "b"}]}),
+                    encoding="utf-8")
+
+    records = list(iter_json_report_records(path))
+
+    assert [record["nodeid"] for record, _, _ in records] == ["é", "b"]
+    with open(path, "rb") as f:
+        assert [read_record(f, offset, length) for _, offset, length in records] == [{"nodeid": "é"}, {"nodeid": "b"}]
+
+
+def test_parallel_merge_matches_sequential_merge(tmp_path):
+    workers_dir = tmp_path / "workers"
+    workers_dir.mkdir()
+    for worker in range(3):
+        results = [
+            {"nodeid": f"test_{i}", "status": "failed" if (i + worker) % 3 == 0 else "passed", "links": []}
+            for i in range(worker, worker + 5)
+        ]
+        (workers_dir / f"final_report_gw{worker}.json").write_text(json.dumps({"results": results}))
+
+    merge_json_reports(directory=str(workers_dir), output_path=str(tmp_path / "sequential.json"), workers=1)
+    merge_json_reports(directory=str(workers_dir), output_path=str(tmp_path / "parallel.json"), workers=3)
+
+    assert (tmp_path / "parallel.json").read_text() == (tmp_path / "sequential.json").read_text()
+
+
+def test_json_stream_offsets_survive_buffer_refills(tmp_path):
+    import io
+
+    from pytest_html_plus.json_merge import JSONStream
+
+    class TrickleReader(io.StringIO):
+        # Hands out a few characters per read, so values straddle many refills
+        def read(self, size=-1):
+            return super().read(7)
+
+    records = [{"nodeid": f"tests/test_é.py::test_{i}", "logs": ["ü" * i], "duration": i / 10} for i in range(40)]
+    text = json.dumps(records, ensure_ascii=False)
+
+    items = list(JSONStream(TrickleReader(text)).array_items())
+
+    data = text.encode("utf-8")
+    assert [record for record, _, _ in items] == records
+    assert [json.loads(data[offset:offset + length]) for _, offset, length in items] == records
+
+
+def test_scanning_a_report_scales_like_json_load(tmp_path):
+    import time
+
+    from pytest_html_plus.json_merge import scan_report_file
+
+    # Many small records; scanning must not copy the read buffer once per record
+    path = tmp_path / "final_report.json"
+    results = [{"nodeid": f"tests/test_a.py::test_{i}", "status": "passed", "logs": ["x" * 40], "markers": []}
+               for i in range(60000)]
+    path.write_text(json.dumps({"results": results}), encoding="utf-8")
+
+    def best_of_three(function):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def load():
+        with open(path, encoding="utf-8") as f:
+            json.load(f)
+
+    assert len(scan_report_file(str(path))) == len(results)
+    assert best_of_three(lambda: scan_report_file(str(path))) < 4 * best_of_three(load)
+
+
+def test_parallel_scan_does_not_fork(tmp_path, monkeypatch):
+    from pytest_html_plus import json_merge
+
+    start_methods = []
+
+    class RecordingExecutor(json_merge.ProcessPoolExecutor):
+        def __init__(self, *args, mp_context=None, **kwargs):
+            start_methods.append(mp_context.get_start_method() if mp_context else None)
+            super().__init__(*args, mp_context=mp_context, **kwargs)
+
+    monkeypatch.setattr(json_merge, "ProcessPoolExecutor", RecordingExecutor)
+    for worker in range(2):
+        (tmp_path / f"final_report_gw{worker}.json").write_text(json.dumps([{"nodeid": f"test_{worker}"}]))
+
+    merge_json_reports(directory=str(tmp_path), output_path=str(tmp_path / "merged.out"), workers=2)
+
+    assert start_methods == ["spawn"]
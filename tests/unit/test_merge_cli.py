@@ -0,0 +1,77 @@
+import gzip
+import json
+
+from pytest_html_plus.json_merge import merge_report_files
+from pytest_html_plus.merge_cli import main, merge_shard_reports
+
+
+def write_shard(directory, results, metadata=None, compress=False):
+    directory.mkdir(parents=True)
+    payload = json.dumps({"filters": {}, "results": results}).encode("utf-8")
+    if compress:
+        (directory / "final_report.json.gz").write_bytes(gzip.compress(payload))
+    else:
+        (directory / "final_report.json").write_bytes(payload)
+    if metadata:
+        (directory / "plus_metadata.json").write_text(json.dumps(metadata))
+
+
+def test_merges_gzipped_shards_from_a_glob(tmp_path):
+    write_shard(tmp_path / "shard1", [
+        {"nodeid": "test_a", "status": "passed", "flaky": True, "flaky_attempts": ["failed", "passed"], "links": []},
+        {"nodeid": "test_b", "status": "failed", "links": []},
+    ], compress=True)
+    write_shard(tmp_path / "shard2", [
+        {"nodeid": "test_b", "status": "passed", "links": ["JIRA-1"]},
+        {"nodeid": "test_c", "status": "skipped", "links": []},
+    ])
+
+    filters = merge_shard_reports([str(tmp_path / "shard*" / "final_report.json*")],
+                                  output_path=str(tmp_path / "merged.json"))
+
+    report = json.loads((tmp_path / "merged.json").read_text())
+    assert [(r["nodeid"], r["status"], r["flaky_attempts"]) for r in report["results"]] == [
+        ("test_a", "passed", ["failed", "passed"]),
+        ("test_b", "passed", ["failed", "passed"]),
+        ("test_c", "skipped", ["skipped"]),
+    ]
+    assert report["filters"] == filters
+    assert (filters["total"], filters["flaky"], filters["skipped"], filters["untracked"]) == (3, 2, 1, 2)
+
+
+def test_merges_screenshots_and_metadata(tmp_path):
+    write_shard(tmp_path / "shard1", [{"nodeid": "test_a", "status": "failed",
+                                       "screenshot": "/ci/job1/screenshots/test_a_plus.png"}],
+                metadata={"branch": "main", "environment": "qa", "generated_at": "2024-05-01T10:00:00"})
+    write_shard(tmp_path / "shard2", [{"nodeid": "test_b", "status": "passed"}],
+                metadata={"branch": "main", "environment": "staging", "generated_at": "2024-05-01T10:05:00"})
+    (tmp_path / "shard1" / "screenshots").mkdir()
+    (tmp_path / "shard1" / "screenshots" / "test_a_plus.png").write_bytes(b"png")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    main([str(tmp_path / "shard1" / "final_report.json"), str(tmp_path / "shard2" / "final_report.json"),
+          "--output", str(out / "final_report.json"),
+          "--screenshots", str(tmp_path / "shard1" / "screenshots"),
+          "--screenshots-output", str(out / "screenshots")])
+
+    report = json.loads((out / "final_report.json").read_text())
+    assert report["results"][0]["screenshot"] == str(out / "screenshots" / "test_a_plus.png")
+    assert (out / "screenshots" / "test_a_plus.png").read_bytes() == b"png"
+    assert json.loads((out / "plus_metadata.json").read_text()) == {
+        "branch": "main", "environment": "qa, staging", "generated_at": "2024-05-01T10:05:00", "shards": 2,
+    }
+
+
+def test_merge_keeps_few_files_open(tmp_path):
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"shard{index}.json"
+        path.write_text(json.dumps({"results": [{"nodeid": f"test_{index % 2}", "status": "passed", "shard": index},
+                                                {"nodeid": f"only_{index}", "status": "passed"}]}))
+        paths.append(str(path))
+
+    merge_report_files(paths, str(tmp_path / "limited.json"), max_open_files=1)
+    merge_report_files(paths, str(tmp_path / "unlimited.json"))
+
+    assert (tmp_path / "limited.json").read_text() == (tmp_path / "unlimited.json").read_text()
@@ -0,0 +1,55 @@
+import json
+
+from pytest_html_plus.report_model import ReportModel, summarize_results
+from pytest_html_plus.send_email_report import EmailSender
+
+
+results = [
+    {"test": "test_a", "nodeid": "t.py::test_a", "status": "passed", "duration": 0.2, "links": [], "markers": []},
+    {"test": "test_b", "nodeid": "t.py::test_b", "status": "failed", "duration": 1.5, "links": [], "markers": []},
+    {"test": "test_c", "nodeid": "t.py::test_c", "status": "skipped", "duration": 0.0, "links": [], "markers": []},
+    {"test": "test_d", "nodeid": "t.py::test_d", "status": "passed", "duration": 0.3, "flaky": True, "links": [], "markers": []},
+]
+
+
+def test_summarize_results_counts_every_status():
+    summary = summarize_results(results)
+
+    assert summary["total"] == 4
+    assert summary["passed"] == 2
+    assert summary["failed"] == 1
+    assert summary["skipped"] == 1
+    assert summary["error"] == 0
+    assert summary["flaky"] == 1
+    assert summary["slowest_name"] == "test_b"
+    assert summary["has_failures"] is True
+
+
+def test_summarize_results_without_failures():
+    summary = summarize_results(results[:1])
+
+    assert summary["has_failures"] is False
+    assert summary["slowest_duration"] == 0.2
+
+
+def test_report_model_from_json_loads_metadata(tmp_path):
+    report_path = tmp_path / "final_report.json"
+    report_path.write_text(json.dumps({"results": results}))
+    (tmp_path / "plus_metadata.json").write_text(json.dumps({"branch": "main"}))
+
+    model = ReportModel.from_json(str(report_path))
+
+    assert model.results == results
+    assert model.filters["failed"] == 1
+    assert model.metadata == {"branch": "main"}
+    assert model.has_failures
+
+
+def test_email_body_includes_model_summary():
+    config = {"EMAIL_SUBJECT": "Nightly run", "SMTP_SERVER": "smtp.example.com"}
+    sender = EmailSender(config, report_path="/fake/path", model=ReportModel(results))
+
+    body = sender.build_body()
+
+    assert body.startswith("Nightly run")
+    assert "Total tests: 4, Passed: 2, Failures: 1, Errors: 0, Skipped: 1, Flaky: 1." in body
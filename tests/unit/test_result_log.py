@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from pytest_html_plus.generate_html_report import JSONReporter
+from pytest_html_plus.json_merge import merge_json_reports
+from pytest_html_plus.result_log import RESULT_LOG_SUFFIX, ResultLog, iter_results, result_log_path
+
+
+def test_result_log_flushes_in_batches(tmp_path):
+    log = ResultLog(tmp_path / "final_report.ndjson", batch_size=2)
+
+    log.append({"nodeid": "test_1", "status": "passed"})
+    assert (tmp_path / "final_report.ndjson").read_text() == ""
+
+    log.append({"nodeid": "test_2", "status": "failed"})
+    log.append({"nodeid": "test_3", "status": "passed"})
+    assert len((tmp_path / "final_report.ndjson").read_text().splitlines()) == 2
+
+    log.close()
+    assert [r["nodeid"] for r in iter_results(tmp_path / "final_report.ndjson")] == ["test_1", "test_2", "test_3"]
+
+
+def test_iter_results_skips_a_truncated_last_line(tmp_path):
+    path = tmp_path / "worker.ndjson"
+    path.write_text('{"nodeid": "test_1"}\n{"nodeid": "te')
+
+    assert [r["nodeid"] for r in iter_results(path)] == ["test_1"]
+
+
+def test_iter_results_rejects_corrupt_lines(tmp_path):
+    path = tmp_path / "worker.ndjson"
+    path.write_text('{"nodeid": "test_1"}\nnot json\n{"nodeid": "test_2"}\n')
+
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_results(path))
+
+
+def test_reporter_streams_results_to_the_log(tmp_path):
+    log = ResultLog(result_log_path(tmp_path / "final_report.json"))
+    reporter = JSONReporter(report_path=str(tmp_path / "final_report.json"), result_log=log)
+
+    reporter.log_result(test_name="test_a", nodeid="t.py::test_a", status="passed", duration=0.1)
+    log.close()
+
+    assert reporter.results == []
+    assert [r["nodeid"] for r in iter_results(tmp_path / "final_report.ndjson")] == ["t.py::test_a"]
+
+
+def test_merge_reads_worker_result_logs(tmp_path):
+    (tmp_path / "final_report_gw0.ndjson").write_text(
+        json.dumps({"nodeid": "test_1", "status": "failed", "links": []}) + "\n"
+    )
+    (tmp_path / "final_report_gw1.ndjson").write_text(
+        json.dumps({"nodeid": "test_1", "status": "passed", "links": []}) + "\n"
+        + json.dumps({"nodeid": "test_2", "status": "passed", "links": []}) + "\n"
+    )
+
+    merge_json_reports(directory=str(tmp_path), output_path=str(tmp_path / "merged.json"))
+
+    report = json.loads((tmp_path / "merged.json").read_text())
+    assert [(r["nodeid"], r["status"], r["flaky"]) for r in report["results"]] == [
+        ("test_1", "passed", True),
+        ("test_2", "passed", False),
+    ]
+
+
+def test_merge_skips_worker_reports_of_the_other_format(tmp_path):
+    # A JSON report left by an earlier run without --plus-result-log
+    (tmp_path / "final_report_gw0.json").write_text(
+        json.dumps({"results": [{"nodeid": "test_1", "status": "failed", "links": []}]})
+    )
+    (tmp_path / "final_report_gw0.ndjson").write_text(
+        json.dumps({"nodeid": "test_1", "status": "passed", "links": []}) + "\n"
+    )
+
+    merge_json_reports(directory=str(tmp_path), output_path=str(tmp_path / "merged.out"),
+                       suffixes=(RESULT_LOG_SUFFIX,))
+
+    report = json.loads((tmp_path / "merged.out").read_text())
+    assert [(r["nodeid"], r["status"], r["flaky"]) for r in report["results"]] == [("test_1", "passed", False)]
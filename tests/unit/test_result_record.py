@@ -0,0 +1,64 @@
+import json
+
+from pytest_html_plus.plugin import mark_flaky_tests
+from pytest_html_plus.result_record import ResultRecord, json_default
+
+
+def make_record(index, status="passed"):
+    return ResultRecord(
+        test=f"test_param_{index}_",
+        nodeid=f"tests/test_mod.py::test_param[{index}]",
+        status=status,
+        duration=0.5,
+        markers=["parametrize", "smoke"],
+        file="tests/test_mod.py",
+        line=3,
+        stdout="",
+        stderr="",
+        worker="main",
+        links=[],
+    )
+
+
+def test_record_reads_like_the_result_dict():
+    record = make_record(1)
+
+    assert record["nodeid"] == "tests/test_mod.py::test_param[1]"
+    assert record.get("markers") == ["parametrize", "smoke"]
+    assert record.get("logs") == []
+    assert record.get("flaky") is None
+    assert record["timestamp"].endswith("Z")
+    assert list(record) == [
+        "test", "nodeid", "status", "duration", "trace", "error", "markers", "file", "line",
+        "stdout", "stderr", "timestamp", "screenshot", "logs", "worker", "links",
+    ]
+
+
+def test_records_share_repeated_strings():
+    first, second = make_record(1), make_record(2)
+
+    assert first._markers is second._markers
+    assert first._nodeid_prefix is second._nodeid_prefix
+    assert first.status is second.status
+
+
+def test_record_serializes_to_the_json_report_shape():
+    record = make_record(1)
+    record["flaky"] = False
+
+    payload = json.loads(json.dumps({"results": [record]}, default=json_default))
+
+    assert payload["results"][0] == record.to_dict()
+    assert payload["results"][0]["flaky"] is False
+
+
+def test_mark_flaky_tests_accepts_records():
+    results = [make_record(1, status="failed"), make_record(1, status="passed"), make_record(2)]
+
+    marked = mark_flaky_tests(results)
+
+    assert [(r["nodeid"], r["flaky"]) for r in marked] == [
+        ("tests/test_mod.py::test_param[1]", True),
+        ("tests/test_mod.py::test_param[2]", False),
+    ]
+    assert "flaky" not in results[1]
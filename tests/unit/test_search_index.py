@@ -0,0 +1,40 @@
+from pytest_html_plus.search_index import SEARCH_ERROR_CHARS, build_search_index, search_text
+
+
+results = [
+    {"test": "test_login", "nodeid": "tests/test_auth.py::test_login", "markers": ["smoke"], "links": ["JIRA-1"]},
+    {"test": "test_logout", "nodeid": "tests/test_auth.py::test_logout", "markers": [], "links": [],
+     "error": "AssertionError: Session still open"},
+    {"test": "test_cart", "nodeid": "tests/test_shop.py::test_cart", "markers": None, "links": None},
+]
+
+
+def decode(deltas):
+    positions, current = [], 0
+    for delta in deltas:
+        current += delta
+        positions.append(current)
+    return positions
+
+
+def test_search_text_covers_every_searchable_field():
+    text = search_text(results[0])
+
+    assert text.split("\n") == ["test_login", "tests/test_auth.py::test_login", "smoke", "jira-1"]
+
+
+def test_search_text_truncates_long_errors():
+    text = search_text({"test": "test_a", "error": "x" * (SEARCH_ERROR_CHARS * 2)})
+
+    assert text.count("x") == SEARCH_ERROR_CHARS
+
+
+def test_search_index_posting_lists_are_delta_encoded():
+    index = build_search_index(results)
+
+    assert index["gram_size"] == 3
+    assert index["documents"] == [search_text(test) for test in results]
+    assert decode(index["grams"]["log"]) == [0, 1]
+    assert decode(index["grams"]["tes"]) == [0, 1, 2]
+    assert decode(index["grams"]["ses"]) == [1]
+    assert "car" in index["grams"] and decode(index["grams"]["car"]) == [2]
@@ -0,0 +1,80 @@
+import json
+import random
+from types import SimpleNamespace
+
+from _pytest.reports import TestReport
+
+from pytest_html_plus import plugin
+from pytest_html_plus.json_merge import WorkerResultMerge, merge_json_reports
+
+
+def worker_results(worker, count):
+    return [
+        {"nodeid": f"test_{(i * 7 + len(worker)) % 9}", "status": random.choice(["passed", "failed"]),
+         "worker": worker, "links": [], "markers": []}
+        for i in range(count)
+    ]
+
+
+def test_folding_results_matches_merging_worker_files(tmp_path):
+    random.seed(3)
+    per_worker = {worker: worker_results(worker, 6) for worker in ("gw0", "gw1", "gw10", "gw2")}
+    for worker, results in per_worker.items():
+        (tmp_path / f"final_report_{worker}.json").write_text(json.dumps({"results": results}))
+    merge_json_reports(directory=str(tmp_path), output_path=str(tmp_path / "merged.out"))
+
+    # Reports from different workers arrive interleaved, but in order for each worker
+    fold = WorkerResultMerge()
+    queues = {worker: list(results) for worker, results in per_worker.items()}
+    while any(queues.values()):
+        worker = random.choice([w for w, queue in queues.items() if queue])
+        fold.add(queues[worker].pop(0))
+
+    assert fold.results() == json.loads((tmp_path / "merged.out").read_text())["results"]
+
+
+def test_results_reach_the_controller_through_reports_and_workeroutput(monkeypatch):
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+    config = SimpleNamespace(_plus_worker_merge=WorkerResultMerge())
+    monkeypatch.setattr(plugin, "_saved_config", config, raising=False)
+
+    report = TestReport("t.py::test_a", ("t.py", 1, "test_a"), {}, "passed", None, "call")
+    report.plus_result = {"nodeid": "t.py::test_a", "status": "passed", "worker": "gw0"}
+    plugin.pytest_runtest_logreport(TestReport._from_json(report._to_json()))
+    node = SimpleNamespace(config=config, workeroutput={"plus_results": [
+        {"nodeid": "t.py", "test": "COLLECTION ERROR", "status": "error", "worker": "gw0"},
+    ]})
+    plugin.pytest_testnodedown(node, None)
+
+    assert [(r["nodeid"], r["status"]) for r in config._plus_worker_merge.results()] == [
+        ("t.py", "error"),
+        ("t.py::test_a", "passed"),
+    ]
+
+
+def test_channel_worker_with_result_log_hands_over_collection_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw0")
+    # pytest_configure replaces the plugin's saved config; restore it afterwards
+    monkeypatch.setattr(plugin, "_saved_config", None, raising=False)
+    options = {"--plus-xdist-transport": "channel", "--plus-result-log": True, "-n": 2}
+    worker_config = SimpleNamespace(getoption=lambda name, default=None: options.get(name, default), workeroutput={})
+    plugin.pytest_configure(worker_config)
+    reporter = worker_config._json_reporter
+
+    plugin.pytest_collectreport(SimpleNamespace(failed=True, nodeid="test_broken.py", longrepr="ImportError: boom",
+                                                fspath="test_broken.py", duration=0.0))
+    # Test results travel with their reports instead
+    sent = reporter.log_result(test_name="test_a", nodeid="t.py::test_a", status="passed", duration=0.1,
+                               worker="gw0", keep=False).to_dict()
+    plugin.pytest_sessionfinish(SimpleNamespace(config=worker_config), 0)
+
+    monkeypatch.delenv("PYTEST_XDIST_WORKER")
+    controller = SimpleNamespace(_plus_worker_merge=WorkerResultMerge())
+    controller._plus_worker_merge.add(sent)
+    plugin.pytest_testnodedown(SimpleNamespace(config=controller, workeroutput=worker_config.workeroutput), None)
+
+    assert [(r["nodeid"], r["status"]) for r in controller._plus_worker_merge.results()] == [
+        ("test_broken.py", "error"),
+        ("t.py::test_a", "passed"),
+    ]